@@ -0,0 +1,97 @@
+"""Benchmark of the edge meshing of `OccParser` on solids with many faces.
+
+Compares the legacy face lookup of edge meshing (linear scan of all meshed
+faces with `IsSame`, for each edge) with the indexed lookup of
+`TopTools_IndexedMapOfShape`, on compounds of an increasing number of boxes.
+The total time of `OccParser` (meshing included) is also reported.
+
+Requires pythonocc-core.
+
+Usage: python benchmarks/bench_occ_edge_mesh.py
+"""
+import timeit
+
+from OCC.Core.BRep import BRep_Builder
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+from OCC.Core.gp import gp_Pnt
+from OCC.Core.TopAbs import TopAbs_EDGE, TopAbs_FACE
+from OCC.Core.TopExp import TopExp_Explorer, topexp
+from OCC.Core.TopoDS import TopoDS_Compound, topods
+from OCC.Core.TopTools import (
+    TopTools_IndexedDataMapOfShapeListOfShape,
+    TopTools_IndexedMapOfShape,
+)
+
+from cosapp_lab.widgets.utils import OccParser
+
+
+def make_boxes(n_boxes: int) -> TopoDS_Compound:
+    compound = TopoDS_Compound()
+    builder = BRep_Builder()
+    builder.MakeCompound(compound)
+    for i in range(n_boxes):
+        box = BRepPrimAPI_MakeBox(gp_Pnt(2.0 * i, 0.0, 0.0), 1.0, 1.0, 1.0).Shape()
+        builder.Add(compound, box)
+    return compound
+
+
+def edge_faces(shape):
+    edge_map = TopTools_IndexedDataMapOfShapeListOfShape()
+    topexp.MapShapesAndAncestors(shape, TopAbs_EDGE, TopAbs_FACE, edge_map)
+    return [
+        topods.Face(edge_map.FindFromIndex(i).First())
+        for i in range(1, edge_map.Size() + 1)
+        if edge_map.FindFromIndex(i).Size() != 0
+    ]
+
+
+def all_faces(shape):
+    faces = []
+    expl = TopExp_Explorer(shape, TopAbs_FACE)
+    while expl.More():
+        faces.append(topods.Face(expl.Current()))
+        expl.Next()
+    return faces
+
+
+def legacy_lookup(faces, queries):
+    """Face lookup used before face indexing."""
+    found = []
+    for face in queries:
+        match = None
+        for i, f in enumerate(faces):
+            if face.IsSame(f):
+                match = i
+        found.append(match)
+    return found
+
+
+def indexed_lookup(faces, queries):
+    face_map = TopTools_IndexedMapOfShape()
+    for face in faces:
+        face_map.Add(face)
+    return [face_map.FindIndex(face) - 1 for face in queries]
+
+
+def main(repeat: int = 3):
+    print(
+        f"{'faces':>8} {'edges':>8} {'legacy [ms]':>12} {'indexed [ms]':>13}"
+        f" {'speedup':>8} {'OccParser [ms]':>15}"
+    )
+    for n_boxes in (10, 50, 200, 500):
+        shape = make_boxes(n_boxes)
+        faces = all_faces(shape)
+        queries = edge_faces(shape)
+        assert legacy_lookup(faces, queries) == indexed_lookup(faces, queries)
+
+        legacy = min(timeit.repeat(lambda: legacy_lookup(faces, queries), number=1, repeat=repeat))
+        indexed = min(timeit.repeat(lambda: indexed_lookup(faces, queries), number=1, repeat=repeat))
+        parser = min(timeit.repeat(lambda: OccParser([shape]), number=1, repeat=repeat))
+        print(
+            f"{len(faces):>8} {len(queries):>8} {legacy * 1e3:>12.2f} {indexed * 1e3:>13.2f}"
+            f" {legacy / indexed:>8.1f} {parser * 1e3:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
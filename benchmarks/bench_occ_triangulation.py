@@ -0,0 +1,81 @@
+"""Benchmark of the extraction of face triangulations in `OccParser`.
+
+Compares the legacy extraction (reading node coordinates and triangle
+indices one component at a time into Python lists) with the array
+extraction of `OccParser.get_node_array` and `OccParser.get_triangle_array`,
+on spheres meshed with decreasing deflection. Meshing time is excluded.
+
+Requires pythonocc-core.
+
+Usage: python benchmarks/bench_occ_triangulation.py
+"""
+import timeit
+
+import numpy
+from OCC.Core.BRep import BRep_Tool
+from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeSphere
+from OCC.Core.TopAbs import TopAbs_FACE
+from OCC.Core.TopExp import TopExp_Explorer
+from OCC.Core.TopLoc import TopLoc_Location
+from OCC.Core.TopoDS import topods
+
+from cosapp_lab.widgets.utils import OccParser
+
+
+def triangulations(shape):
+    triangulations = []
+    expl = TopExp_Explorer(shape, TopAbs_FACE)
+    while expl.More():
+        loc = TopLoc_Location()
+        T = BRep_Tool().Triangulation(topods.Face(expl.Current()), loc)
+        if T is not None:
+            triangulations.append(T)
+        expl.Next()
+    return triangulations
+
+
+def legacy_extract(triangulations):
+    """Extraction algorithm used before array extraction."""
+    result = []
+    for T in triangulations:
+        vtx = []
+        for node in OccParser.get_nodes(T):
+            vtx.extend(node.Coord(d) for d in range(1, 4))
+        idx = []
+        for triangle in OccParser.get_triangles(T):
+            idx.extend(triangle.Value(d) - 1 for d in range(1, 4))
+        result.append((numpy.array(vtx, dtype="float64"), numpy.array(idx, "uint16")))
+    return result
+
+
+def array_extract(triangulations):
+    return [
+        (
+            OccParser.get_node_array(T).ravel(),
+            (OccParser.get_triangle_array(T).ravel() - 1).astype("uint16"),
+        )
+        for T in triangulations
+    ]
+
+
+def main(repeat: int = 5):
+    print(f"{'deflection':>10} {'triangles':>10} {'legacy [ms]':>12} {'new [ms]':>10} {'speedup':>8}")
+    for deflection in (1e-1, 3e-2, 1e-2, 3e-3, 1e-3):
+        shape = BRepPrimAPI_MakeSphere(1.0).Shape()
+        BRepMesh_IncrementalMesh(shape, deflection, False, 0.5, True)
+        faces = triangulations(shape)
+        n_triangles = sum(T.NbTriangles() for T in faces)
+        for (v0, i0), (v1, i1) in zip(legacy_extract(faces), array_extract(faces)):
+            assert numpy.array_equal(v0, v1) and numpy.array_equal(i0, i1)
+
+        legacy = min(timeit.repeat(lambda: legacy_extract(faces), number=1, repeat=repeat))
+        new = min(timeit.repeat(lambda: array_extract(faces), number=1, repeat=repeat))
+        print(
+            f"{deflection:>10.0e} {n_triangles:>10} "
+            f"{legacy * 1e3:>12.2f} {new * 1e3:>10.2f} {legacy / new:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
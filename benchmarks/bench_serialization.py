@@ -0,0 +1,77 @@
+"""Benchmark of the serialization of system variables.
+
+Compares the legacy serialization (probing each value with `is_jsonable`,
+then serializing it again) with `CosappObjectParser.serialize_data_from_system`,
+on systems of increasing size. Timings do not include the final `json.dumps`,
+which is common to both methods.
+
+Usage: python benchmarks/bench_serialization.py
+"""
+import json
+import timeit
+
+import numpy
+from cosapp.ports import Port
+from cosapp.systems import System
+
+from cosapp_lab.widgets.utils import CosappObjectParser, is_jsonable
+
+
+class DataPort(Port):
+    def setup(self) -> None:
+        self.add_variable("number", 1.0)
+        self.add_variable("flag", True)
+        self.add_variable("label", "foo")
+        self.add_variable("vector", numpy.linspace(0.0, 1.0, 10))
+        self.add_variable("matrix", numpy.ones((5, 5)))
+
+
+class Component(System):
+    def setup(self):
+        self.add_inward("x", 1.0)
+        self.add_inward("options", {"a": 1, "b": [1, 2]})
+        self.add_outward("y", 0.0)
+        self.add_input(DataPort, "data_in")
+        self.add_output(DataPort, "data_out")
+
+
+class Assembly(System):
+    def setup(self, n_children=10):
+        for i in range(n_children):
+            self.add_child(Component(f"c{i}"))
+
+
+def legacy_serialize(sys_data: CosappObjectParser) -> dict:
+    """Serialization algorithm used before variable classification."""
+    content = {}
+    system = sys_data._system()
+    for var_name in sys_data.variable_list:
+        value = system[var_name]
+        if is_jsonable(value):
+            pkl_str = value
+        elif isinstance(value, numpy.ndarray):
+            pkl_str = value.tolist()
+        else:
+            pkl_str = "non-jsonable"
+        content[f"{system.name}.{var_name}"] = [type(value).__name__, pkl_str]
+    return content
+
+
+def main(repeat: int = 5):
+    print(f"{'children':>10} {'variables':>10} {'legacy [ms]':>12} {'new [ms]':>10} {'speedup':>8}")
+    for n_children in (10, 100, 1000):
+        system = Assembly("assembly", n_children=n_children)
+        sys_data = CosappObjectParser(system)
+        new_serialize = lambda: sys_data.serialize_data_from_system(False)
+        assert json.dumps(legacy_serialize(sys_data)) == json.dumps(new_serialize())
+
+        legacy = min(timeit.repeat(lambda: legacy_serialize(sys_data), number=1, repeat=repeat))
+        new = min(timeit.repeat(new_serialize, number=1, repeat=repeat))
+        print(
+            f"{n_children:>10} {len(sys_data.variable_list):>10} "
+            f"{legacy * 1e3:>12.2f} {new * 1e3:>10.2f} {legacy / new:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,21 @@
 from jupyter_client.blocking import BlockingKernelClient
 import json
 import queue
-from typing import Tuple, Union, Dict
+import time
+from typing import List, Optional, Tuple, Union, Dict
+
+# Expression returning the `SysExplorer` instance of a system in kernel
+SYSEXPLORER_LOOKUP = (
+    '__import__("cosapp_lab.widgets", fromlist=["SysExplorer"])'
+    ".SysExplorer.get_instance({!r})"
+)
+# Default time in seconds waited for each output of a command
+IOPUB_TIMEOUT = 30
+# Statement publishing the value of an expression as `application/json` data
+JSON_DISPLAY = (
+    '__import__("IPython.display", fromlist=["display"])'
+    '.display({{"application/json": {}}}, raw=True)'
+)
 
 
 class CosappKernelConnetion:
@@ -16,35 +30,52 @@ class CosappKernelConnetion:
     system_name: str
         The name of Cosapp system, this name is used to get correct `SysExplorer` instance.
 
+    sysexplorer: Optional[str]
+        Previously resolved reference to the `SysExplorer` instance; if not
+        provided, the instance is looked up in connected kernel.
+
     Attributes
     ----------
     client : BlockingKernelClient
         The blocking client instance of connected kernel
 
     idle_count : int
-        Counter used to get output of execution, this counter is reset
-        to 0 each time a command is ternimated.
+        Number of `idle` status messages received for the current command,
+        reset to 0 each time a command is executed.
+
+    timed_out : bool
+        Flag set if the output of a command was not received in time; the
+        connection should then be closed, as remaining messages of the
+        command may still be published.
 
     sysexplorer : str
-        Name of the `SysExplorer` instance associated with `system_name`
-        in connected kernel.
+        Python expression referring to the `SysExplorer` instance associated
+        with `system_name` in connected kernel.
 
     system_name : str
         Name of the `cosapp` system instance in connected kernel.
 
     """
 
-    def __init__(self, connection_file: str, system_name: str):
+    def __init__(
+        self, connection_file: str, system_name: str, sysexplorer: Optional[str] = None
+    ):
         self.client = BlockingKernelClient()
 
         self.client.load_connection_file(connection_file)
         self.client.start_channels()
         self.idle_count = 0
-        self.sysexplorer, self.system_name = self.get_variable_name(system_name)
+        self.timed_out = False
+        if sysexplorer is not None:
+            self.sysexplorer, self.system_name = sysexplorer, repr(system_name)
+        else:
+            self.sysexplorer, self.system_name = self.find_sysexplorer(system_name)
         if self.sysexplorer == None:
             raise NameError("Requested SysExplorer instance can not be found")
 
-    def execute(self, cmd: str, to_json=True) -> Tuple[str, Union[str, Dict]]:
+    def execute(
+        self, cmd: str, to_json=True, deadline: Optional[float] = None
+    ) -> Tuple[str, Union[str, Dict]]:
         """
         Execute a command in connected kernel and return the output
 
@@ -56,6 +87,11 @@ class CosappKernelConnetion:
         to_json: bool
             Flag to convert output string into a Dict.
 
+        deadline: Optional[float]
+            Time, as given by `time.monotonic`, until which the end of the
+            command is waited for, however long the kernel stays silent;
+            if `None`, each output is waited for `IOPUB_TIMEOUT` seconds.
+
         Returns
         -------
 
@@ -66,50 +102,107 @@ class CosappKernelConnetion:
             Depend on `to_json` flag, `value` will be a string or a dict .
         """
         msg_id = self.client.execute(cmd)
+        self.idle_count = 0
         value = None
         value_type = "unknown"
         while True:
+            if deadline is None:
+                timeout = IOPUB_TIMEOUT
+            else:
+                timeout = max(deadline - time.monotonic(), 0.0)
             try:
-                io_msg = self.client.get_iopub_msg(timeout=30)["content"]
-                if "data" in io_msg:
-                    if "text/plain" in io_msg["data"]:
-                        value_string: str = io_msg["data"]["text/plain"]
-                        value_type = "data"
-                        if to_json:
-                            if value_string.startswith("'"):
-                                value = json.loads(value_string[1:-1].replace("'", '"'))
-                            elif value_string.startswith("{"):
-                                value = json.loads(value_string.replace("'", '"'))
-                            else:
-                                value = ["Json parser error", "Data format incorrect"]
-                                value_type = "error"
-                        else:
-                            value = value_string
-
-                elif "name" in io_msg:
-                    value = io_msg["text"]
-                    value_type = "text"
-                elif "traceback" in io_msg:
-                    value = [io_msg["ename"], io_msg["evalue"]]
-                    value_type = "error"
-                elif (
-                    "execution_state" in io_msg and io_msg["execution_state"] == "idle"
-                ):
-                    if self.idle_count == 0:
-                        if value is None and value_type == "unknown":
-                            self.idle_count += 1
-                        else:
-                            break
-                    else:
-                        break
-
+                msg = self.client.get_iopub_msg(timeout=timeout)
             except queue.Empty as e:
+                # Messages of this command may still come: the connection
+                # can not be used for other commands
+                self.timed_out = True
                 if value is None and value_type == "unknown":
                     return "error", ["error log", str(e)]
-                else:
-                    print(e)
+                print(e)
+                break
+            if msg["parent_header"].get("msg_id") != msg_id:
+                # Output of another command, e.g. a previous one which timed
+                # out, or one executed from the notebook
+                continue
+            io_msg = msg["content"]
+            if "data" in io_msg:
+                if "application/json" in io_msg["data"]:
+                    value = io_msg["data"]["application/json"]
+                    value_type = "data"
+                elif "text/plain" in io_msg["data"]:
+                    value_string: str = io_msg["data"]["text/plain"]
+                    value_type = "data"
+                    if to_json:
+                        if value_string.startswith("'"):
+                            value = json.loads(value_string[1:-1].replace("'", '"'))
+                        elif value_string.startswith("{"):
+                            value = json.loads(value_string.replace("'", '"'))
+                        else:
+                            value = ["Json parser error", "Data format incorrect"]
+                            value_type = "error"
+                    else:
+                        value = value_string
+
+            elif "name" in io_msg:
+                value = io_msg["text"]
+                value_type = "text"
+            elif "traceback" in io_msg:
+                value = [io_msg["ename"], io_msg["evalue"]]
+                value_type = "error"
+            elif "execution_state" in io_msg and io_msg["execution_state"] == "idle":
+                # Kernel is idle once all outputs of the command are published
+                self.idle_count += 1
+                break
         return value_type, value
 
+    def evaluate(
+        self, expr: str, deadline: Optional[float] = None
+    ) -> Tuple[str, Union[Dict, List, str]]:
+        """
+        Evaluate a Python expression with a JSON-compatible value in
+        connected kernel, and return its value. The value is published by
+        the kernel as `application/json` display data, and is received as
+        is, without parsing its text representation.
+
+        Parameters
+        ----------
+        expr: str
+            Python expression to be evaluated.
+
+        deadline: Optional[float]
+            Time until which the value is waited for (see `execute`).
+
+        Returns
+        -------
+
+        value_type : str
+            Type of return value, `"data"` on success.
+
+        value : Union[Dict, List, str]
+            Value of the expression, or error description.
+        """
+        return self.execute(JSON_DISPLAY.format(expr), False, deadline)
+
+    def find_sysexplorer(self, requested_system_name: str) -> Tuple[str]:
+        """
+        Get a reference to the `SysExplorer` instance associated with
+        `requested_system_name` from the registry of instances, in a single
+        kernel round-trip. Fall back to the scan of the user namespace
+        if the registry is not available in connected kernel.
+
+        Parameters
+        ----------
+        requested_system_name: str
+            Name of the `cosapp` system instance in connected kernel.
+        """
+        lookup = SYSEXPLORER_LOOKUP.format(requested_system_name)
+        flag, found = self.execute(f"{lookup} is not None", False)
+        if flag == "data" and found == "True":
+            return lookup, repr(requested_system_name)
+        elif flag == "data":
+            return None, None
+        return self.get_variable_name(requested_system_name)
+
     def get_variable_name(self, requested_system_name: str) -> Tuple[str]:
         """
         Get the `SysExplorer` instance associated with `requested_system_name`
@@ -144,6 +237,13 @@ class CosappKernelConnetion:
                         system_name = system_name_test
         return ret, system_name
 
+    def is_alive(self) -> bool:
+        """
+        Check if connected kernel is still alive, and if the connection
+        can still be used
+        """
+        return not self.timed_out and self.client.is_alive()
+
     def disconnect(self):
         """
         Stop the connection to kernel
@@ -1,28 +1,114 @@
+import asyncio
 import json
-from typing import Dict
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Union
 from notebook.base.handlers import APIHandler
 from notebook.notebookapp import NotebookWebApplication
 from notebook.utils import url_path_join
+from tornado.ioloop import IOLoop
 from pathlib import Path
 import shutil
 from .cosapp_kernel import CosappKernelConnetion
+from .kernel_pool import KernelConnectionPool
 
 COSAPP_URL_START = "cosapp/server/start"
 COSAPP_URL_STOP = "cosapp/server/stop"
 COSAPP_URL_INFO = "cosapp/server/info"
 COSAPP_URL_RUN = "cosapp/server/run"
+COSAPP_URL_BATCH = "cosapp/server/batch"
 COSAPP_CONFIG_DIR = Path.home() / ".cosapp.d"
+KERNEL_IDLE_TIMEOUT = 600.0
+# Maximum number of requests handled concurrently, and timeout of requests
+# in seconds; both can be set by environment variables
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("COSAPP_SERVER_MAX_CONCURRENT_REQUESTS", 8))
+REQUEST_TIMEOUT = float(os.environ.get("COSAPP_SERVER_REQUEST_TIMEOUT", 300))
+# Default number of cases run per kernel call by the batch endpoint
+BATCH_CHUNK_SIZE = 32
+# Statement running the system with a parameter set in kernel
+# (see `SysExplorer.run_case`)
+RUN_CASE = (
+    "{sysexplorer}.run_case("
+    '__import__("json").loads({parameters!r}))'
+)
+# Expression running parameter sets in kernel (see `SysExplorer.run_cases`)
+RUN_CASES = (
+    "{sysexplorer}.run_cases("
+    '__import__("json").loads({cases!r}), {outputs!r}, {offset})'
+)
+
+TIMEOUT_ERROR = ["TimeoutError", "Request timed out"]
+# Name of the kernel error raised when a run is discarded because another
+# one is in progress (see `ControllerComponent.run_and_wait`)
+REJECTED_ERROR = "RunRejected"
+
+
+def is_rejected(result: Any) -> bool:
+    """Check if `result` reports a run rejected by the kernel."""
+    if not isinstance(result, dict):
+        return False
+    error = result.get("error")
+    return isinstance(error, list) and len(error) > 0 and error[0] == REJECTED_ERROR
+
+# Reference to the `SysExplorer` instance of each session, resolved once
+_sysexplorer_cache: Dict[str, str] = {}
+
+
+def open_kernel_connection(token: str) -> Optional[CosappKernelConnetion]:
+    """
+    Connect to kernel by using configuration stored in `server`
+    folder of `COSAPP_CONFIG_DIR`
+    """
+    folder_path = COSAPP_CONFIG_DIR / "server" / token
+    if folder_path.exists():
+        try:
+            kernel_config = folder_path / "config.json"
+            with open(kernel_config, "r") as f:
+                config = json.load(f)
+            connection_file = config["connection"]
+            request_name = config["system_name"]
+            kc = CosappKernelConnetion(
+                connection_file, request_name, _sysexplorer_cache.get(token)
+            )
+            _sysexplorer_cache[token] = kc.sysexplorer
+        except Exception as e:
+            print(e)
+            kc = None
+    else:
+        kc = None
+    return kc
 
 
-def setup_cosapp_server_handlers(web_app: NotebookWebApplication):
+def setup_cosapp_server_handlers(
+    web_app: NotebookWebApplication,
+    max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+    request_timeout: float = REQUEST_TIMEOUT,
+):
     """Setup handlers for to cosapp server.
 
     Parameters
     ----------
     web_app : notebook.notebookapp.NotebookWebApplication
         The notebook web application
+
+    max_concurrent_requests : int
+        Maximum number of requests communicating with kernels at the same
+        time; further requests wait for a free slot.
+
+    request_timeout : float
+        Time in seconds after which a request is answered with a timeout
+        error, whether it is waiting for a slot or for its kernel.
     """
     host_pattern = ".*$"
+    web_app.settings["cosapp_kernel_pool"] = KernelConnectionPool(
+        open_kernel_connection, KERNEL_IDLE_TIMEOUT
+    )
+    web_app.settings["cosapp_executor"] = ThreadPoolExecutor(
+        max_concurrent_requests, thread_name_prefix="cosapp-server"
+    )
+    web_app.settings["cosapp_request_timeout"] = request_timeout
 
     def build_url(url_extension: str) -> str:
         return url_path_join(web_app.settings["base_url"], url_extension)
@@ -34,6 +120,7 @@ def setup_cosapp_server_handlers(web_app: NotebookWebApplication):
             (build_url(COSAPP_URL_STOP), StopSessionHandler),
             (build_url(COSAPP_URL_RUN), RunSessionHandler),
             (build_url(COSAPP_URL_INFO), InfoSessionHandler),
+            (build_url(COSAPP_URL_BATCH), BatchSessionHandler),
         ],
     )
 
@@ -41,36 +128,48 @@ def setup_cosapp_server_handlers(web_app: NotebookWebApplication):
 class CustomAPI(APIHandler):
     """
     Custom `APIHandler` to bypass `xsrf` cookie check and
-    close kernel connection on finish.
+    to communicate with kernels without blocking the server.
     """
 
     def check_xsrf_cookie(self):
         return
 
-    def on_finish(self):
-        if hasattr(self, "kc") and self.kc is not None:
-            self.kc.disconnect()
+    @property
+    def kernel_pool(self) -> KernelConnectionPool:
+        return self.settings["cosapp_kernel_pool"]
 
-    def create_kernel_connection(self, token: str) -> CosappKernelConnetion:
+    async def call_in_executor(self, func: Callable, *args) -> Any:
         """
-        Helper function to connect to kernel by using
-        configuration stored in `server` folder of `COSAPP_CONFIG_DIR`
+        Call `func(*args, deadline=deadline)`, which communicates with a
+        kernel using blocking calls, in the bounded thread pool of the
+        server. `deadline` is the end of the request timeout, as given by
+        `time.monotonic`, until which kernel outputs are waited for. Raise
+        `asyncio.TimeoutError` if the result is not available after the
+        request timeout; the call itself runs to completion in the background.
         """
-        folder_path = COSAPP_CONFIG_DIR / "server" / token
-        if folder_path.exists():
-            try:
-                kernel_config = folder_path / "config.json"
-                with open(kernel_config, "r") as f:
-                    config = json.load(f)
-                connection_file = config["connection"]
-                request_name = config["system_name"]
-                kc = CosappKernelConnetion(connection_file, request_name)
-            except Exception as e:
-                print(e)
-                kc = None
-        else:
-            kc = None
-        return kc
+        executor = self.settings["cosapp_executor"]
+        timeout = self.settings["cosapp_request_timeout"]
+        deadline = time.monotonic() + timeout
+        future = IOLoop.current().run_in_executor(
+            executor, partial(func, *args, deadline=deadline)
+        )
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def run_in_kernel(self, func: Callable, *args) -> None:
+        """
+        Finish the request with the result of `func(*args)`, called with
+        `call_in_executor`. The request is answered with status 504 on
+        timeout, and 409 if the run is rejected because another one is in
+        progress.
+        """
+        try:
+            result = await self.call_in_executor(func, *args)
+        except asyncio.TimeoutError:
+            self.set_status(504)
+            result = {"error": TIMEOUT_ERROR, "result": None}
+        if is_rejected(result):
+            self.set_status(409)
+        self.finish(result)
 
 
 class StartSessionHandler(CustomAPI):
@@ -83,8 +182,13 @@ class StartSessionHandler(CustomAPI):
     def get(self):
         self.finish("Start")
 
-    def post(self):
-        self.clear_server_folder()
+    async def post(self):
+        try:
+            await self.call_in_executor(self.clear_server_folder)
+        except asyncio.TimeoutError:
+            self.set_status(504)
+            self.finish({"error": TIMEOUT_ERROR, "result": None})
+            return
         input_data = self.get_json_body()
         folder_path = COSAPP_CONFIG_DIR / "server" / input_data["token"]
         folder_path.mkdir(parents=True, exist_ok=True)
@@ -94,18 +198,29 @@ class StartSessionHandler(CustomAPI):
 
         self.finish("1")
 
-    def clear_server_folder(self):
+    def clear_server_folder(self, deadline: float):
+        """
+        Remove the configuration of sessions whose kernel can not be reached.
+
+        Sessions with a pooled connection are kept, their connection being
+        checked on next use; they are not waited for if they are busy.
+        Other sessions are checked with a temporary connection, closed
+        right away. Sessions not checked before `deadline` are kept.
+        """
+        self.kernel_pool.evict_idle()
         folder_path = COSAPP_CONFIG_DIR / "server"
         for sub_folder in folder_path.glob("*"):
-            config_path = folder_path / sub_folder
-            try:
-                kc = self.create_kernel_connection(sub_folder)
-                if kc == None:
-                    shutil.rmtree(config_path)
-                else:
-                    kc.disconnect()
-            except:
-                shutil.rmtree(config_path)
+            if time.monotonic() > deadline:
+                break
+            token = sub_folder.name
+            if token in self.kernel_pool:
+                continue
+            kc = open_kernel_connection(token)
+            if kc is not None:
+                kc.disconnect()
+            else:
+                _sysexplorer_cache.pop(token, None)
+                shutil.rmtree(sub_folder)
 
 
 class StopSessionHandler(CustomAPI):
@@ -117,8 +232,14 @@ class StopSessionHandler(CustomAPI):
     def get(self):
         self.finish("Stop")
 
-    def post(self):
+    async def post(self):
         input_data = self.get_json_body()
+        # Eviction waits for the end of requests using the connection
+        executor = self.settings["cosapp_executor"]
+        await IOLoop.current().run_in_executor(
+            executor, self.kernel_pool.evict, input_data["token"]
+        )
+        _sysexplorer_cache.pop(input_data["token"], None)
         folder_path = COSAPP_CONFIG_DIR / "server" / input_data["token"]
         if folder_path.exists():
             try:
@@ -137,72 +258,185 @@ class InfoSessionHandler(CustomAPI):
     Handle system information request.
     """
 
-    def post(self):
-
+    async def post(self):
         input_data = self.get_json_body()
         server_msg = f"Received INFO request from {self.request.remote_ip}"
-        self.kc = self.create_kernel_connection(input_data["token"])
-
-        if self.kc is not None:
-            self.kc.execute(f"{self.kc.sysexplorer}.update_server_log('{server_msg}')")
+        await self.run_in_kernel(self.get_info, input_data, server_msg)
+
+    def get_info(
+        self, input_data: Dict, server_msg: str, deadline: float
+    ) -> Union[Dict, str]:
+        with self.kernel_pool.connection(input_data["token"]) as kc:
+            if kc is None:
+                return "-1"
+            kc.execute(
+                f"{kc.sysexplorer}.update_server_log('{server_msg}')", deadline=deadline
+            )
             msg = {}
             for name in ["children_list", "children_port", "children_drive"]:
-                cmd = f"{self.kc.sysexplorer}.sys_data.{name}"
+                cmd = f"{kc.sysexplorer}.sys_data.{name}"
                 try:
-                    flag, ret = self.kc.execute(cmd)
+                    flag, ret = kc.evaluate(cmd, deadline)
                     msg[name] = ret
                 except Exception as e:
                     print(e)
-                    msg["error"] = e
+                    msg["error"] = str(e)
                     break
-            self.finish(msg)
-        else:
-            self.finish("-1")
+            return msg
 
 
 class RunSessionHandler(CustomAPI):
 
     """
     Handle run system request.
+
+    The system is run through the controller of the `SysExplorer`
+    instance, like widget runs, so that it is never computed by two runs
+    at the same time. If the run is rejected by the "reject" run policy,
+    the request is answered with status 409.
     """
 
-    def post(self):
+    async def post(self):
         input_data = self.get_json_body()
+        server_msg = f"Received RUN request from {self.request.remote_ip}"
+        await self.run_in_kernel(self.run, input_data, server_msg)
+
+    def run(self, input_data: Dict, server_msg: str, deadline: float) -> Union[Dict, str]:
         post_data: Dict = input_data["data"]
         requested_result = post_data["result"]
-        server_msg = f"Received RUN request from {self.request.remote_ip}"
-        self.kc = self.create_kernel_connection(input_data["token"])
-        if self.kc is not None:
-            self.kc.execute(f"{self.kc.sysexplorer}.update_server_log('{server_msg}')")
+        with self.kernel_pool.connection(input_data["token"]) as kc:
+            if kc is None:
+                return "-1"
+            kc.execute(
+                f"{kc.sysexplorer}.update_server_log('{server_msg}')", deadline=deadline
+            )
             param_dict = post_data["parameters"]
             post_content = {}
             for key, val in param_dict.items():
                 post_content[f"{key}.{val[0]}.{val[1]}"] = val[2]
-            content = json.dumps(
-                {"action": "runSignal", "payload": post_content, "currentThread": "1"}
+            cmd = RUN_CASE.format(
+                sysexplorer=kc.sysexplorer, parameters=json.dumps(post_content)
             )
-
-            cmd = f"{self.kc.sysexplorer}._handle_button_msg('SysExplorerModel', {content}, [])"
-            run_flag, run_log = self.kc.execute(cmd, False)
+            run_flag, run_log = kc.execute(cmd, False, deadline)
             if run_flag == "error":
-                self.finish({"error": run_log, "result": None, "log": None})
+                return {"error": run_log, "result": None, "log": None}
+
+            flag, exec_result = kc.evaluate(
+                f"{kc.sysexplorer}.sys_data.serialize_data_from_system(False)", deadline
+            )
+            if flag != "data":
+                return {"error": exec_result, "result": None, "log": None}
+            ret = {}
+
+            if len(requested_result) == 0:
+                ret = exec_result
             else:
-                flag, exec_result = self.kc.execute(
-                    f"{self.kc.sysexplorer}.sys_data.serialize_data_from_system()", True
-                )
-                ret = {}
-
-                if len(requested_result) == 0:
-                    ret = exec_result
-                else:
-                    for result_key in requested_result:
-                        for key, value in exec_result.items():
-                            if key.startswith(result_key):
-                                ret[key] = value
-
-                flag, exec_log = self.kc.execute(
-                    f"{self.kc.sysexplorer}.server_log", False
+                for result_key in requested_result:
+                    for key, value in exec_result.items():
+                        if key.startswith(result_key):
+                            ret[key] = value
+
+            flag, exec_log = kc.execute(f"{kc.sysexplorer}.server_log", False, deadline)
+            return {"error": None, "result": ret, "log": exec_log}
+
+
+class BatchSessionHandler(CustomAPI):
+
+    """
+    Handle batch run request: run N parameter sets back to back, and
+    return requested results as a columnar table.
+
+    The `data` of request holds `cases`, a list of parameter sets in the
+    format of run requests, `result`, the prefixes of requested result
+    keys, and optionally `chunk_size`, the number of cases run per kernel
+    call, and `stream`. If `stream` is true, the table is streamed as
+    newline-delimited JSON, one line per chunk of cases; otherwise, the
+    whole table is returned at once.
+
+    Cases are run through the controller of the `SysExplorer` instance,
+    like widget runs, so that they never compute the system at the same
+    time as another run. If a chunk is rejected by the "reject" run
+    policy, the request is answered with status 409 (or the error is
+    streamed, once streaming has started).
+    """
+
+    async def post(self):
+        input_data = self.get_json_body()
+        post_data: Dict = input_data["data"]
+        token = input_data["token"]
+        cases = [
+            {f"{key}.{val[0]}.{val[1]}": val[2] for key, val in parameters.items()}
+            for parameters in post_data["cases"]
+        ]
+        requested_result = post_data.get("result", [])
+        chunk_size = max(int(post_data.get("chunk_size", BATCH_CHUNK_SIZE)), 1)
+        stream = bool(post_data.get("stream", False))
+        server_msg = (
+            f"Received BATCH request of {len(cases)} cases from {self.request.remote_ip}"
+        )
+        if stream:
+            self.set_header("Content-Type", "application/x-ndjson")
+
+        table: Dict[str, List] = {}
+        errors = {}
+        for offset in range(0, max(len(cases), 1), chunk_size):
+            chunk = cases[offset : offset + chunk_size]
+            try:
+                result = await self.call_in_executor(
+                    self.run_chunk, token, chunk, requested_result, offset, server_msg
                 )
-                self.finish({"error": None, "result": ret, "log": exec_log})
+            except asyncio.TimeoutError:
+                if not stream:
+                    self.set_status(504)
+                result = {"error": TIMEOUT_ERROR}
+            server_msg = None
+            if result == "-1":
+                self.finish("-1")
+                return
+            if is_rejected(result) and (offset == 0 or not stream):
+                # Status can be set as long as nothing has been sent
+                self.set_status(409)
+            done = "error" in result or offset + chunk_size >= len(cases)
+            if stream:
+                self.write(json.dumps(dict(result, offset=offset, done=done)) + "\n")
+                await self.flush()
+            elif "error" in result:
+                self.finish({"error": result["error"], "result": None})
+                return
+            else:
+                for key, column in result["columns"].items():
+                    table.setdefault(key, []).extend(column)
+                errors.update(result["errors"])
+            if done:
+                break
+        if stream:
+            self.finish()
         else:
-            self.finish("-1")
+            self.finish({"error": None, "result": table, "errors": errors})
+
+    def run_chunk(
+        self,
+        token: str,
+        cases: List[Dict],
+        outputs: List[str],
+        offset: int,
+        server_msg: Optional[str],
+        deadline: float,
+    ) -> Union[Dict, str]:
+        with self.kernel_pool.connection(token) as kc:
+            if kc is None:
+                return "-1"
+            if server_msg is not None:
+                kc.execute(
+                f"{kc.sysexplorer}.update_server_log('{server_msg}')", deadline=deadline
+            )
+            cmd = RUN_CASES.format(
+                sysexplorer=kc.sysexplorer,
+                cases=json.dumps(cases),
+                outputs=outputs or None,
+                offset=offset,
+            )
+            flag, result = kc.evaluate(cmd, deadline)
+            if flag != "data":
+                return {"error": result}
+            return result
@@ -0,0 +1,119 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from .cosapp_kernel import CosappKernelConnetion
+
+
+class _PoolEntry:
+    """Connection of the pool, with the lock granting its exclusive use."""
+
+    __slots__ = ("connection", "lock", "last_used")
+
+    def __init__(self) -> None:
+        self.connection: Optional[CosappKernelConnetion] = None
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class KernelConnectionPool:
+    """
+    Process-wide pool of live kernel connections, keyed by session token.
+
+    Connections are created on first use, and reused by following requests
+    as long as their kernel is alive. A connection is used by one request
+    at a time; concurrent requests on the same token wait for each other,
+    while requests on different tokens run in parallel.
+
+    Parameters
+    ----------
+    factory: Callable[[str], Optional[CosappKernelConnetion]]
+        Function creating the connection of a token, or returning `None`
+        if the session does not exist.
+
+    idle_timeout: float
+        Connections unused for more than `idle_timeout` seconds are closed.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str], Optional[CosappKernelConnetion]],
+        idle_timeout: float = 600.0,
+    ):
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self._entries: Dict[str, _PoolEntry] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, token: str) -> bool:
+        entry = self._entries.get(token)
+        return entry is not None and entry.connection is not None
+
+    def __len__(self) -> int:
+        return sum(entry.connection is not None for entry in self._entries.values())
+
+    @contextmanager
+    def connection(self, token: str) -> Iterator[Optional[CosappKernelConnetion]]:
+        """
+        Context manager granting the exclusive use of the connection of
+        `token`, or `None` if it can not be established.
+        """
+        self.evict_idle()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                entry = self._entries[token] = _PoolEntry()
+        with entry.lock:
+            if entry.connection is not None and not entry.connection.is_alive():
+                self._close(entry)
+            if entry.connection is None:
+                entry.connection = self.factory(token)
+            try:
+                yield entry.connection
+            finally:
+                entry.last_used = time.monotonic()
+                if entry.connection is not None and entry.connection.timed_out:
+                    # Late messages of the timed out command would be read
+                    # by the next request
+                    self._close(entry)
+                if entry.connection is None:
+                    with self._lock:
+                        if self._entries.get(token) is entry:
+                            del self._entries[token]
+
+    def evict(self, token: str) -> None:
+        """Close the connection of `token`, once it is not in use."""
+        with self._lock:
+            entry = self._entries.pop(token, None)
+        if entry is not None:
+            with entry.lock:
+                self._close(entry)
+
+    def evict_idle(self) -> None:
+        """Close connections unused for more than `idle_timeout` seconds."""
+        deadline = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [
+                token
+                for token, entry in self._entries.items()
+                if entry.last_used < deadline and not entry.lock.locked()
+            ]
+        for token in idle:
+            self.evict(token)
+
+    def clear(self) -> None:
+        """Close all connections."""
+        with self._lock:
+            tokens = list(self._entries)
+        for token in tokens:
+            self.evict(token)
+
+    @staticmethod
+    def _close(entry: _PoolEntry) -> None:
+        if entry.connection is not None:
+            try:
+                entry.connection.disconnect()
+            except Exception as e:
+                print(e)
+            entry.connection = None
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+pytest.importorskip("notebook")
+pytest.importorskip("ipykernel")
+from jupyter_client import KernelManager
+from cosapp_lab.server import cosapp_kernel
+from cosapp_lab.server.cosapp_kernel import CosappKernelConnetion
+
+
+@pytest.fixture(scope="module")
+def kernel():
+    manager = KernelManager()
+    manager.start_kernel()
+    yield manager
+    manager.shutdown_kernel(now=True)
+
+
+@pytest.fixture
+def connection(kernel):
+    kc = CosappKernelConnetion(kernel.connection_file, "foo", sysexplorer="None")
+    kc.client.wait_for_ready(timeout=30)
+    yield kc
+    kc.disconnect()
+
+
+def test_execute_deadline(monkeypatch, connection):
+    # Kernel stays silent for longer than the default output timeout
+    monkeypatch.setattr(cosapp_kernel, "IOPUB_TIMEOUT", 1)
+    cmd = '__import__("time").sleep(2); print("done")'
+    deadline = time.monotonic() + 30
+    assert connection.execute(cmd, False, deadline) == ("text", "done\n")
+    assert connection.evaluate("[1, 2]", deadline) == ("data", [1, 2])
+    assert not connection.timed_out
+
+    flag, _ = connection.execute(cmd, False, time.monotonic() + 0.5)
+    assert flag == "error"
+    assert connection.timed_out
+
+
+def test_execute_default_timeout(monkeypatch, connection):
+    monkeypatch.setattr(cosapp_kernel, "IOPUB_TIMEOUT", 1)
+    flag, _ = connection.execute('__import__("time").sleep(2)', False)
+    assert flag == "error"
+    assert connection.timed_out
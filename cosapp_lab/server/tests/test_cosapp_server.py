@@ -0,0 +1,87 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("notebook")
+pytest.importorskip("ipykernel")
+from jupyter_client import KernelManager
+from cosapp_lab.server.cosapp_kernel import CosappKernelConnetion
+from cosapp_lab.server.cosapp_server import RunSessionHandler, is_rejected
+from cosapp_lab.server.kernel_pool import KernelConnectionPool
+
+KERNEL_SETUP = """
+import threading
+from cosapp.systems import System
+from cosapp_lab.widgets import SysExplorer
+
+release = threading.Event()
+
+class Double(System):
+    def setup(self):
+        self.add_inward("x", 1.0)
+        self.add_outward("y", 0.0)
+
+    def compute(self):
+        release.wait(30)
+        self.y = 2 * self.x
+
+explorer = SysExplorer(Double("double"), run_in_background=True, run_policy="reject")
+controller = explorer.get_component("Controller")
+"""
+
+
+@pytest.fixture(scope="module")
+def manager():
+    manager = KernelManager()
+    manager.start_kernel()
+    yield manager
+    manager.shutdown_kernel(now=True)
+
+
+@pytest.fixture(scope="module")
+def kernel(manager):
+    """Client of a kernel running a `SysExplorer` instance."""
+    client = manager.blocking_client()
+    client.start_channels()
+    client.wait_for_ready(timeout=30)
+    reply = client.execute_interactive(KERNEL_SETUP, timeout=30)
+    assert reply["content"]["status"] == "ok"
+    yield client
+    client.stop_channels()
+
+
+@pytest.fixture
+def handler(manager, kernel):
+    pool = KernelConnectionPool(
+        lambda token: CosappKernelConnetion(manager.connection_file, "double")
+    )
+    yield SimpleNamespace(kernel_pool=pool)
+    pool.clear()
+
+
+def run(handler, x):
+    input_data = {
+        "token": "foo",
+        "data": {"parameters": {"double": ["inwards", "x", x]}, "result": ["double.outwards"]},
+    }
+    deadline = time.monotonic() + 30
+    return RunSessionHandler.run(handler, input_data, "RUN", deadline=deadline)
+
+
+def test_RunSessionHandler_run(kernel, handler):
+    kernel.execute_interactive("release.set()", timeout=30)
+    result = run(handler, 3.0)
+    assert result["error"] is None
+    assert result["result"] == {"double.outwards.y": ["float", 6.0]}
+
+
+def test_RunSessionHandler_run_rejected(kernel, handler):
+    # Run of the widget in progress
+    kernel.execute_interactive("release.clear(); controller.submit_run({}, 'a')", timeout=30)
+    try:
+        result = run(handler, 4.0)
+        assert result["result"] is None
+        assert is_rejected(result)
+    finally:
+        kernel.execute_interactive("release.set()", timeout=30)
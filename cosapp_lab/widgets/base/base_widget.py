@@ -4,13 +4,13 @@
 # Copyright (c) CoSApp Team.
 
 
-from typing import Any, Dict, List, Type, Union
+from typing import Any, Dict, List, Tuple, Type, Union
 
 from cosapp.systems import System
 from cosapp_lab._frontend import module_name, module_version
 from cosapp_lab.widgets.utils import (
     CosappObjectParser,
-    is_jsonable,
+    is_plain_json,
 )
 from jupyter_client.jsonutil import json_clean
 import copy
@@ -49,6 +49,15 @@ class BaseWidget(Box):
     system_data = tDict(default_value={"key": "None"}, allow_none=False).tag(sync=True)
     update_signal = Int(default_value=0, allow_none=False).tag(sync=True)
 
+    SECTIONS = (
+        "systemGraph",
+        "variableData",
+        "portMetaData",
+        "computedResult",
+        "recorderData",
+        "driverData",
+    )
+
     initial_store = tDict(default_value={}, allow_none=False).tag(sync=True)
     chart_template = tDict(default_value={}, allow_none=False).tag(sync=True)
 
@@ -57,6 +66,8 @@ class BaseWidget(Box):
     def __init__(self, data: Union[System, List[System]] = None, **kwargs):
 
         template_path = kwargs.pop("template", None)
+        self._lazy_init = kwargs.pop("lazy_init", False)
+        self._section_cache: Dict[Tuple[str, str], Any] = {}
 
         if template_path is not None:
             try:
@@ -129,7 +140,6 @@ class BaseWidget(Box):
         data : cosapp.systems.System
             Input system
         """
-        self.system_variable = {}
         if isinstance(data, System):
             self.sys_data = CosappObjectParser(data)
         else:
@@ -138,39 +148,39 @@ class BaseWidget(Box):
         # self._system = ref(data)
         self._system_list = self.sys_data.children_list
         self._driver_list = self.sys_data.children_drive
+
+        if self._lazy_init:
+            # Only the system tree is synced; other sections are requested
+            # per sub-system with `BaseWidget::requestSection` messages.
+            self.systemGraphData = {}
+            self.system_variable = {}
+            self.system_data = json_clean({
+                "systemGraph": {
+                    "systemGraphData": {},
+                    "systemList": self._system_list,
+                    "graphJsonData": {},
+                },
+                "systemPBS": {},
+                "systemTree": self.sys_data.tree_dict,
+                "portMetaData": {},
+                "variableData": {},
+                "computedResult": {},
+                "recorderData": {},
+                "driverData": {},
+                "lazy": True,
+            })
+            return
+
         in_port_dict = self.sys_data.children_in_port
         out_port_dict = self.sys_data.children_out_port
+        port_dict = self.sys_data.children_port
         self.systemGraphData = {}
+        self.system_variable = {}
         for key in self._system_list:
-            try:
-                connection_list = self.system_dict[key]["connections"]
-            except:
-                connection_list = []
-            self.systemGraphData[key] = {
-                "inPort": in_port_dict[key],
-                "outPort": out_port_dict[key],
-                "connections": connection_list,
-            }
-
-        port_dict = self.sys_data.children_port
-        for sys_name in port_dict:
-            for port_name in port_dict[sys_name]:
-                variable_dict = self.sys_data.get_children_var_input(
-                    sys_name, port_name
-                )
-                if "Mutable variable not found" not in variable_dict:
-                    for var_name in variable_dict:
-                        if isinstance(variable_dict[var_name]["value"], np.ndarray):
-                            variable_dict[var_name]["value"] = variable_dict[var_name][
-                                "value"
-                            ].tolist()
-                            self.system_variable[
-                                f"{sys_name}.{port_name}.{var_name}"
-                            ] = variable_dict[var_name]
-                        elif is_jsonable(variable_dict[var_name]["value"]):
-                            self.system_variable[
-                                f"{sys_name}.{port_name}.{var_name}"
-                            ] = variable_dict[var_name]
+            self.systemGraphData[key] = self._graph_section(
+                key, in_port_dict[key], out_port_dict[key]
+            )
+            self.system_variable.update(self._variable_section(key, port_dict[key]))
 
         computedResult = self.sys_data.serialize_data_from_system(False)
         recorderData = self.sys_data.serialize_recorder()
@@ -191,6 +201,85 @@ class BaseWidget(Box):
             "driverData": driverData,
         })
 
+    def _graph_section(self, sys_name: str, in_ports: List[str], out_ports: List[str]) -> Dict:
+        """Ports and connections of sub-system `sys_name`."""
+        try:
+            connection_list = self.system_dict[sys_name]["connections"]
+        except:
+            connection_list = []
+        return {
+            "inPort": in_ports,
+            "outPort": out_ports,
+            "connections": connection_list,
+        }
+
+    def _variable_section(self, sys_name: str, ports: List[str]) -> Dict:
+        """Input variables of ports `ports` of sub-system `sys_name`, keyed
+        by `sys_name.port.variable`."""
+        variables = {}
+        for port_name in ports:
+            variable_dict = self.sys_data.get_children_var_input(sys_name, port_name)
+            if "Mutable variable not found" not in variable_dict:
+                for var_name in variable_dict:
+                    if isinstance(variable_dict[var_name]["value"], np.ndarray):
+                        variable_dict[var_name]["value"] = variable_dict[var_name][
+                            "value"
+                        ].tolist()
+                        variables[f"{sys_name}.{port_name}.{var_name}"] = variable_dict[
+                            var_name
+                        ]
+                    elif is_plain_json(variable_dict[var_name]["value"]):
+                        variables[f"{sys_name}.{port_name}.{var_name}"] = variable_dict[
+                            var_name
+                        ]
+        return variables
+
+    def get_section(self, section: str, sys_name: str) -> Any:
+        """Return a section of the widget initial state for sub-system
+        `sys_name`, as listed in `SECTIONS`. Sections are cached until
+        the next computation of system.
+        """
+        key = (section, sys_name)
+        if key not in self._section_cache:
+            if sys_name not in self.sys_data.children_list:
+                raise KeyError(f"Unknown system {sys_name!r}")
+            if section == "systemGraph":
+                data = self._graph_section(
+                    sys_name,
+                    self.sys_data.children_in_port[sys_name],
+                    self.sys_data.children_out_port[sys_name],
+                )
+            elif section == "variableData":
+                data = self._variable_section(
+                    sys_name, self.sys_data.children_port[sys_name]
+                )
+            elif section == "portMetaData":
+                data = self.sys_data.port_meta(sys_name)
+            elif section == "computedResult":
+                data = self.sys_data.serialize_data_from_system(False, sys_name=sys_name)
+            elif section == "recorderData":
+                data = self.sys_data.serialize_recorder(systems=[sys_name])
+            elif section == "driverData":
+                data = self.sys_data.serialize_driver_data(systems=[sys_name])
+            else:
+                raise KeyError(f"Unknown section {section!r}; expected one of {self.SECTIONS}")
+            self._section_cache[key] = json_clean(data)
+        return self._section_cache[key]
+
+    def send_section(self, request: Dict) -> None:
+        """Reply to a `BaseWidget::requestSection` message, whose payload
+        holds `section`, `system` and an optional `request_id`."""
+        reply = {
+            "section": request.get("section"),
+            "system": request.get("system"),
+            "request_id": request.get("request_id"),
+        }
+        try:
+            reply["data"] = self.get_section(reply["section"], reply["system"])
+        except KeyError as error:
+            reply["error"] = str(error)
+        self.send({"type": "BaseWidget::section", "payload": reply})
+
     def __init_connection(self) -> None:
         """Initialize the connection between fontend - backend and
         between input system with the callbacks.
@@ -203,6 +292,7 @@ class BaseWidget(Box):
         and to emit update signal to front end.
 
         """
+        self._section_cache.clear()
         for callback in self.computed_callbacks:
             callback()
 
@@ -224,6 +314,9 @@ class BaseWidget(Box):
 
         - buffers : List
         """
+        if content.get("action") == "BaseWidget::requestSection":
+            self.send_section(content.get("payload", {}))
+            return
         for msg_handler in self.msg_handlers:
             msg_handler(model, content, buffers)
 
@@ -237,3 +330,7 @@ class BaseWidget(Box):
         )
         self.msg_handlers.append(component._handle_button_msg)  # TODO Use dict instead of list
         self.computed_callbacks.append(component.computed_notification)
+
+    def get_component(self, name: str) -> BaseComponent:
+        """Return the registered component named `name`."""
+        return self.__component[name]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) CoSApp Team.
+
+
+from typing import Any, Callable, Dict, List
+from weakref import ReferenceType
+
+from cosapp.systems import System
+from cosapp_lab.widgets.utils import (
+    CosappObjectParser,
+    DeltaPayloadTracker,
+    encode_buffers,
+)
+from .base_component import BaseComponent
+
+
+class ComputedDataComponent(BaseComponent):
+    """Base class of components sending the computed results of system
+    (variable values, recorder and driver data) to front end after each
+    `computed` signal.
+
+    If `delta_update` is `True`, only the first update is a full one, sent
+    with message type `{name}::update_signal`. Following updates only contain
+    the data modified since the previous one, and are sent with message type
+    `{name}::delta_signal`. Payloads of both messages are stamped with a
+    `sequence` number, and the front end can request a full update with action
+    `{name}::requestResync`. If `delta_update` is `False`, the payload of
+    `{name}::update_signal` is left unchanged.
+    Experimental: the front end does not handle delta updates yet, so the
+    option is off by default and must stay off with the current views.
+
+    If `binary_transport` is `True`, numeric arrays of variables and recorder
+    columns are sent as typed binary buffers. They are replaced in the payload
+    by references `{"__ndarray__": index}` to the entries of the list
+    `buffer_manifest`, which gives their data type, shape, buffer index and
+    offset in the buffer.
+    Experimental: the front end does not decode binary buffers yet, so the
+    option is off by default and must stay off with the current views.
+    """
+
+    name = "ComputedDataComponent"
+
+    def __init__(
+        self,
+        data: "ReferenceType[System]" = None,
+        sys_data: CosappObjectParser = None,
+        send_func: Callable = None,
+        delta_update: bool = False,
+        binary_transport: bool = False,
+        **kwargs,
+    ):
+        super().__init__(data=data, sys_data=sys_data, send_func=send_func, **kwargs)
+        self.delta_update = delta_update
+        self.binary_transport = binary_transport
+        self.tracker = DeltaPayloadTracker()
+
+    def computed_notification(self) -> None:
+        binary = self.binary_transport
+        computed_data = self.sys_data.serialize_data_from_system(False, binary=binary)
+        recorder_data = self.sys_data.serialize_recorder(binary=binary)
+        driver_data = self.sys_data.serialize_driver_data()
+        self.time_step = 0
+        if not self.delta_update:
+            msg_type = f"{self.name}::update_signal"
+            payload = {
+                "computed_data": computed_data,
+                "recorder_data": recorder_data,
+                "driver_data": driver_data,
+            }
+        elif self.tracker.has_baseline:
+            msg_type = f"{self.name}::delta_signal"
+            payload = self.tracker.delta(computed_data, recorder_data, driver_data)
+        else:
+            msg_type = f"{self.name}::update_signal"
+            payload = self.tracker.full(computed_data, recorder_data, driver_data)
+
+        if binary:
+            payload, manifest, buffers = encode_buffers(payload)
+            payload["buffer_manifest"] = manifest
+            self.send({"type": msg_type, "payload": payload}, buffers)
+        else:
+            self.send({"type": msg_type, "payload": payload})
+
+    def _handle_button_msg(self, model: Any, content: Dict, buffers: List) -> None:
+        if content["action"] == f"{self.name}::requestResync":
+            self.tracker.reset()
+            self.computed_notification()
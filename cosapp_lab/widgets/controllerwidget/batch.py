@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) CoSApp Team.
+
+
+"""
+Batched runs of a system over sets of parameters
+"""
+import itertools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from cosapp.ports.enum import PortType
+from cosapp_lab.widgets.utils import CosappObjectParser
+
+logger = logging.getLogger(__name__)
+
+# Runner used by forked worker processes, set before the pool is created
+_forked_runner: Optional["BatchRunner"] = None
+
+
+def expand_cases(payload: Dict) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Parameter sets of a `Controller::runBatch` payload.
+
+    Parameters
+    ----------
+    payload : Dict
+        Holds either `cases`, a list of `{key: value}` parameter sets, or
+        `grid`, a `{key: [values]}` dictionary whose cartesian product
+        defines the parameter sets. Keys have the same format as in
+        `Controller::runSignal` payloads.
+
+    Returns
+    -------
+    Tuple[List[str], List[Dict[str, Any]]]
+        Parameter keys, in order of first appearance, and parameter sets.
+    """
+    if "grid" in payload:
+        grid: Dict[str, List] = payload["grid"]
+        columns = list(grid)
+        cases = [
+            dict(zip(columns, values))
+            for values in itertools.product(*grid.values())
+        ]
+    elif "cases" in payload:
+        cases = list(payload["cases"])
+        columns = list(dict.fromkeys(key for case in cases for key in case))
+    else:
+        raise ValueError("Batch payload requires either 'cases' or 'grid'")
+    return columns, cases
+
+
+class BatchRunner:
+    """Run a system for a sequence of parameter sets, and collect a table of
+    output values, one row per case.
+
+    Parameter keys are resolved once for the whole batch. On creation,
+    the system is reset to its initial state; between cases, only the
+    variables set by the parameters are reset, other variables keeping the
+    values of the previous case (which can speed up the convergence of
+    solvers).
+
+    Parameters
+    ----------
+    sys_data : CosappObjectParser
+        Parser of the system to be run.
+    columns : List[str]
+        Parameter keys, e.g. `root.sub.inwards.x` or `root.sub.inwards.v[2]`.
+    outputs : Optional[List[str]]
+        Keys of the variables reported for each case, in form of
+        `root.sub.port.variable`; if `None`, all variables of output ports.
+    """
+
+    def __init__(
+        self,
+        sys_data: CosappObjectParser,
+        columns: List[str],
+        outputs: Optional[List[str]] = None,
+    ) -> None:
+        self.sys_data = sys_data
+        self.columns = columns
+        sys_data.reset_variable_value()
+        self.setters = [sys_data.get_parameter_setter(key) for key in columns]
+        self.touched = list(dict.fromkeys(setter.path for setter in self.setters))
+
+        root = sys_data.system_name
+        accessors = sys_data.accessors
+        if outputs is None:
+            outputs = [
+                f"{root}.{path}"
+                for path, accessor in accessors.items()
+                if accessor.port.direction is PortType.OUT
+            ]
+        self.outputs = outputs
+        self._output_accessors = []
+        for key in outputs:
+            path = key[len(root) + 1:] if key.startswith(f"{root}.") else key
+            if path not in accessors:
+                raise KeyError(f"Unknown output variable {key!r}")
+            self._output_accessors.append((path, accessors[path]))
+
+    def run_case(self, case: Dict[str, Any]) -> Tuple[Optional[List], Optional[str]]:
+        """Run the system for parameter set `case`.
+
+        Returns
+        -------
+        Tuple[Optional[List], Optional[str]]
+            Output values and `None`, or `None` and an error message if the
+            case failed.
+        """
+        sys_data = self.sys_data
+        sys_data.reset_variable_value(self.touched)
+        try:
+            for key, setter in zip(self.columns, self.setters):
+                if key in case:
+                    setter.set(case[key])
+            sys_data.run_system()
+        except Exception as err:
+            logger.debug(f"Batch case {case} failed", exc_info=True)
+            return None, repr(err)
+        encode = sys_data._serializer.encode
+        return [encode(path, accessor.get()) for path, accessor in self._output_accessors], None
+
+    def run(
+        self, cases: List[Dict[str, Any]], workers: int = 0
+    ) -> Iterator[Tuple[Optional[List], Optional[str]]]:
+        """Run all cases, yielding the results of `run_case` in case order.
+
+        If `workers > 1` and the platform supports it, cases are dispatched
+        to a pool of processes forked from the current one, each running
+        its own copy of the system.
+        """
+        if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            global _forked_runner
+            _forked_runner = self
+            try:
+                context = multiprocessing.get_context("fork")
+                with ProcessPoolExecutor(
+                    workers, mp_context=context, initializer=_init_forked_worker
+                ) as executor:
+                    chunksize = max(1, len(cases) // (4 * workers))
+                    yield from executor.map(_run_forked_case, cases, chunksize=chunksize)
+            finally:
+                _forked_runner = None
+        else:
+            for case in cases:
+                yield self.run_case(case)
+
+
+def _init_forked_worker() -> None:
+    """Disconnect all slots of system, driver and recorder signals in a
+    forked worker, so that widgets of the parent process are not notified
+    of computations."""
+    system = _forked_runner.sys_data._system()
+    modules = list(system.tree())
+    for sub_system in list(modules):
+        for driver in sub_system.drivers.values():
+            modules.extend(driver.tree())
+    for module in modules:
+        signals = [module.computed]
+        recorder = getattr(module, "recorder", None)
+        if recorder is not None:
+            signals.append(recorder.state_recorded)
+        for signal in signals:
+            for slot in signal.slots:
+                signal.disconnect(slot)
+
+
+def _run_forked_case(case: Dict[str, Any]) -> Tuple[Optional[List], Optional[str]]:
+    return _forked_runner.run_case(case)
+
+
+def run_cases(
+    sys_data: CosappObjectParser,
+    cases: List[Dict[str, Any]],
+    outputs: Optional[List[str]] = None,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """Run parameter sets, and return results as a columnar table.
+
+    Used by the batch endpoint of the cosapp server; widgets are not
+    notified of the runs.
+
+    Parameters
+    ----------
+    sys_data : CosappObjectParser
+        Parser of the system to be run.
+    cases : List[Dict[str, Any]]
+        Parameter sets, in the format of `Controller::runSignal` payloads.
+    outputs : Optional[List[str]]
+        Prefixes of the reported variable keys, in form of
+        `root.sub.port.variable`; if `None` or empty, all variables of
+        output ports are reported.
+    offset : int
+        Index of the first case, reported in column `case`.
+
+    Returns
+    -------
+    Dict[str, Any]
+        `columns`, a dictionary of columns keyed by name, starting with
+        `case`, then parameters and outputs; and `errors`, the error
+        messages of failed cases keyed by case index.
+    """
+    if outputs:
+        root = sys_data.system_name
+        outputs = [
+            key
+            for key in (f"{root}.{path}" for path in sys_data.accessors)
+            if any(key.startswith(prefix) for prefix in outputs)
+        ]
+    else:
+        outputs = None
+    columns, cases = expand_cases({"cases": cases})
+    runner = BatchRunner(sys_data, columns, outputs)
+    table = {name: [] for name in ["case", *columns, *runner.outputs]}
+    errors = {}
+    with sys_data.notifications_suspended():
+        for index, (case, (values, error)) in enumerate(zip(cases, runner.run(cases)), offset):
+            if error is not None:
+                errors[index] = error
+                values = [None] * len(runner.outputs)
+            table["case"].append(index)
+            for key in columns:
+                table[key].append(case.get(key))
+            for key, value in zip(runner.outputs, values):
+                table[key].append(value)
+    return {"columns": table, "errors": errors}
@@ -4,20 +4,63 @@
 # Copyright (c) CoSApp Team.
 
 
-import copy
 import logging
-import re
-from io import StringIO
-from typing import Any, Callable, Dict, List
-from weakref import ReferenceType
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+from weakref import ReferenceType, finalize
 
 from cosapp.recorders import DataFrameRecorder
 from cosapp.systems import System
-from cosapp_lab.widgets.utils import CosappObjectParser
+from cosapp_lab.widgets.utils import CosappObjectParser, RingBufferHandler
 from cosapp_lab.widgets.base.base_component import BaseComponent
+from .batch import BatchRunner, expand_cases
+
+logger = logging.getLogger(__name__)
+
+RUN_POLICIES = ("queue", "reject")
+
+
+class RunCancelled(BaseException):
+    """Raised in the worker thread to interrupt a cancelled run.
+
+    Derives from `BaseException` so that it is not swallowed by solvers
+    or signal slots catching `Exception`.
+    """
+
+
+class RunRejected(RuntimeError):
+    """Raised by `ControllerComponent.run_and_wait` if the run is discarded
+    by the "reject" policy."""
 
 
 class ControllerComponent(BaseComponent):
+    """Run the system with parameters set from the front end.
+
+    Parameters
+    ----------
+    run_in_background : bool
+        If `True`, runs requested by `Controller::runSignal` are executed
+        in a worker thread, so that the kernel keeps handling widget
+        messages during computations. Runs can then be cancelled with
+        `Controller::cancel`. Default is `False` (blocking runs). Messages
+        about background runs are sent from the worker thread.
+    run_policy : str
+        Behaviour on a run request while another run is active:
+        "queue" (default) executes runs one after the other, "reject"
+        discards the new request.
+    batch_workers : int
+        Number of processes running the cases of `Controller::runBatch`
+        requests, each on a forked copy of the system; if 0 (default) or 1,
+        cases are run in the current process.
+    batch_chunk_size : int
+        Number of result rows per `Controller::batch_result` message.
+    log_size : int
+        Maximum number of characters of log kept in memory; oldest records
+        are discarded beyond this limit. Default is 1M.
+    """
+
     name = "Controller"
 
     def __init__(
@@ -25,22 +68,44 @@ class ControllerComponent(BaseComponent):
         data: "ReferenceType[System]",
         sys_data: CosappObjectParser,
         send_func: Callable,
+        run_in_background: bool = False,
+        run_policy: str = "queue",
+        batch_workers: int = 0,
+        batch_chunk_size: int = 32,
+        log_size: int = 1 << 20,
         **kwargs,
     ):
         super().__init__(data=data, sys_data=sys_data, send_func=send_func, **kwargs)
+        if run_policy not in RUN_POLICIES:
+            raise ValueError(
+                f"Unknown run policy {run_policy!r}; expected one of {RUN_POLICIES}"
+            )
+        self.run_in_background = run_in_background
+        self.run_policy = run_policy
+        self.batch_workers = batch_workers
+        self.batch_chunk_size = batch_chunk_size
+        self.log_size = log_size
+        self._runs: Dict[str, Future] = {}
+        self._current_run: Optional[str] = None
+        self._run_thread: Optional[int] = None
+        # Runs to be interrupted, which were already taken by the worker thread
+        self._cancel_requests: Set[str] = set()
+        self._run_lock = threading.Lock()
+        self._run_executor: Optional[ThreadPoolExecutor] = None
         self.__init_connection()
 
     def __init_connection(self) -> None:
         """Initialize the connection between fontend - backend and
         between input system with the callbacks.
         """
-        self.old_log = ""
-        self.log_stream = StringIO()
-        logger = logging.getLogger()
-        logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler(stream=self.log_stream)
-        handler.setFormatter(logging.Formatter(fmt="%(levelname)s:%(message)s"))
-        logger.addHandler(handler)
+        self.log_handler = RingBufferHandler(self.log_size)
+        self._log_offset = 0  # first record not sent by `update_log`
+        self._server_log_offset = 0  # first record not sent by `computed_notification`
+        root_logger = logging.getLogger()
+        root_logger.setLevel(logging.INFO)
+        self.log_handler.setFormatter(logging.Formatter(fmt="%(levelname)s:%(message)s"))
+        root_logger.addHandler(self.log_handler)
+        finalize(self, root_logger.removeHandler, self.log_handler)
         driver_list = self.sys_data.get_time_driver()
         if len(driver_list) > 0:
             self._static = False
@@ -52,6 +117,10 @@ class ControllerComponent(BaseComponent):
                     DataFrameRecorder(includes=["_"])
                 )
                 notification_recorder.state_recorded.connect(self.update_log)
+        if self.run_in_background:
+            # Root system completes a computation at each solver iteration
+            # and each time step: check for cancellation at these points
+            self.system.computed.connect(self._check_cancelled)
 
     def update_log(self, **kwarg) -> None:
         """Callback function used to send log value to front end
@@ -68,24 +137,21 @@ class ControllerComponent(BaseComponent):
         """
         time_ref = kwarg.get("time_ref")
 
-        if self.old_log == "":
-            log_value = self.log_stream.getvalue()
-        else:
-            log_value = "".join(self.log_stream.getvalue().rsplit(self.old_log))
-        self.old_log = self.log_stream.getvalue()
+        log_value, self._log_offset = self.log_handler.read(self._log_offset)
 
         notification_msg = {
             "update": 1,
             "msg": f"Computed step {time_ref}",
             "log": log_value,
         }
+        if self._current_run is not None:
+            notification_msg["run_id"] = self._current_run
         self.send({"type": "Controller::notification_msg", "payload": notification_msg})
 
     def computed_notification(self):
 
-        server_log = self.log_stream.getvalue()
-        self.log_stream.truncate(0)
-        self.log_stream.seek(0)
+        server_log, offset = self.log_handler.read(self._server_log_offset)
+        self._server_log_offset = self._log_offset = offset
         self.send(
             {
                 "type": "Controller::update_signal",
@@ -93,31 +159,242 @@ class ControllerComponent(BaseComponent):
             }
         )
 
-    def _handle_button_msg(self, model: Any, content: Dict, buffers: List):
-        if content["action"] == "Controller::runSignal":
-            self.sys_data.reset_variable_value()
-            for key, variable_value in content["payload"].items():
-                idx_group = re.search(r"\[(.*?)\]", key)
-                if idx_group is not None:
-                    var_idx = int(idx_group.group(1))
-                    var_key = key.replace(idx_group.group(0), "")
-                    sys_path = ".".join(var_key.split(".")[:-2])
-                    port = var_key.split(".")[-2]
-                    variable_name = var_key.split(".")[-1]
-
-                    selected_system = self.sys_data.get_system_from_name(sys_path)
-                    var_value = copy.deepcopy(selected_system[port][variable_name])
-                    var_value[var_idx] = variable_value
-                    self.sys_data.set_variable_value(
-                        sys_path, port, variable_name, var_value
+    @property
+    def run_executor(self) -> ThreadPoolExecutor:
+        """Single worker thread executing background runs in submission order."""
+        if self._run_executor is None:
+            self._run_executor = ThreadPoolExecutor(1, thread_name_prefix="cosapp-run")
+            finalize(self, self._run_executor.shutdown, wait=False)
+        return self._run_executor
+
+    def submit_run(self, parameters: Dict, run_id: Optional[str] = None) -> Optional[str]:
+        """Schedule a run of the system in the worker thread.
+
+        The front end is kept informed of the run progress with
+        `Controller::run_status` messages, with status "queued", "running",
+        "done", "cancelled", "error" or "rejected".
+
+        Parameters
+        ----------
+        parameters : Dict
+            Variable values to be set before the run, as sent by the front end.
+        run_id : Optional[str]
+            Identifier of the run; generated if not provided.
+
+        Returns
+        -------
+        Optional[str]
+            Run identifier, or `None` if the run was rejected.
+        """
+        run_id = run_id or uuid.uuid4().hex
+        future = self._submit(run_id, self.run, parameters)
+        return None if future is None else run_id
+
+    def submit_batch(self, payload: Dict, run_id: Optional[str] = None) -> Optional[str]:
+        """Schedule a batch of runs in the worker thread (see `run_batch`).
+        The batch is handled as a single run by the queue policy and by
+        `cancel_run`."""
+        run_id = run_id or uuid.uuid4().hex
+        future = self._submit(run_id, self.run_batch, payload, run_id)
+        return None if future is None else run_id
+
+    def run_and_wait(self, task: Callable, *args, run_id: Optional[str] = None) -> Any:
+        """Execute `task(*args)` as a run, and wait for its end.
+
+        In background mode, the task is scheduled in the worker thread like
+        any other run, so that it never computes the system at the same
+        time as another run. Otherwise, it is executed right away.
+
+        Returns
+        -------
+        Any
+            Return value of `task`.
+
+        Raises
+        ------
+        RunRejected
+            If the run is discarded by the "reject" policy.
+        RuntimeError
+            If the run is cancelled.
+        """
+        if not self.run_in_background:
+            return task(*args)
+        run_id = run_id or uuid.uuid4().hex
+        future = self._submit(run_id, task, *args)
+        if future is None:
+            raise RunRejected("Another computation is in progress")
+        try:
+            return future.result()
+        except RunCancelled:
+            raise RuntimeError(f"Run {run_id} was cancelled")
+
+    def _submit(self, run_id: str, task: Callable, *args) -> Optional[Future]:
+        with self._run_lock:
+            if self._runs:
+                if self.run_policy == "reject":
+                    self._send_run_status(
+                        run_id, "rejected", reason="Another computation is in progress"
                     )
+                    return None
+                self._send_run_status(run_id, "queued", position=len(self._runs))
+            future = self._runs[run_id] = self.run_executor.submit(
+                self._run, run_id, task, *args
+            )
+        return future
+
+    def cancel_run(self, run_id: Optional[str] = None) -> bool:
+        """Cancel run `run_id`, or all runs if `run_id` is `None`.
+
+        Queued runs are discarded; the running computation is interrupted
+        at the end of the current solver iteration or time step.
+
+        Returns
+        -------
+        bool
+            `True` if at least one run was cancelled.
+        """
+        cancelled = False
+        with self._run_lock:
+            run_ids = list(self._runs) if run_id is None else [run_id]
+            for rid in run_ids:
+                future = self._runs.get(rid)
+                if future is None:
+                    continue
+                if future.cancel():
+                    del self._runs[rid]
+                    self._send_run_status(rid, "cancelled")
                 else:
-                    sys_path = ".".join(key.split(".")[:-2])
-                    port = key.split(".")[-2]
-                    variable_name = key.split(".")[-1]
+                    # Running, or about to start: checked by `_run` on entry
+                    self._cancel_requests.add(rid)
+                cancelled = True
+        return cancelled
 
-                    self.sys_data.set_variable_value(
-                        sys_path, port, variable_name, variable_value
-                    )
+    def _check_cancelled(self, **kwargs) -> None:
+        if (
+            threading.get_ident() == self._run_thread
+            and self._current_run in self._cancel_requests
+        ):
+            raise RunCancelled(self._current_run)
+
+    def _run(self, run_id: str, task: Callable, *args) -> Any:
+        with self._run_lock:
+            if run_id in self._cancel_requests:
+                # Cancelled after being taken by the worker thread, but
+                # before being started
+                self._cancel_requests.discard(run_id)
+                self._runs.pop(run_id, None)
+                start = False
+            else:
+                self._current_run = run_id
+                self._run_thread = threading.get_ident()
+                start = True
+        if not start:
+            self._send_run_status(run_id, "cancelled")
+            raise RunCancelled(run_id)
+        self._send_run_status(run_id, "running")
+        status, error, raised, result = "done", None, None, None
+        try:
+            result = task(*args)
+        except RunCancelled as err:
+            status, raised = "cancelled", err
+        except Exception as err:
+            logger.exception(f"Run {run_id} failed")
+            status, error, raised = "error", repr(err), err
+        finally:
+            with self._run_lock:
+                self._current_run = None
+                self._run_thread = None
+                self._cancel_requests.discard(run_id)
+                self._runs.pop(run_id, None)
+        self._send_run_status(run_id, status, error=error)
+        if raised is not None:
+            # Forwarded to callers waiting for the run (see `run_and_wait`)
+            raise raised
+        return result
+
+    def _send_run_status(self, run_id: str, status: str, **info) -> None:
+        # Called from the worker thread as well: ipykernel sends IOPub
+        # messages, and therefore comm messages, through its IOPub thread,
+        # which makes sending from any thread safe.
+        payload = {"run_id": run_id, "status": status}
+        payload.update((key, value) for key, value in info.items() if value is not None)
+        self.send({"type": "Controller::run_status", "payload": payload})
+
+    def run(self, parameters: Dict) -> None:
+        """Run the system with variable values sent by the front end."""
+        self.set_parameters(parameters)
+        self.sys_data.run_system()
+
+    def run_batch(self, payload: Dict, batch_id: Optional[str] = None) -> None:
+        """Run the system for a list or a grid of parameter sets.
+
+        Results are streamed to the front end by `Controller::batch_result`
+        messages, holding the table columns (case index, parameter keys
+        and output keys) and chunks of rows, one row per case. Widgets are
+        not notified after each case.
 
-            self.sys_data.run_system()
+        Parameters
+        ----------
+        payload : Dict
+            Parameter sets, given by `cases` or `grid` (see `expand_cases`),
+            and optional list of reported variables `outputs`.
+        batch_id : Optional[str]
+            Identifier of the batch, sent back with results.
+        """
+        columns, cases = expand_cases(payload)
+        runner = BatchRunner(self.sys_data, columns, payload.get("outputs"))
+        header = {
+            "batch_id": batch_id,
+            "columns": ["case", *columns, *runner.outputs],
+            "total": len(cases),
+        }
+        rows, errors, offset = [], {}, 0
+        with self.sys_data.notifications_suspended():
+            results = runner.run(cases, self.batch_workers)
+            for index, (case, (values, error)) in enumerate(zip(cases, results)):
+                self._check_cancelled()
+                if error is not None:
+                    errors[index] = error
+                    values = [None] * len(runner.outputs)
+                rows.append([index, *(case.get(key) for key in columns), *values])
+                if len(rows) == self.batch_chunk_size:
+                    self._send_batch_rows(header, offset, rows, errors, done=False)
+                    offset += len(rows)
+                    rows, errors = [], {}
+        self._send_batch_rows(header, offset, rows, errors, done=True)
+
+    def _send_batch_rows(
+        self, header: Dict, offset: int, rows: List, errors: Dict, done: bool
+    ) -> None:
+        payload = dict(header, offset=offset, rows=rows, errors=errors, done=done)
+        self.send({"type": "Controller::batch_result", "payload": payload})
+
+    def set_parameters(self, parameters: Dict) -> None:
+        """Reset the system, and set variable values sent by the front end.
+
+        Parameters
+        ----------
+        parameters : Dict
+            Variable values, keyed by `system.port.variable` paths; an item
+            of an array variable is set with `system.port.variable[index]`.
+        """
+        self.sys_data.reset_variable_value()
+        for key, variable_value in parameters.items():
+            self.sys_data.get_parameter_setter(key).set(variable_value)
+
+    def _handle_button_msg(self, model: Any, content: Dict, buffers: List):
+        if content["action"] == "Controller::runSignal":
+            # `currentThread` requests a blocking run
+            if self.run_in_background and not content.get("currentThread"):
+                self.submit_run(content["payload"], content.get("run_id"))
+            else:
+                self.run_and_wait(self.run, content["payload"], run_id=content.get("run_id"))
+        elif content["action"] == "Controller::runBatch":
+            run_id = content.get("run_id")
+            if self.run_in_background and not content.get("currentThread"):
+                self.submit_batch(content["payload"], run_id)
+            else:
+                self.run_and_wait(self.run_batch, content["payload"], run_id, run_id=run_id)
+        elif content["action"] == "Controller::cancel":
+            run_id = (content.get("payload") or {}).get("run_id")
+            self.cancel_run(run_id)
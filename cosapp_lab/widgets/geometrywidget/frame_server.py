@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) CoSApp Team.
+
+
+"""
+On-demand geometry frames for recorder playback
+"""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+from weakref import finalize
+
+logger = logging.getLogger(__name__)
+
+
+class GeometryFrameServer:
+    """Serve geometry frames of a recorder on demand.
+
+    Frames are built when first requested, and memoized. After each request,
+    frames within `window` steps of the requested one are built in a
+    background thread, closest first, so that playback and scrubbing
+    around the playhead do not wait for meshing.
+
+    Parameters
+    ----------
+    build_frame : Callable[[int], Any]
+        Function building the frame of given index.
+    n_frames : int
+        Number of frames.
+    window : int
+        Number of frames prefetched on each side of the requested frame.
+    max_frames : int
+        Maximum number of memoized frames; least recently used frames are
+        discarded beyond this limit.
+    """
+
+    def __init__(
+        self,
+        build_frame: Callable[[int], Any],
+        n_frames: int,
+        window: int = 2,
+        max_frames: int = 256,
+    ) -> None:
+        self.build_frame = build_frame
+        self.n_frames = n_frames
+        self.window = window
+        self.max_frames = max(max_frames, 2 * window + 1)
+        self._frames: "OrderedDict[int, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._center = 0
+        self._executor = ThreadPoolExecutor(1)
+        finalize(self, self._executor.shutdown, wait=False)
+
+    def __contains__(self, index: int) -> bool:
+        """Check if frame `index` is memoized."""
+        future = self._frames.get(index)
+        return future is not None and future.done() and not future.cancelled()
+
+    def get(self, index: int) -> Any:
+        """Return frame `index`, building it in the calling thread if
+        not available yet."""
+        if not 0 <= index < self.n_frames:
+            raise IndexError(f"Frame {index} out of range [0, {self.n_frames})")
+        with self._lock:
+            self._center = index
+            future = self._frames.get(index)
+            if future is not None and future.cancel():
+                # Pending prefetch: build now rather than waiting in queue
+                future = None
+            if future is None:
+                future = self._frames[index] = Future()
+                future.set_running_or_notify_cancel()
+                owner = True
+                self._evict()
+            else:
+                self._frames.move_to_end(index)
+                owner = False
+        if owner:
+            self._build(index, future)
+        return future.result()
+
+    def prefetch(self, index: int) -> None:
+        """Schedule the building of frames within `window` steps of `index`."""
+        with self._lock:
+            self._center = index
+            for offset in range(1, self.window + 1):
+                for i in (index + offset, index - offset):
+                    if 0 <= i < self.n_frames and i not in self._frames:
+                        future = self._frames[i] = Future()
+                        self._executor.submit(self._prefetch, i, future)
+            self._evict()
+
+    def clear(self, n_frames: int = None) -> None:
+        """Discard memoized frames, and optionally update the number of frames."""
+        with self._lock:
+            for future in self._frames.values():
+                future.cancel()
+            self._frames.clear()
+            if n_frames is not None:
+                self.n_frames = n_frames
+
+    def _prefetch(self, index: int, future: Future) -> None:
+        if abs(index - self._center) > self.window:
+            # Playhead moved away since scheduling
+            with self._lock:
+                if future.cancel() and self._frames.get(index) is future:
+                    del self._frames[index]
+            return
+        if future.set_running_or_notify_cancel():
+            self._build(index, future)
+
+    def _build(self, index: int, future: Future) -> None:
+        try:
+            future.set_result(self.build_frame(index))
+        except BaseException as error:
+            with self._lock:
+                if self._frames.get(index) is future:
+                    del self._frames[index]
+            future.set_exception(error)
+            logger.debug(f"Failed to build geometry frame {index}", exc_info=True)
+
+    def _evict(self) -> None:
+        """Discard least recently used built frames beyond `max_frames`
+        (to be called with lock held)."""
+        excess = len(self._frames) - self.max_frames
+        if excess <= 0:
+            return
+        for index in list(self._frames):
+            if excess <= 0:
+                break
+            if self._frames[index].done() and abs(index - self._center) > self.window:
+                del self._frames[index]
+                excess -= 1
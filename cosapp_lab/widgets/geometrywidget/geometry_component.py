@@ -7,17 +7,25 @@
 """
 Widget container as geometry viewer panel
 """
+import logging
+import threading
 from collections import OrderedDict
-from typing import Any, Callable, Dict, List, Union
-from weakref import ReferenceType
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+from weakref import ReferenceType, WeakMethod, finalize
 
 from cosapp.recorders import DataFrameRecorder
 from cosapp.systems import System
-from cosapp_lab.widgets.utils import CosappObjectParser, OccParser
+from cosapp_lab.widgets.utils import CosappObjectParser, OccParser, TessellationCache
+from cosapp_lab.widgets.utils.geometry_encoding import encode_geometry_buffers, negotiate_encoding
 from cosapp_lab.widgets.base.base_component import BaseComponent
+from .frame_server import GeometryFrameServer
+from .publisher import ThrottledPublisher
 
 import warnings
 
+logger = logging.getLogger(__name__)
+
 
 class GeometryComponent(BaseComponent):
     name = "GeometryView"
@@ -30,6 +38,15 @@ class GeometryComponent(BaseComponent):
         get_shapes = None,
         add_shape = None,  # to be deprecated
         source = None,
+        mesh_cache_size: int = 256 * 2 ** 20,
+        mesh_workers: int = 0,
+        lod_levels: Sequence[float] = (),
+        merged_buffers: bool = False,
+        lazy_playback: bool = False,
+        prefetch_window: int = 2,
+        rigid_updates: bool = False,
+        max_frame_rate: Optional[float] = None,
+        buffer_encoding: Optional[Dict[str, str]] = None,
         **kwargs
     ):
         super().__init__(data=data, sys_data=sys_data, send_func=send_func, **kwargs)
@@ -53,6 +70,35 @@ class GeometryComponent(BaseComponent):
                 )
         self.get_shapes = get_shapes
         self.geo_source = source
+        # Tessellations of unchanged shapes are reused; 0 disables the cache
+        self.mesh_cache = TessellationCache(mesh_cache_size) if mesh_cache_size > 0 else None
+        # Shapes are meshed in a pool of `mesh_workers` processes if greater than 1
+        self.mesh_workers = mesh_workers
+        self._mesh_executor = None
+        # Coarse mesh quality factors sent before the final geometry (level of detail);
+        # refined levels are meshed in a background thread.
+        self.lod_levels = tuple(lod_levels)
+        self._lod_generation = 0
+        self._refine_executor = None
+        self._mesh_lock = threading.Lock()
+        # Send one shared position buffer and index buffers per shape
+        self.merged_buffers = merged_buffers
+        # Recorder frames are meshed on request of front end, instead of all at once
+        self.lazy_playback = lazy_playback
+        self.prefetch_window = prefetch_window
+        self._frame_server: Optional[GeometryFrameServer] = None
+        # Time steps where shapes only moved are sent as absolute face and
+        # edge locations only, applied to the meshes of the previous step
+        self.rigid_updates = rigid_updates
+        self._last_frame: Optional[OccParser] = None
+        # If set, geometry of time steps is meshed and sent from a background thread,
+        # at most `max_frame_rate` times per second; intermediate steps are skipped.
+        self.max_frame_rate = max_frame_rate
+        self._publisher: Optional[ThrottledPublisher] = None
+        # Requested encoding of geometry buffers (see `negotiate_encoding`);
+        # only used if supported by front end.
+        self.buffer_encoding = buffer_encoding
+        self._encoding: Optional[Dict[str, str]] = None
         self.time_step = 0
         self.__init_connection()
 
@@ -92,18 +138,92 @@ class GeometryComponent(BaseComponent):
         """Callback function used to get geometry data
         after each time step.
         """
-        data: OccParser = self.get_geometry()
-        payload = {
-            "threejs_data": data.threejs_data,
-            "binary_position": data.binary_position,
-            "time_step": self.time_step,
-        }
-        self.send(
-            {"type": "GeometryView::geo_data", "payload": payload},
-            [b.tobytes() for b in data.binary_data],
-        )
+        self._frame_server = None
+        if self.max_frame_rate:
+            # Shapes are collected here, as the solver may update system or
+            # recorder while the publisher thread meshes them
+            self.publisher.submit(self._collect_shapes())
+        else:
+            self.publish_step()
+
+    @property
+    def publisher(self) -> ThrottledPublisher:
+        """Publisher of time step geometry, created on first use."""
+        if self._publisher is None:
+            # Publisher thread must not keep component alive
+            publish_step = WeakMethod(self.publish_step)
+
+            def publish(shapes: List[Any]) -> None:
+                method = publish_step()
+                if method is not None:
+                    method(shapes)
+
+            self._publisher = ThrottledPublisher(publish, 1.0 / self.max_frame_rate)
+            finalize(self, self._publisher.close)
+        return self._publisher
+
+    def publish_step(self, shapes: Optional[List[Any]] = None) -> None:
+        """Mesh and send the geometry of current time step.
+
+        Parameters
+        ----------
+        shapes : Optional[List[Any]]
+            Shapes collected at time step; if `None` (default), shapes are
+            collected from system or recorder.
+        """
+        previous = self._last_frame if self.rigid_updates else None
+        if shapes is None:
+            data: OccParser = self.get_geometry(level=0, previous=previous)
+        else:
+            data = self.create_parser(shapes, 0, previous)
+        if self.rigid_updates:
+            self._last_frame = data
+        transforms = self.get_transforms(data, previous)
+        if transforms is not None:
+            payload = {
+                "transforms": transforms,
+                "time_step": self.time_step,
+                "base_step": self.time_step - 1,
+            }
+            self.send({"type": "GeometryView::geo_transform", "payload": payload})
+        else:
+            payload = {
+                "threejs_data": data.threejs_data,
+                "binary_position": data.binary_position,
+                "time_step": self.time_step,
+            }
+            self.send_geometry(payload, data.binary_data)
         self.time_step += 1
 
+    @staticmethod
+    def get_transforms(data: OccParser, previous: Optional[OccParser]) -> Optional[Dict]:
+        """Return the face and edge locations of shapes moved between
+        `previous` and `data`, as {shape index: {"faces": [...], "edges": [...]}},
+        if all other shapes are unchanged; `None` otherwise.
+
+        Locations are absolute, as read from the topology of `data`; they
+        replace the locations of the meshes of `previous`, instead of being
+        composed with them.
+        """
+        if previous is None or data.shape_idx != previous.shape_idx:
+            return None
+        if data.moved | data.unchanged != set(data.shapes) or data.shapes.keys() != previous.shapes.keys():
+            return None
+        for key, value in data.threejs_data.items():
+            if isinstance(key, str) and key.startswith("misc_") and previous.threejs_data.get(key) != value:
+                return None
+
+        def locations(items: List[Dict]) -> List[Dict]:
+            return [{"pos": item["pos"], "quat": item["quat"]} for item in items]
+
+        return {
+            idx: {
+                "faces": locations(data.threejs_data[idx]),
+                "edges": locations(data.threejs_data[f"edge_{idx}"]),
+            }
+            for idx in sorted(data.moved)
+        }
+
     def send_initial_geometry(self) -> None:
 
         def pack_and_send(data, step=0, remaining=0) -> None:
@@ -113,23 +233,143 @@ class GeometryComponent(BaseComponent):
                 "time_step": step,
                 "remaining": remaining,
             }
-            self.send(
-                {"type": "GeometryView::geo_data", "payload": payload},
-                [b.tobytes() for b in data.binary_data],
-            )
+            self.send_geometry(payload, data.binary_data)
 
         if self.geo_source is not None and "recorder" in self.geo_source:
+            if self.lazy_playback:
+                self._frame_server = None
+                if self.frame_server.n_frames > 0:
+                    self.send_frame(0)
+                return
             all_data = self.get_geometry(get_all=True)
             remaining = len(all_data)
             for idx in all_data:
                 remaining -= 1
                 pack_and_send(all_data[idx], idx, remaining)
         else:
-            data = self.get_geometry()
+            data = self.get_geometry(level=0)
             if len(data.threejs_data) > 0:
                 pack_and_send(data)
+                self.refine_geometry(data)
+
+    def send_geometry(
+        self,
+        payload: Dict,
+        arrays: List["numpy.ndarray"],
+        msg_type: str = "GeometryView::geo_data",
+    ) -> None:
+        """Send geometry message with buffers `arrays`, encoded with the
+        negotiated encoding, if any; encoding metadata are added to
+        `payload` under key `buffer_encoding`."""
+        buffers, metadata = encode_geometry_buffers(arrays, self._encoding)
+        if metadata is not None:
+            payload["buffer_encoding"] = metadata
+        self.send({"type": msg_type, "payload": payload}, buffers)
+
+    @property
+    def frame_server(self) -> GeometryFrameServer:
+        """Server of recorder frames, created from current recorder data
+        on first use."""
+        if self._frame_server is None:
+            data = self._recorder_data()
+            self._frame_server = GeometryFrameServer(
+                lambda i: self.create_parser(data.iloc[i].tolist(), level=0),
+                len(data),
+                self.prefetch_window,
+            )
+        return self._frame_server
+
+    def send_frame(self, index: int) -> None:
+        """Send recorder frame `index` to front end, and prefetch
+        neighbouring frames."""
+        server = self.frame_server
+        data = server.get(index)
+        payload = {
+            "threejs_data": data.threejs_data,
+            "binary_position": data.binary_position,
+            "time_step": index,
+            "remaining": 0,
+            "n_frames": server.n_frames,
+        }
+        self.send_geometry(payload, data.binary_data)
+        server.prefetch(index)
+
+    @property
+    def mesh_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Process pool used for parallel meshing, created on first use;
+        `None` if parallel meshing is disabled."""
+        if self._mesh_executor is None and self.mesh_workers > 1:
+            self._mesh_executor = ProcessPoolExecutor(self.mesh_workers)
+            finalize(self, self._mesh_executor.shutdown, wait=False)
+        return self._mesh_executor
+
+    def create_parser(
+        self,
+        shapes: List[Any],
+        level: Optional[int] = None,
+        previous: Optional[OccParser] = None,
+    ) -> OccParser:
+        """Create the tessellation of `shapes`, using component cache
+        and process pool. Pending refinements of previous geometry are
+        cancelled."""
+        self._lod_generation += 1
+        with self._mesh_lock:
+            return OccParser(
+                shapes,
+                cache=self.mesh_cache,
+                executor=self.mesh_executor,
+                lod_levels=self.lod_levels,
+                level=level,
+                merged=self.merged_buffers,
+                previous=previous,
+            )
 
-    def get_geometry(self, get_all=False) -> Union[OccParser, Dict[int, OccParser]]: 
+    def refine_geometry(self, data: OccParser) -> None:
+        """Mesh shapes of `data` at finer levels of detail in a background
+        thread, and send each refined shape to front end, until the finest
+        level is reached or new geometry is created.
+        """
+        if not data.lod:
+            return
+        if self._refine_executor is None:
+            self._refine_executor = ThreadPoolExecutor(1)
+            finalize(self, self._refine_executor.shutdown, wait=False)
+        self._refine_executor.submit(self._refine, data, self._lod_generation)
+
+    def _refine(self, data: OccParser, generation: int) -> None:
+        pending = dict(data.lod)
+        try:
+            while pending and generation == self._lod_generation:
+                with self._mesh_lock:
+                    meshes = data.mesh_shapes([
+                        (shape, levels[current + 1])
+                        for shape, levels, current in pending.values()
+                    ])
+                refined = {}
+                for (idx, (shape, levels, current)), mesh in zip(pending.items(), meshes):
+                    if generation != self._lod_generation:
+                        return
+                    level = current + 1
+                    final = level == len(levels) - 1
+                    threejs_data = {idx: mesh.faces, f"edge_{idx}": mesh.edges}
+                    if mesh.layout is not None:
+                        threejs_data[f"layout_{idx}"] = mesh.layout
+                    payload = {
+                        "shape_idx": idx,
+                        "level": level,
+                        "final": final,
+                        "generation": generation,
+                        "threejs_data": threejs_data,
+                        "binary_position": {idx: [0, len(mesh.buffers) - 1]},
+                    }
+                    self.send_geometry(payload, mesh.buffers, "GeometryView::geo_refine")
+                    if not final:
+                        refined[idx] = (shape, levels, level)
+                pending = refined
+        except Exception:
+            logger.exception("Geometry refinement failed")
+
+    def get_geometry(self, get_all=False, level=None, previous=None) -> Union[OccParser, Dict[int, OccParser]]: 
         """Convert the open cascade objects inside `system` into
         serializable data in order to send to front end.
 
@@ -139,6 +379,13 @@ class GeometryComponent(BaseComponent):
             If `True`, returns all geometric data from recorder (if any)
             into a dictionary of `OccParser` objects.
             If `False` (default), returns geometric data collected in system.
+        level : Optional[int]
+            Level of detail of the geometry, 0 being the coarsest.
+            If `None` (default), returns the finest level. Geometric data
+            from recorder is always returned at the coarsest level.
+        previous : Optional[OccParser]
+            Geometric data of previous state, from which the tessellation of
+            unchanged or moved shapes is reused. Disregarded if `get_all`.
 
         Returns
         -------
@@ -146,19 +393,10 @@ class GeometryComponent(BaseComponent):
             `OccParser` object or dictionary thereof, depending on `get_all`.
         """
         if self.geo_source is not None and "recorder" in self.geo_source:
-            # Argument `system` disregarded, here
-            path_list = self.geo_source["recorder"].split(".")
-            driver_name = path_list[-1]
-            if len(path_list) == 1:
-                system = self.system
-            else:
-                system = self.system[".".join(path_list[:-1])]
-            recorder = system.drivers[driver_name].recorder
-            columns = self.geo_source.get("variables", [])
-            data = recorder.export_data().loc[:, columns]
+            data = self._recorder_data()
             n_rows = len(data)
 
-            get_occ_data = lambda i: OccParser(data.iloc[i].tolist())
+            get_occ_data = lambda i: self.create_parser(data.iloc[i].tolist(), level=0)
 
             if get_all:
                 return OrderedDict(
@@ -166,15 +404,34 @@ class GeometryComponent(BaseComponent):
                     for i in range(n_rows)
                 )
             else:
-                return get_occ_data(n_rows - 1)
+                return self.create_parser(data.iloc[n_rows - 1].tolist(), 0, previous)
 
         else:
-            get_shapes = self.get_shapes or GeometryComponent.default_get_shapes
-            try:
-                shapes = get_shapes(self.system)
-            except:
-                shapes = []
-            return OccParser(shapes)
+            return self.create_parser(self._collect_shapes(), level, previous)
+
+    def _collect_shapes(self) -> List[Any]:
+        """Shapes of system, or of last recorded state if geometry is read from recorder."""
+        if self.geo_source is not None and "recorder" in self.geo_source:
+            data = self._recorder_data()
+            return data.iloc[len(data) - 1].tolist()
+        get_shapes = self.get_shapes or GeometryComponent.default_get_shapes
+        try:
+            shapes = list(get_shapes(self.system))
+        except:
+            shapes = []
+        return shapes
+
+    def _recorder_data(self) -> "pandas.DataFrame":
+        """Geometry variables of source recorder."""
+        path_list = self.geo_source["recorder"].split(".")
+        driver_name = path_list[-1]
+        if len(path_list) == 1:
+            system = self.system
+        else:
+            system = self.system[".".join(path_list[:-1])]
+        recorder = system.drivers[driver_name].recorder
+        columns = self.geo_source.get("variables", [])
+        return recorder.export_data().loc[:, columns]
 
     @staticmethod
     def default_get_shapes(system: System) -> List:
@@ -222,7 +479,7 @@ class GeometryComponent(BaseComponent):
         and to emit update signal to front end.
         """
         if self._static:
-            data = self.get_geometry()
+            data = self.get_geometry(level=0)
             if len(data.threejs_data) > 0:
                 payload = {
                     "threejs_data": data.threejs_data,
@@ -230,11 +487,13 @@ class GeometryComponent(BaseComponent):
                     "time_step": 0,
                     "remaining": 0,
                 }
-                self.send(
-                    {"type": "GeometryView::geo_data", "payload": payload},
-                    [b.tobytes() for b in data.binary_data],
-                )
+                self.send_geometry(payload, data.binary_data)
+                self.refine_geometry(data)
         else:
+            if self._publisher is not None:
+                self._publisher.flush()
+            self._frame_server = None
+            self._last_frame = None
             self.send(
                 {
                     "type": "GeometryView::update_signal",
@@ -245,4 +504,8 @@ class GeometryComponent(BaseComponent):
 
     def _handle_button_msg(self, model: Any, content: Dict, buffers: List):
         if content["action"] == "GeometryView::requestInitialGeometry":
+            accepted = content.get("payload", {}).get("accept_encoding")
+            self._encoding = negotiate_encoding(self.buffer_encoding, accepted)
             self.send_initial_geometry()
+        elif content["action"] == "GeometryView::requestFrame":
+            self.send_frame(int(content["payload"]["time_step"]))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) CoSApp Team.
+
+
+"""
+Rate-limited publication of geometry updates
+"""
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottledPublisher:
+    """Publish submitted items from a background thread, at most once every
+    `min_interval` seconds.
+
+    Items submitted while a publication is pending replace the pending item,
+    so that only the latest one is published. Submission never blocks on
+    publication, which makes it suitable for solver callbacks. The
+    background thread is stopped by `close`.
+
+    Parameters
+    ----------
+    publish : Callable[[Any], None]
+        Function publishing an item.
+    min_interval : float
+        Minimum time between two publications, in seconds.
+    """
+
+    def __init__(self, publish: Callable[[Any], None], min_interval: float) -> None:
+        self.publish = publish
+        self.min_interval = min_interval
+        self.published = 0
+        self.coalesced = 0
+        self._cond = threading.Condition()
+        self._pending = None
+        self._has_pending = False
+        self._busy = False
+        self._last = -math.inf
+        self._thread = None
+        self._closed = False
+
+    def submit(self, item: Any) -> None:
+        """Submit an item for publication, replacing the pending one, if any."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Cannot submit items to a closed publisher")
+            if self._has_pending:
+                self.coalesced += 1
+            self._pending = item
+            self._has_pending = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Publish the pending item, if any, in the calling thread, without
+        waiting for the end of the current interval."""
+        with self._cond:
+            while self._busy:
+                self._cond.wait()
+            if not self._has_pending:
+                return
+            item = self._take()
+        self._publish(item)
+
+    def close(self) -> None:
+        """Stop the background thread; pending item, if any, is discarded."""
+        with self._cond:
+            self._closed = True
+            self._pending = None
+            self._has_pending = False
+            self._cond.notify_all()
+
+    def _take(self) -> Any:
+        """Pop pending item (to be called with lock held)."""
+        item = self._pending
+        self._pending = None
+        self._has_pending = False
+        self._busy = True
+        return item
+
+    def _publish(self, item: Any) -> None:
+        try:
+            self.publish(item)
+        except Exception:
+            logger.exception("Geometry publication failed")
+        finally:
+            with self._cond:
+                self._busy = False
+                self._last = time.monotonic()
+                self.published += 1
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    if self._has_pending and not self._busy:
+                        delay = self._last + self.min_interval - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+                item = self._take()
+            self._publish(item)
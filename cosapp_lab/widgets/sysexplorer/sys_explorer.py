@@ -3,7 +3,8 @@
 
 # Copyright (c) CoSApp Team.
 
-from typing import Union, List
+from typing import Any, ClassVar, Dict, List, Optional, Union
+from weakref import WeakValueDictionary
 from traitlets import Unicode
 
 from cosapp.systems import System
@@ -11,6 +12,7 @@ from traitlets import CaselessStrEnum
 from cosapp_lab.widgets.base import BaseWidget
 from cosapp_lab.widgets.chartwidget import ChartElement
 from cosapp_lab.widgets.controllerwidget import ControllerComponent
+from cosapp_lab.widgets.controllerwidget.batch import run_cases
 from cosapp_lab.widgets.geometrywidget import GeometryComponent
 from cosapp_lab.widgets.structurewidget import StructureComponent
 from cosapp_lab.widgets.infowidget import SystemInfoComponent
@@ -36,9 +38,49 @@ class SysExplorer(BaseWidget):
         allow_none=False,
     ).tag(sync=True)
 
+    # Live instances, keyed by name of their system, used by the cosapp
+    # server to find the instance associated with a session
+    _registry: ClassVar["WeakValueDictionary[str, SysExplorer]"] = WeakValueDictionary()
+
     def __init__(self, data: Union[System, List[System]] = None, **kwargs):
         self.title = "SysExplorer widget"
         super().__init__(data, **kwargs)
+        SysExplorer._registry[self.sys_data.system_name] = self
+
+    @classmethod
+    def get_instance(cls, system_name: str) -> Optional["SysExplorer"]:
+        """Return the last created instance displaying system `system_name`,
+        or `None` if there is none."""
+        return cls._registry.get(system_name)
+
+    def run_case(self, parameters: Dict[str, Any]) -> None:
+        """Set variable values and run the system, as a single run of the
+        controller (see `run_cases`).
+
+        Parameters
+        ----------
+        parameters : Dict[str, Any]
+            Variable values, in the format of `Controller::runSignal` payloads.
+        """
+        controller: ControllerComponent = self.get_component(ControllerComponent.name)
+        controller.run_and_wait(controller.run, parameters)
+
+    def run_cases(
+        self,
+        cases: List[Dict[str, Any]],
+        outputs: Optional[List[str]] = None,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """Run parameter sets and return results as a columnar table (see
+        `batch.run_cases`).
+
+        The cases are run as a single run of the controller, so that they
+        never compute the system at the same time as another run; in
+        background mode, they wait for the end of active runs, or raise
+        `RunRejected` with the "reject" run policy.
+        """
+        controller: ControllerComponent = self.get_component(ControllerComponent.name)
+        return controller.run_and_wait(run_cases, self.sys_data, cases, outputs, offset)
 
     def init_component(self, **kwargs):
         self.register(SysExplorerComponent, **kwargs)
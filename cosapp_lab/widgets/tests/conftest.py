@@ -10,6 +10,7 @@ from multibody.systems import Beam, FixedTranslation, Dynamics
 from multibody.ports import FramePort, ForcePort
 from pipe.pipe import StraightPipe, TPipe
 import importlib
+import logging
 import random
 
 
@@ -40,6 +41,16 @@ class Simple(System):
         self.simple_out.matrix = 2 * self.simple_in.matrix
 
 
+@pytest.fixture(scope="function")
+def logging_enabled():
+    """Enable logging, which may have been disabled globally by other
+    tests (e.g. of `cosapp_lab.script`)."""
+    disabled = logging.root.manager.disable
+    logging.disable(logging.NOTSET)
+    yield
+    logging.disable(disabled)
+
+
 @pytest.fixture(scope="function")
 def SystemFactory():
     def factory(name):
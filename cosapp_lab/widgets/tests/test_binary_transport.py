@@ -0,0 +1,46 @@
+import pytest
+import numpy
+from cosapp_lab.widgets.utils import encode_buffers, decode_buffers
+
+
+def test_encode_buffers():
+    data = {
+        "a": ["ndarray", numpy.array([1.0, 2.0, 3.0])],
+        "b": ["int", 1],
+        "c": {"d": numpy.arange(6, dtype="int32").reshape(2, 3)},
+        "e": numpy.array([4.0]),
+        "f": numpy.array(["foo", "bar"]),
+    }
+    encoded, manifest, buffers = encode_buffers(data)
+
+    assert encoded["a"] == ["ndarray", {"__ndarray__": 0}]
+    assert encoded["b"] == ["int", 1]
+    assert encoded["c"] == {"d": {"__ndarray__": 1}}
+    assert encoded["e"] == {"__ndarray__": 2}
+    assert encoded["f"] is data["f"]
+    assert manifest == [
+        {"dtype": "float64", "shape": [3], "buffer": 0, "offset": 0},
+        {"dtype": "int32", "shape": [2, 3], "buffer": 1, "offset": 0},
+        {"dtype": "float64", "shape": [1], "buffer": 0, "offset": 24},
+    ]
+    assert len(buffers) == 2
+    assert len(buffers[0]) == 32
+    assert len(buffers[1]) == 24
+
+
+@pytest.mark.parametrize("value", [
+    numpy.linspace(0, 1, 11),
+    numpy.ones((3, 2), dtype="uint16"),
+    numpy.zeros((0, 3)),
+])
+def test_decode_buffers(value):
+    encoded, manifest, buffers = encode_buffers({"x": [value, value.T]})
+    decoded = decode_buffers(encoded, manifest, buffers)
+    assert numpy.array_equal(decoded["x"][0], value)
+    assert numpy.array_equal(decoded["x"][1], value.T)
+
+
+def test_encode_buffers_bool():
+    encoded, manifest, buffers = encode_buffers([numpy.array([True, False])])
+    assert manifest == [{"dtype": "uint8", "shape": [2], "buffer": 0, "offset": 0}]
+    assert buffers == [b"\x01\x00"]
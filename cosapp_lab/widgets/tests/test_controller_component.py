@@ -0,0 +1,264 @@
+import logging
+import threading
+import time
+from weakref import ref
+
+import numpy
+import pytest
+from cosapp.systems import System
+from cosapp_lab.widgets.controllerwidget import ControllerComponent
+from cosapp_lab.widgets.controllerwidget.batch import run_cases
+from cosapp_lab.widgets.controllerwidget.controller_component import RunCancelled, RunRejected
+from cosapp_lab.widgets.utils import CosappObjectParser
+
+
+@pytest.fixture
+def system():
+    class Blocking(System):
+        started = threading.Event()
+        release = threading.Event()
+
+        def setup(self):
+            self.add_inward("x", 1.0)
+            self.add_outward("y", 0.0)
+
+        def compute(self):
+            self.started.set()
+            assert self.release.wait(5)
+            self.y = 2 * self.x
+
+    return Blocking("s")
+
+
+def make_component(system, **kwargs):
+    messages = []
+    component = ControllerComponent(
+        ref(system),
+        CosappObjectParser(system),
+        lambda msg, buffers=None: messages.append(msg),
+        **kwargs,
+    )
+    return component, messages
+
+
+def statuses(messages):
+    return [
+        (msg["payload"]["run_id"], msg["payload"]["status"])
+        for msg in messages
+        if msg["type"] == "Controller::run_status"
+    ]
+
+
+def test_ControllerComponent_sync_run(system):
+    system.release.set()
+    component, messages = make_component(system)
+    content = {"action": "Controller::runSignal", "payload": {"s.inwards.x": 3.0}}
+    component._handle_button_msg(None, content, [])
+    assert system.y == 6.0
+    assert statuses(messages) == []
+
+
+def test_ControllerComponent_background_run(system):
+    component, messages = make_component(system, run_in_background=True)
+    content = {"action": "Controller::runSignal", "payload": {"s.inwards.x": 3.0}}
+    component._handle_button_msg(None, dict(content, run_id="a"), [])
+    assert system.started.wait(5)
+    # Second run is queued while first is running
+    component._handle_button_msg(None, dict(content, run_id="b"), [])
+    assert statuses(messages) == [("a", "running"), ("b", "queued")]
+    system.release.set()
+    component._runs["b"].result(5)
+    assert statuses(messages)[2:] == [("a", "done"), ("b", "running"), ("b", "done")]
+    assert system.y == 6.0
+
+
+def test_ControllerComponent_reject(system):
+    component, messages = make_component(system, run_in_background=True, run_policy="reject")
+    assert component.submit_run({}, "a") == "a"
+    assert system.started.wait(5)
+    assert component.submit_run({}, "b") is None
+    system.release.set()
+    component.run_executor.submit(lambda: None).result(5)
+    assert statuses(messages) == [("a", "running"), ("b", "rejected"), ("a", "done")]
+
+    with pytest.raises(ValueError):
+        make_component(system, run_policy="foo")
+
+
+def test_ControllerComponent_blocking_run_waits(system):
+    component, messages = make_component(system, run_in_background=True)
+    component.submit_run({}, "a")
+    assert system.started.wait(5)
+    # Blocking run (e.g. from REST server) is queued behind running one
+    content = {
+        "action": "Controller::runSignal",
+        "payload": {"s.inwards.x": 3.0},
+        "currentThread": "1",
+        "run_id": "b",
+    }
+    caller = threading.Thread(target=component._handle_button_msg, args=(None, content, []))
+    caller.start()
+    caller.join(0.2)
+    assert caller.is_alive()
+    assert statuses(messages) == [("a", "running"), ("b", "queued")]
+    system.release.set()
+    caller.join(5)
+    assert not caller.is_alive()
+    assert statuses(messages)[2:] == [("a", "done"), ("b", "running"), ("b", "done")]
+    assert system.y == 6.0
+
+
+def test_ControllerComponent_blocking_run_rejected(system):
+    component, messages = make_component(system, run_in_background=True, run_policy="reject")
+    component.submit_run({}, "a")
+    assert system.started.wait(5)
+    with pytest.raises(RunRejected, match="in progress"):
+        component.run_and_wait(component.run, {}, run_id="b")
+    system.release.set()
+    component.run_executor.submit(lambda: None).result(5)
+    assert statuses(messages) == [("a", "running"), ("b", "rejected"), ("a", "done")]
+    assert component.run_and_wait(lambda x: 2 * x, 4) == 8
+
+
+def test_ControllerComponent_cancel(system):
+    component, messages = make_component(system, run_in_background=True)
+    component.submit_run({}, "a")
+    assert system.started.wait(5)
+    component.submit_run({}, "b")
+    content = {"action": "Controller::cancel", "payload": {"run_id": "b"}}
+    component._handle_button_msg(None, content, [])
+    assert component.cancel_run("a")
+    system.release.set()
+    component.run_executor.submit(lambda: None).result(5)
+    assert statuses(messages) == [
+        ("a", "running"),
+        ("b", "queued"),
+        ("b", "cancelled"),
+        ("a", "cancelled"),
+    ]
+    assert component._runs == {}
+    assert not component.cancel_run()
+
+
+def test_ControllerComponent_cancel_before_start(system):
+    system.release.set()
+    component, messages = make_component(system, run_in_background=True)
+    busy = threading.Event()
+    component.run_executor.submit(busy.wait, 5)
+    # Reentrant lock, to cancel while the worker thread waits for the lock
+    component._run_lock = threading.RLock()
+    future = component._submit("a", component.run, {})
+    with component._run_lock:
+        busy.set()
+        while not future.running():
+            time.sleep(0.01)
+        assert component.cancel_run("a")
+    with pytest.raises(RunCancelled):
+        future.result(5)
+    assert statuses(messages) == [("a", "cancelled")]
+    assert component._runs == {}
+    assert component._cancel_requests == set()
+
+
+class Double(System):
+    def setup(self):
+        self.add_inward("x", 1.0)
+        self.add_inward("v", numpy.zeros(3))
+        self.add_outward("y", 0.0)
+
+    def compute(self):
+        self.y = 2 * self.x + self.v.sum()
+
+
+def batch_rows(messages):
+    payloads = [msg["payload"] for msg in messages if msg["type"] == "Controller::batch_result"]
+    assert payloads[-1]["done"]
+    return payloads[0]["columns"], [row for p in payloads for row in p["rows"]], payloads
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_ControllerComponent_run_batch(workers):
+    system = Double("s")
+    component, messages = make_component(system, batch_workers=workers, batch_chunk_size=4)
+    content = {
+        "action": "Controller::runBatch",
+        "payload": {
+            "grid": {"s.inwards.x": [0.0, 1.0, 2.0], "s.inwards.v[1]": [0.0, 10.0]},
+            "outputs": ["s.outwards.y"],
+        },
+        "run_id": "batch",
+    }
+    component._handle_button_msg(None, content, [])
+    columns, rows, payloads = batch_rows(messages)
+    assert columns == ["case", "s.inwards.x", "s.inwards.v[1]", "s.outwards.y"]
+    assert [p["offset"] for p in payloads] == [0, 4]
+    assert rows == [
+        [0, 0.0, 0.0, 0.0],
+        [1, 0.0, 10.0, 10.0],
+        [2, 1.0, 0.0, 2.0],
+        [3, 1.0, 10.0, 12.0],
+        [4, 2.0, 0.0, 4.0],
+        [5, 2.0, 10.0, 14.0],
+    ]
+    # System holds the last case, unless cases are run in forked processes
+    assert system.v[1] == (0.0 if workers > 1 else 10.0)
+
+
+def test_ControllerComponent_run_batch_cases():
+    system = Double("s")
+    component, messages = make_component(system)
+    payload = {"cases": [{"s.inwards.x": 3.0}, {"s.inwards.v": "foo"}, {"s.inwards.v[0]": 1.0}]}
+    component.run_batch(payload)
+    columns, rows, payloads = batch_rows(messages)
+    assert columns[:4] == ["case", "s.inwards.x", "s.inwards.v", "s.inwards.v[0]"]
+    assert rows[0][-1] == 6.0
+    assert rows[1][-1] is None
+    assert list(payloads[-1]["errors"]) == [1]
+    assert rows[2][-1] == 3.0
+
+
+def test_ControllerComponent_set_parameters():
+    system = Double("s")
+    component, _ = make_component(system)
+    array = system.v
+    component.run({"s.inwards.v[2]": 5.0, "s.inwards.x": 1.0})
+    assert system.v is array
+    assert system.v.tolist() == [0.0, 0.0, 5.0]
+    assert system.y == 7.0
+    setter = component.sys_data.get_parameter_setter("s.inwards.v[2]")
+    assert component.sys_data.get_parameter_setter("s.inwards.v[2]") is setter
+    assert setter.path == "v" and setter.index == 2
+
+    component.run({"s.inwards.v[0]": 1.0})
+    assert system.v.tolist() == [1.0, 0.0, 0.0]
+    assert system.y == 3.0
+
+
+@pytest.mark.usefixtures("logging_enabled")
+def test_ControllerComponent_log():
+    component, messages = make_component(Double("s"), log_size=100)
+    logger = logging.getLogger("test_controller_component")
+    logger.info("foo")
+    component.update_log(time_ref=0.0)
+    assert messages[-1]["payload"]["log"] == "INFO:foo\n"
+    logger.info("bar")
+    component.update_log(time_ref=0.1)
+    assert messages[-1]["payload"]["log"] == "INFO:bar\n"
+    component.computed_notification()
+    assert messages[-1]["payload"]["server_log"] == "INFO:foo\nINFO:bar\n"
+    component.update_log(time_ref=0.2)
+    assert messages[-1]["payload"]["log"] == ""
+
+
+def test_run_cases():
+    system = Double("s")
+    sys_data = CosappObjectParser(system)
+    cases = [{"s.inwards.x": 1.0}, {"s.inwards.x": "foo"}, {"s.inwards.v[0]": 2.0}]
+    result = run_cases(sys_data, cases, ["s.outwards"], offset=10)
+    assert result["columns"] == {
+        "case": [10, 11, 12],
+        "s.inwards.x": [1.0, "foo", None],
+        "s.inwards.v[0]": [None, None, 2.0],
+        "s.outwards.y": [2.0, None, 4.0],
+    }
+    assert list(result["errors"]) == [11]
@@ -354,6 +354,43 @@ def test_CosappObjectParser_reset_variable_value(
     assert a[varname] == pytest.approx(expected), varname
 
 
+def test_CosappObjectParser_accessors(CosappObjectParserFactory):
+    sys_data: CosappObjectParser = CosappObjectParserFactory("simple")
+    system = sys_data._system()
+    assert list(sys_data.accessors) == sys_data.variable_list
+    accessor = sys_data.accessors["simple_in.vector"]
+    assert accessor.port is system.simple_in
+    assert accessor.get() is system.simple_in.vector
+
+    accessor.set(np.zeros(3))
+    assert system.simple_in.vector == pytest.approx(np.zeros(3))
+    sys_data.set_variable_value(system.name, "inwards", "inw", 3)
+    assert system.inw == 3
+    sys_data.reset_variable_value()
+    assert system.inw == -1
+    assert system.simple_in.vector == pytest.approx([1.0, 2.0, 3.0])
+
+
+def test_CosappObjectParser_accessors_structure_change(SystemFactory):
+    a: System = SystemFactory("simple")
+    sys_data = CosappObjectParser(a)
+    accessors = sys_data.accessors
+    sys_data.serialize_data_from_system()
+    assert sys_data.accessors is accessors
+
+    sub = a.add_child(SystemFactory("simple"))
+    data = sys_data.serialize_data_from_system(False)
+    assert sys_data.accessors is not accessors
+    assert f"{a.name}.{sub.name}.inwards.inw" in data
+    assert f"{a.name}.{sub.name}" in sys_data.children_list
+
+    sub.inw = 2
+    a.inw = 2
+    sys_data.reset_variable_value()
+    assert sub.inw == -1
+    assert a.inw == -1
+
+
 @pytest.mark.skip("Waiting for new cosapp version")
 @require_pyoccad
 @pytest.mark.parametrize(
@@ -404,6 +441,40 @@ def test_CosappObjectParser_serialize_data_from_system(CosappObjectParserFactory
     assert system_dict[key] == expected
 
 
+def test_CosappObjectParser_serialize_data_from_system_binary(CosappObjectParserFactory):
+    sys_data: CosappObjectParser = CosappObjectParserFactory("simple")
+    data = sys_data.serialize_data_from_system(binary=True)
+    name = sys_data.system_name
+    assert data[f"{name}.inwards.inw"] == ["int", -1]
+    typename, value = data[f"{name}.simple_in.matrix"]
+    assert typename == "ndarray"
+    assert isinstance(value, np.ndarray)
+    assert value.shape == (2, 3)
+    # Serialized array must be a copy of variable value
+    system = sys_data._system()
+    assert value is not system.simple_in.matrix
+    value[0, 0] = 10
+    assert system.simple_in.matrix[0, 0] == 1
+
+
+@require_pyoccad
+def test_CosappObjectParser_serialize_recorder_binary(SystemFactory):
+    a: System = SystemFactory("dynamics")
+    a.run_drivers()
+    sys_data = CosappObjectParser(a)
+    expected = sys_data.serialize_recorder()
+    data = sys_data.serialize_recorder(binary=True)
+
+    assert list(data) == list(expected)
+    recorder = data["dynamics.RK"]
+    assert recorder["Reference"] == expected["dynamics.RK"]["Reference"]
+    assert isinstance(recorder["tank1.height"], np.ndarray)
+    assert recorder["tank1.height"].shape == (51, 1)
+    assert recorder["tank1.height"] == pytest.approx(
+        np.array(expected["dynamics.RK"]["tank1.height"])
+    )
+
+
 @pytest.mark.skip("Waiting for new cosapp version")
 @require_pyoccad
 @pytest.mark.parametrize(
@@ -0,0 +1,130 @@
+from weakref import ref
+
+import pytest
+from cosapp.systems import System
+from cosapp_lab.widgets.base.computed_data_component import ComputedDataComponent
+from cosapp_lab.widgets.utils import CosappObjectParser, DeltaPayloadTracker
+
+
+@pytest.fixture
+def tracker():
+    tracker = DeltaPayloadTracker()
+    tracker.full(
+        {"s.a": ["float", 1.0], "s.b": ["list", [1, 2]]},
+        {"s.run.rec": {"Reference": [["t0"]], "s.a": [[1.0]]}},
+        {"s.solve": {"Residue": [1.0, 0.1]}},
+    )
+    return tracker
+
+
+def test_DeltaPayloadTracker_full():
+    tracker = DeltaPayloadTracker()
+    assert not tracker.has_baseline
+    with pytest.raises(RuntimeError, match="No baseline payload"):
+        tracker.delta({}, {}, {})
+
+    payload = tracker.full({"s.a": ["float", 1.0]}, {}, {})
+    assert tracker.has_baseline
+    assert payload == {
+        "sequence": 1,
+        "computed_data": {"s.a": ["float", 1.0]},
+        "recorder_data": {},
+        "driver_data": {},
+    }
+
+
+def test_DeltaPayloadTracker_delta_unchanged(tracker):
+    payload = tracker.delta(
+        {"s.a": ["float", 1.0], "s.b": ["list", [1, 2]]},
+        {"s.run.rec": {"Reference": [["t0"]], "s.a": [[1.0]]}},
+        {"s.solve": {"Residue": [1.0, 0.1]}},
+    )
+    assert payload["sequence"] == 2
+    assert payload["base"] == 1
+    assert payload["computed_data"] == {}
+    assert payload["recorder_data"] == {}
+    assert payload["driver_data"] == {}
+    assert payload["removed"] == {
+        "computed_data": [],
+        "recorder_data": [],
+        "driver_data": [],
+    }
+
+
+def test_DeltaPayloadTracker_delta_changed(tracker):
+    payload = tracker.delta(
+        {"s.a": ["float", 2.0], "s.b": ["list", [1, 2]]},
+        {"s.run.rec": {"Reference": [["t0"], ["t1"]], "s.a": [[1.0], [2.0]]}},
+        {"s.solve": {"Residue": [3.0]}},
+    )
+    assert payload["computed_data"] == {"s.a": ["float", 2.0]}
+    assert payload["recorder_data"] == {
+        "s.run.rec": {"start": 1, "data": {"Reference": [["t1"]], "s.a": [[2.0]]}}
+    }
+    assert payload["driver_data"] == {
+        "s.solve": {"start": 0, "data": {"Residue": [3.0]}}
+    }
+
+    payload = tracker.delta({"s.a": ["float", 2.0]}, {}, {})
+    assert payload["sequence"] == 3
+    assert payload["computed_data"] == {}
+    assert payload["removed"] == {
+        "computed_data": ["s.b"],
+        "recorder_data": ["s.run.rec"],
+        "driver_data": ["s.solve"],
+    }
+
+
+def test_DeltaPayloadTracker_nan():
+    tracker = DeltaPayloadTracker()
+    tracker.full({"s.a": ["float", float("nan")]}, {}, {})
+    payload = tracker.delta({"s.a": ["float", float("nan")]}, {}, {})
+    assert payload["computed_data"] == {}
+
+
+def test_DeltaPayloadTracker_reset(tracker):
+    tracker.reset()
+    assert not tracker.has_baseline
+    payload = tracker.full({}, {}, {})
+    assert payload["sequence"] == 2
+
+
+class Square(System):
+    def setup(self):
+        self.add_inward("x", 1.0)
+        self.add_outward("y", 0.0)
+
+    def compute(self):
+        self.y = self.x ** 2
+
+
+@pytest.mark.parametrize("delta_update", [False, True])
+def test_ComputedDataComponent_update(delta_update):
+    system = Square("s")
+    messages = []
+    component = ComputedDataComponent(
+        ref(system),
+        CosappObjectParser(system),
+        lambda msg, buffers=None: messages.append(msg),
+        delta_update=delta_update,
+    )
+    system.run_once()
+    component.computed_notification()
+    system.x = 3.0
+    system.run_once()
+    component.computed_notification()
+
+    types = [msg["type"] for msg in messages]
+    payloads = [msg["payload"] for msg in messages]
+    if delta_update:
+        assert types == [
+            "ComputedDataComponent::update_signal",
+            "ComputedDataComponent::delta_signal",
+        ]
+        assert payloads[0]["sequence"] == 1
+        assert payloads[1]["sequence"] == 2
+        assert set(payloads[1]["computed_data"]) == {"s.inwards.x", "s.outwards.y"}
+    else:
+        assert types == ["ComputedDataComponent::update_signal"] * 2
+        for payload in payloads:
+            assert set(payload) == {"computed_data", "recorder_data", "driver_data"}
@@ -0,0 +1,65 @@
+import pytest
+import threading
+from cosapp_lab.widgets.geometrywidget.frame_server import GeometryFrameServer
+
+
+class FrameBuilder:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, index):
+        with self.lock:
+            self.calls.append(index)
+        return f"frame {index}"
+
+
+def test_GeometryFrameServer_get():
+    builder = FrameBuilder()
+    server = GeometryFrameServer(builder, 10, window=0)
+    assert server.get(3) == "frame 3"
+    assert server.get(3) == "frame 3"
+    assert builder.calls == [3]
+    assert 3 in server
+    assert 4 not in server
+    with pytest.raises(IndexError):
+        server.get(10)
+
+
+def test_GeometryFrameServer_prefetch():
+    builder = FrameBuilder()
+    server = GeometryFrameServer(builder, 10, window=2)
+    assert server.get(0) == "frame 0"
+    server.prefetch(0)
+    server._executor.submit(lambda: None).result()
+    assert sorted(builder.calls) == [0, 1, 2]
+
+    server.prefetch(5)
+    assert server.get(5) == "frame 5"
+    server._executor.submit(lambda: None).result()
+    assert sorted(builder.calls) == [0, 1, 2, 3, 4, 5, 6, 7]
+    for i in range(8):
+        assert server.get(i) == f"frame {i}"
+    assert len(builder.calls) == 8
+
+
+def test_GeometryFrameServer_eviction():
+    builder = FrameBuilder()
+    server = GeometryFrameServer(builder, 100, window=0, max_frames=3)
+    for i in range(5):
+        server.get(i)
+    assert [i in server for i in range(5)] == [False, False, True, True, True]
+
+    server.clear(n_frames=2)
+    assert not any(i in server for i in range(5))
+    assert server.n_frames == 2
+
+
+def test_GeometryFrameServer_error():
+    def build(index):
+        raise ValueError(index)
+
+    server = GeometryFrameServer(build, 10)
+    with pytest.raises(ValueError):
+        server.get(1)
+    assert 1 not in server
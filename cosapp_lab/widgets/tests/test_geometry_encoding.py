@@ -0,0 +1,88 @@
+import numpy
+import pytest
+from cosapp_lab.widgets.utils import geometry_encoding
+from cosapp_lab.widgets.utils.geometry_encoding import (
+    decode_array,
+    encode_array,
+    encode_geometry_buffers,
+    negotiate_encoding,
+)
+
+
+@pytest.fixture
+def positions():
+    rng = numpy.random.default_rng(0)
+    return (rng.random((100, 3)) * [1000.0, 200.0, 50.0]).ravel()
+
+
+@pytest.fixture
+def indices():
+    return numpy.arange(600, dtype="uint16") // 2
+
+
+def test_encode_array_int16(positions):
+    encoding = {"positions": "int16", "indices": "raw", "compression": "none"}
+    data, meta = encode_array(positions, encoding)
+    assert meta["encoding"] == "int16"
+    assert len(data) == positions.size * 2
+    decoded = decode_array(data, meta)
+    assert decoded.dtype == positions.dtype
+    extent = numpy.ptp(positions.reshape(-1, 3), axis=0)
+    error = numpy.abs(decoded - positions).reshape(-1, 3)
+    assert numpy.all(error <= extent / 65535)
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+def test_encode_array_roundtrip(positions, indices, compression):
+    encoding = {"positions": "float32", "indices": "delta", "compression": compression}
+    data, meta = encode_array(positions, encoding)
+    assert meta["compression"] == compression
+    assert numpy.allclose(decode_array(data, meta), positions.astype("float32"))
+
+    data, meta = encode_array(indices, encoding)
+    assert meta["encoding"] == "delta"
+    decoded = decode_array(data, meta)
+    assert decoded.dtype == indices.dtype
+    assert numpy.array_equal(decoded, indices)
+    if compression == "zlib":
+        assert len(data) < indices.nbytes
+
+
+def test_encode_array_lz4_fallback(monkeypatch, indices):
+    monkeypatch.setattr(geometry_encoding, "_lz4_found", False)
+    data, meta = encode_array(indices, {"compression": "lz4"})
+    assert meta["compression"] == "zlib"
+    assert numpy.array_equal(decode_array(data, meta), indices)
+
+
+def test_negotiate_encoding(monkeypatch):
+    accepted = {
+        "positions": ["float32", "float64"],
+        "indices": ["delta", "raw"],
+        "compression": ["zlib", "none"],
+    }
+    assert negotiate_encoding(None, accepted) is None
+    assert negotiate_encoding({"positions": "float32"}, None) is None
+    assert negotiate_encoding({"positions": "float32"}, accepted) == {
+        "positions": "float32",
+        "indices": "raw",
+        "compression": "none",
+    }
+    # int16 not supported by front end: best accepted alternative
+    assert negotiate_encoding(
+        {"positions": "int16", "indices": "delta", "compression": "lz4"}, accepted
+    ) == {"positions": "float32", "indices": "delta", "compression": "zlib"}
+
+    monkeypatch.setattr(geometry_encoding, "_lz4_found", False)
+    assert negotiate_encoding({"compression": "lz4"}, {"compression": ["lz4"]}) is None
+
+
+def test_encode_geometry_buffers(positions, indices):
+    buffers, metadata = encode_geometry_buffers([positions, indices], None)
+    assert buffers == [positions.tobytes(), indices.tobytes()]
+    assert metadata is None
+
+    encoding = {"positions": "float32", "indices": "delta", "compression": "zlib"}
+    buffers, metadata = encode_geometry_buffers([positions, indices], encoding)
+    assert [meta["encoding"] for meta in metadata] == ["float32", "delta"]
+    assert numpy.array_equal(decode_array(buffers[1], metadata[1]), indices)
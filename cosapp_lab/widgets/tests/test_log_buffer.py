@@ -0,0 +1,51 @@
+import logging
+import pytest
+from cosapp_lab.widgets.utils import RingBufferHandler
+
+
+# Records must reach the handlers, whatever the global logging state
+pytestmark = pytest.mark.usefixtures("logging_enabled")
+
+
+def make_logger(handler):
+    logger = logging.getLogger("test_log_buffer")
+    logger.propagate = False
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_RingBufferHandler_read():
+    handler = RingBufferHandler()
+    logger = make_logger(handler)
+    assert handler.read() == ("", 0)
+    logger.info("a")
+    logger.info("b")
+    text, offset = handler.read()
+    assert (text, offset) == ("a\nb\n", 2)
+    assert handler.read(offset) == ("", 2)
+    logger.info("c")
+    assert handler.read(offset) == ("c\n", 3)
+    assert handler.getvalue() == "a\nb\nc\n"
+
+
+def test_RingBufferHandler_max_size():
+    handler = RingBufferHandler(max_size=10)
+    logger = make_logger(handler)
+    for i in range(10):
+        logger.info(f"{i}" * 3)
+    # Only the last two records fit in 10 characters
+    assert handler.getvalue() == "888\n999\n"
+    assert handler.end == 10
+    assert handler.read(5) == ("888\n999\n", 10)
+    assert handler.read(9) == ("999\n", 10)
+
+
+def test_RingBufferHandler_clear():
+    handler = RingBufferHandler()
+    logger = make_logger(handler)
+    logger.info("a")
+    handler.clear()
+    assert handler.read() == ("", 1)
+    logger.info("b")
+    assert handler.read(1) == ("b\n", 2)
@@ -1,6 +1,9 @@
+import pytest
 import numpy
+from concurrent.futures import ProcessPoolExecutor
 
-from cosapp_lab.widgets.utils import OccParser
+from cosapp_lab.widgets.utils import OccParser, TessellationCache
+from cosapp_lab.widgets.utils.occ_parser import MergedBuffers, ShapeMesh
 from multibody.ports import GeometryPort
 from conftest import require_pyoccad
 
@@ -25,3 +28,196 @@ def test_occ_init(SystemFactory):
     data = OccParser(r)
     ret = [0.0, 0.0, 0.0, 0.0, 0.0, 0.05, 0.0, 0.05, 0.0, 0.0, 0.05, 0.05]
     assert numpy.allclose(data.binary_data[0], ret)
+
+
+class FakePoint:
+    def __init__(self, *coords):
+        self.coords = coords
+
+    def Coord(self, *d):
+        if d:
+            return self.coords[d[0] - 1]
+        return self.coords
+
+
+class FakeTriangle:
+    def __init__(self, *nodes):
+        self.nodes = nodes
+
+    def Value(self, d):
+        return self.nodes[d - 1]
+
+    def Get(self):
+        return self.nodes
+
+
+class FakeTriangulation:
+    def __init__(self, n):
+        self.nodes = [FakePoint(float(i), 2.0 * i, -1.0 * i) for i in range(n)]
+        self.triangles = [FakeTriangle(i + 1, i + 2, i + 3) for i in range(n - 2)]
+
+    def NbNodes(self):
+        return len(self.nodes)
+
+    def NbTriangles(self):
+        return len(self.triangles)
+
+    def Node(self, i):
+        return self.nodes[i - 1]
+
+    def Triangles(self):
+        return iter(self.triangles)
+
+
+class LegacyPoint(FakePoint):
+    def Coord(self, d):
+        return self.coords[d - 1]
+
+
+class LegacyTriangle(FakeTriangle):
+    def Get(self):
+        raise TypeError
+
+
+@pytest.mark.parametrize("n", [0, 3, 5000])
+@pytest.mark.parametrize("legacy", [False, True])
+def test_occ_triangulation_arrays(n, legacy):
+    T = FakeTriangulation(n)
+    if legacy:
+        T.nodes = [LegacyPoint(*p.coords) for p in T.nodes]
+        T.triangles = [LegacyTriangle(*t.nodes) for t in T.triangles]
+
+    vtx = []
+    for node in OccParser.get_nodes(T):
+        vtx.extend(node.Coord(d) for d in range(1, 4))
+    idx = []
+    for triangle in OccParser.get_triangles(T):
+        idx.extend(triangle.Value(d) for d in range(1, 4))
+
+    nodes = OccParser.get_node_array(T)
+    triangles = OccParser.get_triangle_array(T)
+    assert nodes.shape == (n, 3)
+    assert triangles.shape == (max(n - 2, 0), 3)
+    assert numpy.array_equal(nodes.ravel(), numpy.array(vtx, dtype="float64"))
+    assert numpy.array_equal(triangles.ravel(), numpy.array(idx, dtype="int64"))
+
+
+def test_occ_merged_buffers():
+    merged = MergedBuffers()
+    nodes = numpy.arange(12, dtype="float64").reshape(4, 3)
+    vertex_range, index_range = merged.add_face(nodes[:3], numpy.array([[1, 2, 3]]))
+    assert vertex_range == [0, 3]
+    assert index_range == [0, 3]
+    vertex_range, index_range = merged.add_face(nodes, numpy.array([[1, 2, 3], [2, 3, 4]]))
+    assert vertex_range == [3, 4]
+    assert index_range == [3, 6]
+    assert merged.add_edge([1, 2], 3) == [0, 2]
+    assert merged.add_edge(numpy.array([3, 4, 1]), 3) == [2, 3]
+
+    positions, indices, edge_indices = merged.buffers()
+    assert positions.dtype == numpy.float32
+    assert numpy.array_equal(positions, numpy.concatenate([nodes[:3], nodes]).ravel())
+    assert indices.dtype == numpy.uint16
+    assert indices.tolist() == [0, 1, 2, 3, 4, 5, 4, 5, 6]
+    assert edge_indices.tolist() == [3, 4, 5, 6, 3]
+    assert merged.layout() == {
+        "index_type": "uint16",
+        "vertex_count": 7,
+        "index_count": 9,
+        "edge_index_count": 5,
+    }
+
+
+def test_occ_merged_buffers_uint32():
+    merged = MergedBuffers()
+    n_nodes = 2 ** 16 + 1
+    merged.add_face(numpy.zeros((n_nodes, 3)), numpy.array([[1, 2, n_nodes]]))
+    positions, indices, edge_indices = merged.buffers()
+    assert merged.index_type == "uint32"
+    assert indices.dtype == numpy.uint32
+    assert indices.tolist() == [0, 1, n_nodes - 1]
+    assert edge_indices.dtype == numpy.uint32
+    assert edge_indices.size == 0
+
+
+def test_occ_shape_mesh_moved():
+    mesh = ShapeMesh()
+    mesh.faces = [
+        {"pos": [0, 0, 0], "quat": [0, 0, 0, 1], "color": "red"},
+        {"pos": [0, 0, 0], "quat": [0, 0, 0, 1], "color": "blue"},
+    ]
+    mesh.edges = [{"faces": [0, 1], "pos": [0, 0, 0], "quat": [0, 0, 0, 1]}]
+    mesh.edge_faces = [1]
+    # Second face of the shape has no triangulation
+    mesh.face_indices = [0, 2]
+    mesh.buffers = [numpy.zeros(3), numpy.zeros(3, dtype="uint16")] * 2
+
+    transforms = [
+        {"pos": [1, 0, 0], "quat": [0, 0, 0, 1]},
+        {"pos": [3, 0, 0], "quat": [0, 1, 0, 0]},
+        {"pos": [2, 0, 0], "quat": [1, 0, 0, 0]},
+    ]
+    moved = mesh.moved(transforms)
+    assert moved.faces == [
+        {"pos": [1, 0, 0], "quat": [0, 0, 0, 1], "color": "red"},
+        {"pos": [2, 0, 0], "quat": [1, 0, 0, 0], "color": "blue"},
+    ]
+    assert moved.edges == [{"faces": [0, 1], "pos": [2, 0, 0], "quat": [1, 0, 0, 0]}]
+    assert moved.buffers is mesh.buffers
+    assert moved.face_indices == mesh.face_indices
+    assert mesh.faces[0]["pos"] == [0, 0, 0]
+    # Transforms not matching the faces of the mesh
+    assert mesh.moved(transforms[:2]) is None
+
+
+@require_pyoccad
+@pytest.mark.parametrize("source", ["executor", "cache"])
+def test_occ_parser_moved_untriangulated(source):
+    """Moved shapes whose mesh was not computed in the current process."""
+    from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeBox
+    from OCC.Core.BRepTools import breptools
+    from OCC.Core.TopLoc import TopLoc_Location
+    from OCC.Core.gp import gp_Trsf, gp_Vec
+
+    shapes = [BRepPrimAPI_MakeBox(1.0, 2.0, 3.0).Shape() for _ in range(2)]
+    if source == "executor":
+        with ProcessPoolExecutor(2) as executor:
+            first = OccParser(shapes, executor=executor)
+    else:
+        cache = TessellationCache()
+        OccParser(shapes, cache=cache)
+        for shape in shapes:
+            breptools.Clean(shape)
+        first = OccParser(shapes, cache=cache)
+        assert cache.hits == 2
+
+    trsf = gp_Trsf()
+    trsf.SetTranslation(gp_Vec(1.0, 0.0, 0.0))
+    moved_shapes = [shape.Moved(TopLoc_Location(trsf)) for shape in shapes]
+    second = OccParser(moved_shapes, previous=first)
+    assert second.moved == {0, 1}
+    for idx in range(2):
+        faces = second.threejs_data[idx]
+        assert len(faces) == len(first.threejs_data[idx]) == 6
+        assert all(numpy.allclose(face["pos"], [1.0, 0.0, 0.0]) for face in faces)
+    assert len(second.binary_data) == len(first.binary_data)
+
+
+@require_pyoccad
+def test_occ_parser_lod_after_refinement():
+    from OCC.Core.BRepPrimAPI import BRepPrimAPI_MakeSphere
+
+    def n_triangles(data: OccParser) -> int:
+        return sum(buffer.size for buffer in data.binary_data[1::2]) // 3
+
+    sphere = BRepPrimAPI_MakeSphere(1.0).Shape()
+    coarse = OccParser([sphere], mesh_quality=0.1, lod_levels=(5.0,), level=0)
+    assert set(coarse.lod) == {0}
+    shape, levels, current = coarse.lod[0]
+    refined = coarse.mesh_shapes([(shape, levels[current + 1])])[0]
+    fine = OccParser([sphere], mesh_quality=0.1, lod_levels=(5.0,))
+    assert sum(buffer.size for buffer in refined.buffers[1::2]) // 3 == n_triangles(fine)
+
+    # Shape holds the fine triangulation: coarse level is still coarse
+    again = OccParser([sphere], mesh_quality=0.1, lod_levels=(5.0,), level=0)
+    assert n_triangles(again) == n_triangles(coarse) < n_triangles(fine)
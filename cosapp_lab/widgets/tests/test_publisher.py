@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+from cosapp_lab.widgets.geometrywidget.publisher import ThrottledPublisher
+
+
+def test_ThrottledPublisher_coalesce():
+    published = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def publish(item):
+        published.append(item)
+        started.set()
+        release.wait(5)
+
+    publisher = ThrottledPublisher(publish, 0.0)
+    publisher.submit(0)
+    assert started.wait(5)
+    # Publication of 0 in progress: 1 and 2 are coalesced
+    for item in (1, 2, 3):
+        publisher.submit(item)
+    assert publisher.coalesced == 2
+    release.set()
+    publisher.flush()
+    assert published == [0, 3]
+    assert publisher.published == 2
+
+
+def test_ThrottledPublisher_interval():
+    published = []
+    publisher = ThrottledPublisher(lambda item: published.append((item, time.monotonic())), 0.2)
+    publisher.submit(0)
+    time.sleep(0.05)
+    publisher.submit(1)
+    time.sleep(0.05)
+    assert [item for item, _ in published] == [0]
+    time.sleep(0.3)
+    assert [item for item, _ in published] == [0, 1]
+    assert published[1][1] - published[0][1] >= 0.2
+
+
+def test_ThrottledPublisher_flush():
+    published = []
+    publisher = ThrottledPublisher(published.append, 10.0)
+    publisher.submit(0)
+    time.sleep(0.05)
+    publisher.submit(1)
+    publisher.submit(2)
+    assert published == [0]
+    publisher.flush()
+    assert published == [0, 2]
+    publisher.flush()
+    assert published == [0, 2]
+
+
+def test_ThrottledPublisher_error():
+    published = []
+
+    def publish(item):
+        if item == 0:
+            raise ValueError
+        published.append(item)
+
+    publisher = ThrottledPublisher(publish, 0.0)
+    publisher.submit(0)
+    time.sleep(0.05)
+    publisher.submit(1)
+    time.sleep(0.05)
+    assert published == [1]
+
+
+def test_ThrottledPublisher_close():
+    published = []
+    publisher = ThrottledPublisher(published.append, 10.0)
+    publisher.submit(0)
+    time.sleep(0.05)
+    publisher.submit(1)
+    thread = publisher._thread
+    publisher.close()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert published == [0]
+    publisher.flush()
+    assert published == [0]
+    with pytest.raises(RuntimeError, match="closed"):
+        publisher.submit(2)
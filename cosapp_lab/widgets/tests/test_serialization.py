@@ -0,0 +1,77 @@
+import pytest
+import numpy
+from cosapp_lab.widgets.utils import VariableSerializer, is_plain_json, is_jsonable
+from cosapp_lab.widgets.utils.serialization import (
+    SCALAR,
+    STRING,
+    ARRAY,
+    NUMPY_SCALAR,
+    CONTAINER,
+    OPAQUE,
+    classify,
+)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, SCALAR),
+        (True, SCALAR),
+        (1, SCALAR),
+        (numpy.float64(1.5), SCALAR),
+        ("foo", STRING),
+        (numpy.zeros(3), ARRAY),
+        (numpy.int64(2), NUMPY_SCALAR),
+        (numpy.bool_(True), NUMPY_SCALAR),
+        ([1, 2], CONTAINER),
+        ({"a": 1}, CONTAINER),
+        (object(), OPAQUE),
+    ],
+)
+def test_classify(value, expected):
+    assert classify(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        1,
+        "foo",
+        [1, "a", None],
+        (1.0, 2.0),
+        {"a": {"b": [1, 2]}, 1: 2},
+        {"a": numpy.zeros(2)},
+        [1, object()],
+        {(1, 2): 1},
+        numpy.zeros(2),
+        numpy.int32(1),
+    ],
+)
+def test_is_plain_json(value):
+    assert is_plain_json(value) == is_jsonable(value)
+
+
+def test_VariableSerializer_encode():
+    serializer = VariableSerializer()
+    assert serializer.encode("a", 1.0) == 1.0
+    assert serializer.encode("b", "foo") == "foo"
+    assert serializer.encode("c", numpy.array([1.0, 2.0])) == [1.0, 2.0]
+    assert serializer.encode("d", numpy.int64(3)) == 3
+    assert serializer.encode("e", {"x": [1, 2]}) == {"x": [1, 2]}
+    assert serializer.encode("f", {"x": numpy.zeros(2)}) == "non-jsonable"
+    assert serializer.encode("g", object()) == "non-jsonable"
+
+    value = numpy.array([1.0, 2.0])
+    encoded = serializer.encode("c", value, binary=True)
+    assert isinstance(encoded, numpy.ndarray)
+    assert encoded is not value
+    assert numpy.array_equal(encoded, value)
+    assert serializer.encode("h", numpy.array(["a"]), binary=True) == ["a"]
+
+
+def test_VariableSerializer_kind_cache():
+    serializer = VariableSerializer()
+    assert serializer.kind("a", 1.0) == SCALAR
+    assert serializer._kinds["a"] == (float, SCALAR)
+    assert serializer.encode("a", numpy.ones(2)) == [1.0, 1.0]
+    assert serializer._kinds["a"] == (numpy.ndarray, ARRAY)
@@ -0,0 +1,98 @@
+import pytest
+import numpy
+from types import SimpleNamespace
+from cosapp_lab.widgets.utils.snapshot import VariableSnapshot
+from cosapp_lab.widgets.utils.cosapp_object_parser import VariableAccessor
+
+
+@pytest.fixture
+def port():
+    return SimpleNamespace(
+        x=1.0,
+        name="foo",
+        vector=numpy.array([1.0, 2.0, 3.0]),
+        index=numpy.arange(3),
+        options={"a": [1, 2]},
+        empty=None,
+    )
+
+
+@pytest.fixture
+def snapshot(port):
+    snapshot = VariableSnapshot()
+    snapshot.add({name: VariableAccessor(port, name) for name in vars(port)})
+    return snapshot
+
+
+def test_VariableSnapshot_add(port, snapshot):
+    assert len(snapshot) == 6
+    assert snapshot._entries["x"].mode == VariableSnapshot.REFERENCE
+    assert snapshot._entries["name"].mode == VariableSnapshot.REFERENCE
+    assert snapshot._entries["vector"].mode == VariableSnapshot.PACKED
+    assert snapshot._entries["index"].mode == VariableSnapshot.PACKED
+    assert snapshot._entries["options"].mode == VariableSnapshot.COPY
+    assert len(snapshot._buffers) == 1
+    assert snapshot.nbytes == 64
+
+    value = snapshot.value("vector")
+    assert numpy.array_equal(value, port.vector)
+    assert value.base is snapshot._buffers[0]
+    assert not value.flags.writeable
+    assert snapshot.value("options") == port.options
+    assert snapshot.value("options") is not port.options
+
+
+def test_VariableSnapshot_changed(port, snapshot):
+    assert not snapshot.changed("x")
+    assert not snapshot.changed("vector")
+    port.x = 1.0
+    port.vector[0] = 1.0
+    assert not snapshot.changed("x")
+    assert not snapshot.changed("vector")
+    port.x = 2.0
+    port.vector[0] = 0.0
+    assert snapshot.changed("x")
+    assert snapshot.changed("vector")
+
+
+def test_VariableSnapshot_changed_nan(port):
+    port.vector[1] = numpy.nan
+    snapshot = VariableSnapshot()
+    snapshot.add({"vector": VariableAccessor(port, "vector")})
+    assert not snapshot.changed("vector")
+    port.vector[0] = numpy.nan
+    assert snapshot.changed("vector")
+    assert snapshot.restore() == 1
+    assert not snapshot.changed("vector")
+
+
+def test_VariableSnapshot_restore(port, snapshot):
+    # Unchanged deep-copied values are not restored
+    assert snapshot.restore() == 0
+    vector = port.vector
+    port.x = 2.0
+    port.vector[1] = 0.0
+    port.index = numpy.zeros(3, dtype=int)
+    port.options["a"].append(3)
+
+    assert snapshot.restore() == 4
+    assert port.x == 1.0
+    # Array held before restoration is not modified
+    assert port.vector is not vector
+    assert vector[1] == 0.0
+    assert numpy.array_equal(port.vector, [1.0, 2.0, 3.0])
+    assert numpy.array_equal(port.index, [0, 1, 2])
+    assert port.index.flags.writeable
+    assert port.options == {"a": [1, 2]}
+
+    port.index[0] = 5
+    assert snapshot.restore(["x", "index"]) == 1
+    assert port.index[0] == 0
+
+
+def test_VariableSnapshot_rebind(port, snapshot):
+    other = SimpleNamespace(x=5.0)
+    snapshot.rebind({"x": VariableAccessor(other, "x")})
+    assert len(snapshot) == 1
+    assert snapshot.restore() == 1
+    assert other.x == 1.0
@@ -45,6 +45,41 @@ def test____init_data(SystemFactory, sys_name, variable, result):
     assert pytest.approx(widget.system_variable[variable]["value"]) == result
 
 
+@require_pyoccad
+@pytest.mark.parametrize("sys_name", ["tube", "pendulum", "circuit", "dynamics"])
+def test____init_data_lazy(SystemFactory, sys_name):
+    a = SystemFactory(sys_name)
+    eager = SysExplorer(a).system_data
+    widget = SysExplorer(a, lazy_init=True)
+    assert widget.system_data["systemTree"] == eager["systemTree"]
+    assert widget.system_data["variableData"] == {}
+
+    computed = {}
+    for name in eager["systemGraph"]["systemList"]:
+        graph = widget.get_section("systemGraph", name)
+        assert graph == eager["systemGraph"]["systemGraphData"][name]
+        assert widget.get_section("portMetaData", name) == eager["portMetaData"][name]
+        computed.update(widget.get_section("computedResult", name))
+    assert computed == eager["computedResult"]
+
+    widget.send = MagicMock()
+    content = {
+        "action": "BaseWidget::requestSection",
+        "payload": {"section": "variableData", "system": a.name, "request_id": 1},
+    }
+    widget._handle_button_msg(None, content, [])
+    payload = widget.send.call_args[0][0]["payload"]
+    assert payload["request_id"] == 1
+    assert payload["data"] == {
+        key: value
+        for key, value in eager["variableData"].items()
+        if key.rsplit(".", 2)[0] == a.name
+    }
+    assert len(widget._section_cache) > 0
+    widget.computed_notification()
+    assert len(widget._section_cache) == 0
+
+
 @require_pyoccad
 @pytest.mark.parametrize(
     "sys_name,  result",
@@ -124,3 +159,44 @@ def test__handle_button_msg_2(SystemFactory, sys_name):
 @pytest.mark.parametrize("sys_name", ["tube", "pendulum", "dynamics"])
 def test_get_geometry(SystemFactory, sys_name):
     pass
+
+
+@require_pyoccad
+@pytest.mark.parametrize("sys_name", ["tube", "circuit"])
+def test_get_instance(SystemFactory, sys_name):
+    a = SystemFactory(sys_name)
+    widget = SysExplorer(a)
+    assert SysExplorer.get_instance(a.name) is widget
+    assert SysExplorer.get_instance("foo") is None
+    other = SysExplorer(a)
+    assert SysExplorer.get_instance(a.name) is other
+
+
+def test_run_cases():
+    import threading
+    from cosapp.systems import System
+    from cosapp_lab.widgets.controllerwidget.controller_component import RunRejected
+
+    class Double(System):
+        def setup(self):
+            self.add_inward("x", 1.0)
+            self.add_outward("y", 0.0)
+
+        def compute(self):
+            self.y = 2 * self.x
+
+    widget = SysExplorer(Double("double"), run_in_background=True, run_policy="reject")
+    result = widget.run_cases([{"double.inwards.x": 2.0}], ["double.outwards"], 3)
+    assert result["columns"] == {
+        "case": [3],
+        "double.inwards.x": [2.0],
+        "double.outwards.y": [4.0],
+    }
+
+    # Cases are not run while another run is active
+    controller = widget.get_component("Controller")
+    release = threading.Event()
+    controller._submit("busy", release.wait, 5)
+    with pytest.raises(RunRejected):
+        widget.run_cases([{"double.inwards.x": 3.0}])
+    release.set()
@@ -0,0 +1,60 @@
+from cosapp_lab.widgets.utils import TessellationCache
+
+
+class FakeShape:
+    def __init__(self, tshape, location=0):
+        self.tshape = tshape
+        self.location = location
+
+    def __hash__(self):
+        return hash(self.tshape)
+
+    def IsEqual(self, other):
+        return self.tshape is other.tshape and self.location == other.location
+
+
+class FakeMesh:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+def test_TessellationCache_get_put():
+    cache = TessellationCache(100)
+    tshape = object()
+    shape = FakeShape(tshape)
+    mesh = FakeMesh(10)
+
+    assert cache.get(shape, (0.75,)) is None
+    cache.put(shape, (0.75,), mesh)
+    assert cache.get(shape, (0.75,)) is mesh
+    assert cache.get(FakeShape(tshape), (0.75,)) is mesh
+    assert cache.get(shape, (0.5,)) is None
+    assert cache.get(FakeShape(tshape, location=1), (0.75,)) is None
+    assert cache.stats == {"entries": 1, "nbytes": 10, "hits": 2, "misses": 3}
+
+    cache.put(shape, (0.75,), FakeMesh(20))
+    assert cache.stats["entries"] == 1
+    assert cache.nbytes == 20
+
+    cache.clear()
+    assert cache.stats == {"entries": 0, "nbytes": 0, "hits": 0, "misses": 0}
+
+
+def test_TessellationCache_eviction():
+    cache = TessellationCache(100)
+    shapes = [FakeShape(object()) for _ in range(4)]
+    for shape in shapes[:3]:
+        cache.put(shape, None, FakeMesh(40))
+    assert len(cache) == 2
+    assert cache.nbytes == 80
+    assert cache.get(shapes[0], None) is None
+
+    # Access refreshes an entry
+    assert cache.get(shapes[1], None) is not None
+    cache.put(shapes[3], None, FakeMesh(40))
+    assert cache.get(shapes[1], None) is not None
+    assert cache.get(shapes[2], None) is None
+
+    cache.put(shapes[0], None, FakeMesh(200))
+    assert cache.get(shapes[0], None) is None
+    assert cache.nbytes == 80
@@ -2,6 +2,11 @@ from .cosapp_parser import CosappParser
 from .cosapp_json_parser import CosappJsonParser
 from .cosapp_object_parser import CosappObjectParser
 from .occ_parser import OccParser
+from .tessellation_cache import TessellationCache
+from .delta_payload import DeltaPayloadTracker
+from .log_buffer import RingBufferHandler
+from .binary_transport import encode_buffers, decode_buffers
+from .serialization import VariableSerializer, is_plain_json
 from .utils import is_jsonable, replicate_dict_structure, get_nonexistant_path
 
 __all__ = [
@@ -9,6 +14,13 @@ __all__ = [
     "CosappJsonParser",
     "CosappObjectParser",
     "OccParser",
+    "TessellationCache",
+    "DeltaPayloadTracker",
+    "RingBufferHandler",
+    "encode_buffers",
+    "decode_buffers",
+    "VariableSerializer",
+    "is_plain_json",
     "is_jsonable",
     "replicate_dict_structure",
     "get_nonexistant_path",
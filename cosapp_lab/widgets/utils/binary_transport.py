@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy
+
+BUFFER_KEY = "__ndarray__"
+BINARY_KINDS = "biuf"
+
+
+def is_binary_array(value: Any) -> bool:
+    """Check if input value is a numeric array which can be sent as a
+    typed buffer.
+    """
+    return isinstance(value, numpy.ndarray) and value.dtype.kind in BINARY_KINDS
+
+
+class BufferPacker:
+    """Helper class to pack numeric arrays into contiguous typed buffers.
+
+    Arrays are grouped by data type, all arrays of a same type being
+    concatenated into a single buffer. Each array is described by an entry
+    of the manifest, giving its data type, its shape, the index of the
+    buffer holding its data and its offset (in bytes) in this buffer.
+    Boolean arrays are sent as `uint8` buffers.
+    """
+
+    def __init__(self) -> None:
+        self.manifest: List[Dict[str, Any]] = []
+        self._arrays: Dict[str, List[numpy.ndarray]] = {}
+        self._offsets: Dict[str, int] = {}
+        self._buffer_index: Dict[str, int] = {}
+
+    def add(self, array: numpy.ndarray) -> Dict[str, int]:
+        """Register an array and return the reference replacing it in the
+        JSON payload.
+        """
+        if array.dtype.kind == "b":
+            array = array.astype("uint8")
+        dtype = array.dtype.newbyteorder("<")
+        array = numpy.ascontiguousarray(array, dtype=dtype)
+        name = dtype.name
+        if name not in self._buffer_index:
+            self._buffer_index[name] = len(self._buffer_index)
+            self._arrays[name] = []
+            self._offsets[name] = 0
+        self.manifest.append(
+            {
+                "dtype": name,
+                "shape": list(array.shape),
+                "buffer": self._buffer_index[name],
+                "offset": self._offsets[name],
+            }
+        )
+        self._arrays[name].append(array.ravel())
+        self._offsets[name] += array.nbytes
+        return {BUFFER_KEY: len(self.manifest) - 1}
+
+    def buffers(self) -> List[bytes]:
+        """Return the packed buffers, ordered by buffer index."""
+        ret = [b""] * len(self._buffer_index)
+        for name, index in self._buffer_index.items():
+            ret[index] = numpy.concatenate(self._arrays[name]).tobytes()
+        return ret
+
+
+def encode_buffers(data: Any) -> Tuple[Any, List[Dict], List[bytes]]:
+    """Replace all numeric arrays in a JSON-like structure by references
+    to typed buffers.
+
+    Parameters
+    ----------
+    data : Any
+        Nested structure of dictionaries and lists.
+
+    Returns
+    -------
+    Tuple[Any, List[Dict], List[bytes]]
+        The encoded structure, in which arrays are replaced by
+        `{"__ndarray__": index}`, the manifest describing each array
+        and the list of buffers.
+    """
+    packer = BufferPacker()
+
+    def encode(value: Any) -> Any:
+        if is_binary_array(value):
+            return packer.add(value)
+        elif isinstance(value, dict):
+            return {key: encode(item) for key, item in value.items()}
+        elif isinstance(value, (list, tuple)):
+            return [encode(item) for item in value]
+        return value
+
+    encoded = encode(data)
+    return encoded, packer.manifest, packer.buffers()
+
+
+def decode_buffers(data: Any, manifest: List[Dict], buffers: List[bytes]) -> Any:
+    """Inverse operation of `encode_buffers`."""
+
+    def decode(value: Any) -> Any:
+        if isinstance(value, dict):
+            if len(value) == 1 and BUFFER_KEY in value:
+                meta = manifest[value[BUFFER_KEY]]
+                count = int(numpy.prod(meta["shape"]))
+                array = numpy.frombuffer(
+                    buffers[meta["buffer"]],
+                    dtype=numpy.dtype(meta["dtype"]).newbyteorder("<"),
+                    count=count,
+                    offset=meta["offset"],
+                )
+                return array.reshape(meta["shape"])
+            return {key: decode(item) for key, item in value.items()}
+        elif isinstance(value, list):
+            return [decode(item) for item in value]
+        return value
+
+    return decode(data)
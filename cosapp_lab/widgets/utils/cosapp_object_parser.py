@@ -1,6 +1,7 @@
-import copy
 import json
-from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import re
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from weakref import ref
 import numbers
 import numpy
@@ -11,10 +12,77 @@ from cosapp.ports.port import Variable, BasePort
 from cosapp.systems import System
 from cosapp.drivers import NonLinearSolver
 from .cosapp_parser import CosappParser
-from .utils import is_jsonable, replicate_dict_structure
+from .utils import replicate_dict_structure
+from .binary_transport import BINARY_KINDS
+from .serialization import VariableSerializer
+from .snapshot import VariableSnapshot
 from numpy import linalg
 
 
+class VariableAccessor:
+    """Direct accessor to a variable of a port, used to read and write
+    its value without resolving the variable path in system.
+
+    Parameters
+    ----------
+    port : cosapp.ports.port.BasePort
+        Port owning the variable
+
+    name : str
+        Name of the variable in port
+    """
+
+    __slots__ = ("port", "name")
+
+    def __init__(self, port: BasePort, name: str) -> None:
+        self.port = port
+        self.name = name
+
+    def get(self) -> Any:
+        return getattr(self.port, self.name)
+
+    def set(self, value: Any) -> None:
+        setattr(self.port, self.name, value)
+
+
+class ParameterSetter:
+    """Setter of a variable, or of an item of an array variable, from a
+    parameter key sent by the front end, resolved once for all.
+
+    Items are assigned in place, and the array is then assigned back to
+    the variable, so that the owner system is marked as modified without
+    copying the array.
+
+    Parameters
+    ----------
+    accessor : VariableAccessor
+        Accessor to the variable
+
+    path : str
+        Path of the variable in the saved state of system
+
+    index : Optional[int]
+        Index of the item to be set, if any
+    """
+
+    __slots__ = ("accessor", "path", "index")
+
+    def __init__(
+        self, accessor: VariableAccessor, path: str, index: Optional[int] = None
+    ) -> None:
+        self.accessor = accessor
+        self.path = path
+        self.index = index
+
+    def set(self, value: Any) -> None:
+        if self.index is None:
+            self.accessor.set(value)
+        else:
+            array = self.accessor.get()
+            array[self.index] = value
+            self.accessor.set(array)
+
+
 class CosappObjectParser(CosappParser):
     """Class to read/modifier/interact with  cosapp system
 
@@ -28,6 +96,7 @@ class CosappObjectParser(CosappParser):
         super().__init__(system)
 
     def set_up_system(self, data: System) -> None:
+        self._serializer = VariableSerializer()
         self.system_name = data.name
         self._system = ref(data)
         try:
@@ -36,6 +105,7 @@ class CosappObjectParser(CosappParser):
             self.system_dict = {}
 
         self._discover_children(data)
+        self._build_accessors()
         self._get_data_from_system()
         for sys_name in self.children_list:
             self._discover_driver(sys_name)
@@ -129,7 +199,9 @@ class CosappObjectParser(CosappParser):
                 var_dict[var_name] = var.__json__()
             return var_dict
 
-    def serialize_data_from_system(self, dumps=True) -> Union[str, Dict]:
+    def serialize_data_from_system(
+        self, dumps=True, binary=False, sys_name: Optional[str] = None
+    ) -> Union[str, Dict]:
         """Serialize all values of variables in current system if possible.
 
         Parameters
@@ -137,6 +209,15 @@ class CosappObjectParser(CosappParser):
         dumps : boolean
             Flag to check if the return object is a Dict or a Json string
 
+        binary : boolean
+            If `True`, numeric arrays are returned as copies of the `numpy`
+            arrays instead of lists, in order to be sent as binary buffers.
+            In this case, `dumps` is disregarded and a Dict is returned.
+
+        sys_name : Optional[str]
+            If provided, only the variables of this sub-system (excluding
+            its children) are serialized.
+
         Returns
         -------
         Union[str, Dict[str, Any]]
@@ -144,25 +225,45 @@ class CosappObjectParser(CosappParser):
             are a list of 2 value, first one is de type of data and second one is
             the value of data.
         """
+        self._check_structure()
         content = {}
         system = self._system()
-        for var_name in self.variable_list:
-            value = system[var_name]
-            if is_jsonable(value):
-                pkl_str = value
-            elif isinstance(value, numpy.ndarray):
-                pkl_str = value.tolist()
-            else:
-                pkl_str = "non-jsonable"
+        encode = self._serializer.encode
+        if sys_name is None:
+            accessors = self.accessors.items()
+        else:
+            sys_path = ".".join(sys_name.split(".")[1:])
+            accessors = [
+                (var_name, accessor)
+                for var_name, accessor in self.accessors.items()
+                if var_name.rsplit(".", 2)[0] == sys_path
+                or (not sys_path and var_name.count(".") == 1)
+            ]
+        for var_name, accessor in accessors:
+            value = accessor.get()
             key = f"{system.name}.{var_name}"
             typename = type(value).__name__
-            content[key] = [typename, pkl_str]
-        
+            content[key] = [typename, encode(var_name, value, binary)]
+
+        if binary:
+            return content
         return json.dumps(content) if dumps else content
 
-    def serialize_recorder(self) -> Dict:
+    def serialize_recorder(
+        self, binary=False, systems: Optional[Iterable[str]] = None
+    ) -> Dict:
         """Serialize all dataframe recorder in system.
 
+        Parameters
+        ----------
+        binary : boolean
+            If `True`, numeric columns are returned as `numpy` arrays of
+            shape `(n_rows, size)`, in order to be sent as binary buffers.
+
+        systems : Optional[Iterable[str]]
+            Names of the sub-systems whose drivers are considered;
+            if `None` (default), all sub-systems.
+
         Returns
         -------
         Dict
@@ -172,7 +273,7 @@ class CosappObjectParser(CosappParser):
         """
 
         ret = {}
-        for sys_name in self._children:
+        for sys_name in self._children if systems is None else systems:
             current_system = self.get_system_from_name(sys_name)
             for driver_data in self._driver[sys_name].values():
                 driver_path = driver_data["path"]
@@ -188,25 +289,63 @@ class CosappObjectParser(CosappParser):
                         recorder_frame = current_driver.recorder.export_data()
                     except Exception:
                         recorder_frame = current_driver.recorder.data
-                    json_data = json.loads(recorder_frame.to_json())
-                    for key, value in json_data.items():
-                        temp = []
-                        for temp_val in value.values():
-                            if isinstance(temp_val, numbers.Number):
-                                temp.append([temp_val])
-                            else:
-                                temp.append(temp_val)
-                        json_data[key] = temp
+                    if binary:
+                        json_data = {}
+                        for key in recorder_frame.columns:
+                            column = self._recorder_column_to_array(
+                                recorder_frame[key]
+                            )
+                            if column is None:
+                                column = self._recorder_column_to_list(
+                                    json.loads(recorder_frame[[key]].to_json())[key]
+                                )
+                            json_data[key] = column
+                    else:
+                        json_data = json.loads(recorder_frame.to_json())
+                        for key, value in json_data.items():
+                            json_data[key] = self._recorder_column_to_list(value)
 
                     ret[f"{sys_name}.{full_path}"] = json_data
 
         return ret
 
-    def serialize_driver_data(self) -> Dict:
+    @staticmethod
+    def _recorder_column_to_list(value: Dict) -> List:
+        """Convert a recorder column, in the form obtained by `DataFrame.to_json`,
+        into the list of rows, scalar values being wrapped into a list."""
+        temp = []
+        for temp_val in value.values():
+            if isinstance(temp_val, numbers.Number):
+                temp.append([temp_val])
+            else:
+                temp.append(temp_val)
+        return temp
+
+    @staticmethod
+    def _recorder_column_to_array(column: "pandas.Series") -> Optional[numpy.ndarray]:
+        """Convert a numeric recorder column into an array of shape `(n_rows, size)`.
+        Return `None` if the column can not be converted."""
+        if column.dtype.kind in BINARY_KINDS:
+            return column.to_numpy().reshape(-1, 1)
+        try:
+            array = numpy.stack(column.to_numpy())
+        except (TypeError, ValueError):
+            return None
+        if array.dtype.kind not in BINARY_KINDS:
+            return None
+        return array.reshape(len(column), -1)
+
+    def serialize_driver_data(self, systems: Optional[Iterable[str]] = None) -> Dict:
         """Serialize all data related to a NonLinerSolver. In order
         to catch the residue vector, the `history` flag of solver need
         to be `True`
 
+        Parameters
+        ----------
+        systems : Optional[Iterable[str]]
+            Names of the sub-systems whose drivers are considered;
+            if `None` (default), all sub-systems.
+
         Returns
         -------
         Dict
@@ -215,7 +354,7 @@ class CosappObjectParser(CosappParser):
         """
 
         ret = {}
-        for sys_name in self._children:
+        for sys_name in self._children if systems is None else systems:
             current_system = self.get_system_from_name(sys_name)
             for driver_data in self._driver[sys_name].values():
                 driver_path = driver_data["path"]
@@ -234,49 +373,135 @@ class CosappObjectParser(CosappParser):
 
         return ret
 
-    def _get_data_from_system(self, serializable=False) -> Dict:
-        """Read all values of variables in current system
-        CosappObjectParser saves the value of all variables in order to
-        restore the system to its initial state.
+    def _build_accessors(self) -> None:
+        """Build the table of direct accessors to all variables of system.
+        The table is keyed by the variable paths of `variable_list`, in form
+        of `sub_system.port.variable`.
         """
-        self.system_variable_data = {}
+        self.variable_list = []
+        self.accessors: Dict[str, VariableAccessor] = {}
+        self._data_accessors: Dict[str, VariableAccessor] = {}
         for sub_system in self._children:
             sys_root = (
                 ""
                 if sub_system == self.system_name
                 else ".".join(self._children[sub_system]["path"].split(".")[1:])
             )
+            current_system = self._system()[sys_root] if sys_root else self._system()
             port_list = self._children[sub_system]["port_list"]
             for port in port_list:
+                port_obj = current_system[port]
                 for variable_name in self._children[sub_system]["port_data"][port]:
                     full_var_path = "{}.{}.{}".format(sys_root, port, variable_name)
-                    self.variable_list.append(full_var_path.strip("."))
+                    full_var_path = full_var_path.strip(".")
                     if port != System.INWARDS and port != System.OUTWARDS:
                         var_path = full_var_path
                     else:
-                        var_path = "{}.{}".format(sys_root, variable_name)
-                    var_path = var_path.strip(".")
-                    try:
-                        value = copy.deepcopy(self._system()[var_path])
-                        try:
-                            size = len(value)
-                            if serializable:
-                                if isinstance(value, numpy.ndarray):
-                                    value = self._system()[var_path].tolist()
-                        except Exception:
-                            size = 1
-                    except Exception:
-                        value = None
-                        size = 1
-                    self.system_variable_data[var_path] = {"size": size, "value": value}
+                        var_path = "{}.{}".format(sys_root, variable_name).strip(".")
+                    accessor = VariableAccessor(port_obj, variable_name)
+                    self.variable_list.append(full_var_path)
+                    self.accessors[full_var_path] = accessor
+                    self._data_accessors[var_path] = accessor
+
+        self._setters: Dict[str, ParameterSetter] = {}
+        self._structure_key = self._compute_structure_key()
+
+    def _compute_structure_key(self) -> Tuple:
+        """Compute a key identifying the structure of system, i.e. its
+        sub-systems and their ports."""
+        key = []
+        stack = [self._system()]
+        while stack:
+            system = stack.pop()
+            key.append((
+                id(system),
+                tuple(map(id, system.inputs.values())),
+                tuple(map(id, system.outputs.values())),
+            ))
+            stack.extend(system.children.values())
+        return tuple(key)
+
+    def _check_structure(self) -> None:
+        """Rebuild the accessor table if the structure of system has changed
+        since its last construction. Saved values of existing variables are
+        kept, new variables are saved with their current value."""
+        if self._compute_structure_key() == self._structure_key:
+            return
+        self._children = {}
+        self._driver = {}
+        self._discover_children(self._system())
+        self._build_accessors()
+        self._get_data_from_system(keep_existing=True)
+        for sys_name in self.children_list:
+            self._discover_driver(sys_name)
+
+    def _get_data_from_system(self, serializable=False, keep_existing=False) -> Dict:
+        """Read all values of variables in current system
+        CosappObjectParser saves the value of all variables in order to
+        restore the system to its initial state.
+        """
+        previous_data = self.system_variable_data if keep_existing else {}
+        if keep_existing:
+            self._snapshot.rebind(self._data_accessors)
+        else:
+            self._snapshot = VariableSnapshot()
+        self._snapshot.add({
+            var_path: accessor
+            for var_path, accessor in self._data_accessors.items()
+            if var_path not in previous_data
+        })
+
+        self.system_variable_data = {}
+        for var_path in self._data_accessors:
+            if var_path in previous_data:
+                self.system_variable_data[var_path] = previous_data[var_path]
+                continue
+            if var_path in self._snapshot:
+                value = self._snapshot.value(var_path)
+                try:
+                    size = len(value)
+                    if serializable:
+                        if isinstance(value, numpy.ndarray):
+                            value = value.tolist()
+                except Exception:
+                    size = 1
+            else:
+                value = None
+                size = 1
+            self.system_variable_data[var_path] = {"size": size, "value": value}
         return self.system_variable_data
 
-    def reset_variable_value(self) -> None:
-        """Reset system to its initial state"""
-        for path in self.system_variable_data:
-            value = self.system_variable_data[path]["value"]
-            if value is not None:
-                self._system()[path] = copy.deepcopy(value)
+    def reset_variable_value(self, paths: Optional[Iterable[str]] = None) -> None:
+        """Reset system to its initial state. Only the variables modified
+        since the creation of the parser are written back into the system.
+
+        Parameters
+        ----------
+        paths : Optional[Iterable[str]]
+            Paths of the variables to reset, as returned by `variable_path`;
+            if `None` (default), all variables are considered.
+        """
+        self._check_structure()
+        if paths is not None:
+            paths = [path for path in paths if path in self._snapshot]
+        self._snapshot.restore(paths)
+
+    def variable_path(self, sys_name: str, port: str, variable: str) -> str:
+        """Path of a variable in the saved initial state of system.
+
+        Parameters
+        ----------
+        sys_name :str
+            Name of system, starting with the name of root system
+        port : str
+            Name of port
+        variable : str
+            Name of variable
+        """
+        sys_path = ".".join(sys_name.split(".")[1:])
+        if port == System.INWARDS or port == System.OUTWARDS:
+            return f"{sys_path}.{variable}".strip(".")
+        return f"{sys_path}.{port}.{variable}".strip(".")
 
     def _discover_driver(
         self,
@@ -362,6 +587,26 @@ class CosappObjectParser(CosappParser):
         else:
             self._system().computed.connect(f)
 
+    @contextmanager
+    def notifications_suspended(self) -> Iterator[None]:
+        """Context manager disconnecting the slots connected to the computed
+        signal of the main driver (see `connect_main_driver`), e.g. to run
+        the system several times without notifying widgets after each run.
+        """
+        key_list = list(self._system().drivers)
+        if len(key_list) > 0:
+            signal = self._system().drivers[key_list[0]].computed
+        else:
+            signal = self._system().computed
+        slots = signal.slots
+        for slot in slots:
+            signal.disconnect(slot)
+        try:
+            yield
+        finally:
+            for slot in slots:
+                signal.connect(slot)
+
     def run_system(self) -> None:
         """Helper function to run driver"""
 
@@ -390,8 +635,39 @@ class CosappObjectParser(CosappParser):
         value : Any
             Value of variable to be modified
         """
-        current_system = self.get_system_from_name(sys_name)
-        current_system[port][variable] = value
+        self._check_structure()
+        sys_path = ".".join(sys_name.split(".")[1:])
+        accessor = self.accessors.get(f"{sys_path}.{port}.{variable}".strip("."))
+        if accessor is None:
+            current_system = self.get_system_from_name(sys_name)
+            current_system[port][variable] = value
+        else:
+            accessor.set(value)
+
+    def get_parameter_setter(self, key: str) -> ParameterSetter:
+        """Return the setter of parameter `key`, in form of
+        `system.port.variable` or `system.port.variable[index]`, where
+        `system` starts with the name of root system. Setters are cached
+        until the structure of system changes, which is checked by
+        `reset_variable_value`.
+        """
+        setter = self._setters.get(key)
+        if setter is None:
+            idx_group = re.search(r"\[(.*?)\]", key)
+            index = None
+            var_key = key
+            if idx_group is not None:
+                index = int(idx_group.group(1))
+                var_key = key.replace(idx_group.group(0), "")
+            sys_name, port, variable = var_key.rsplit(".", 2)
+            sys_path = ".".join(sys_name.split(".")[1:])
+            accessor = self.accessors.get(f"{sys_path}.{port}.{variable}".strip("."))
+            if accessor is None:
+                current_system = self.get_system_from_name(sys_name)
+                accessor = VariableAccessor(current_system[port], variable)
+            path = self.variable_path(sys_name, port, variable)
+            setter = self._setters[key] = ParameterSetter(accessor, path, index)
+        return setter
 
     def _discover_children(self, system: System, parent: Optional[str] = None) -> None:
         """Get the sub system of input system
@@ -579,15 +855,16 @@ class CosappObjectParser(CosappParser):
         Dict[str, Dict[str, Any]]
             Dict contains name of port of each child in system, including itself
         """
-        ret = {}
-        for sys, data in self._children.items():
-            system = self.get_system_from_name(sys)
-            ret[sys] = {}
-            for port_name in data["port_list"]:
-                port: BasePort = system[port_name]
-                ret[sys][port_name] = self.port_to_dict(port)
-
-        return ret
+        return {sys: self.port_meta(sys) for sys in self._children}
+
+    def port_meta(self, sys_name: str) -> Dict[str, Dict]:
+        """Get the metadata of the ports of sub-system `sys_name`, keyed
+        by port name."""
+        system = self.get_system_from_name(sys_name)
+        return {
+            port_name: self.port_to_dict(system[port_name])
+            for port_name in self._children[sys_name]["port_list"]
+        }
 
     def port_to_dict(self, port: BasePort) -> Dict:
         """
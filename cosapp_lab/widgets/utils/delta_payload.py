@@ -0,0 +1,155 @@
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy
+
+
+def _same_value(old: Any, new: Any) -> bool:
+    """Compare two serialized values, considering `NaN` equal to itself."""
+    if isinstance(old, numpy.ndarray) or isinstance(new, numpy.ndarray):
+        try:
+            return numpy.array_equal(old, new, equal_nan=True)
+        except TypeError:
+            return numpy.array_equal(old, new)
+    try:
+        if old == new:
+            return True
+    except ValueError:
+        pass  # Containers holding arrays, compared item by item below
+    if isinstance(old, float) and isinstance(new, float):
+        return math.isnan(old) and math.isnan(new)
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        return all(_same_value(a, b) for a, b in zip(old, new))
+    return False
+
+
+def _appended_rows(old: List, new: List) -> Optional[int]:
+    """Return the number of leading rows of `new` already sent in `old`,
+    or `None` if `new` does not extend `old`.
+    """
+    n_old = len(old)
+    if len(new) < n_old:
+        return None
+    if isinstance(new, numpy.ndarray):
+        return n_old if _same_value(old, new[:n_old]) else None
+    for old_row, new_row in zip(old, new):
+        if not _same_value(old_row, new_row):
+            return None
+    return n_old
+
+
+class DeltaPayloadTracker:
+    """Helper class to build incremental update payloads.
+
+    The tracker remembers the last payload sent to the front end and,
+    at each update, only keeps the variables, recorder rows and residue
+    entries which changed since. Every payload is stamped with a
+    sequence number, so that the front end can detect a missing update
+    and request a full resynchronization.
+    """
+
+    def __init__(self) -> None:
+        self.sequence = 0
+        self._computed: Optional[Dict[str, Any]] = None
+        self._recorder: Dict[str, Dict[str, List]] = {}
+        self._driver: Dict[str, Dict[str, List]] = {}
+
+    @property
+    def has_baseline(self) -> bool:
+        """`True` if a full payload has been sent since last reset."""
+        return self._computed is not None
+
+    def reset(self) -> None:
+        """Forget the last sent payload; next update will be a full one."""
+        self._computed = None
+        self._recorder = {}
+        self._driver = {}
+
+    def full(self, computed: Dict, recorder: Dict, driver: Dict) -> Dict:
+        """Register a full payload as new baseline.
+
+        Returns
+        -------
+        Dict
+            Payload containing all data and the new sequence number.
+        """
+        self.sequence += 1
+        self._computed = dict(computed)
+        self._recorder = {key: dict(value) for key, value in recorder.items()}
+        self._driver = {key: dict(value) for key, value in driver.items()}
+        return {
+            "sequence": self.sequence,
+            "computed_data": computed,
+            "recorder_data": recorder,
+            "driver_data": driver,
+        }
+
+    def delta(self, computed: Dict, recorder: Dict, driver: Dict) -> Dict:
+        """Compute the difference between input data and the last sent payload,
+        and register input data as new baseline.
+
+        Returns
+        -------
+        Dict
+            Payload with keys:
+            - `sequence`, `base`: sequence number of this update and of the
+            update it is based on;
+            - `computed_data`: variables whose value changed;
+            - `recorder_data`, `driver_data`: for each modified table, a dict
+            `{"start": int, "data": Dict[str, List]}`, where `data` holds
+            the rows to be written from index `start` (`start == 0` means
+            the whole table is replaced);
+            - `removed`: for each of `computed_data`, `recorder_data` and
+            `driver_data`, keys which no longer exist.
+        """
+        if not self.has_baseline:
+            raise RuntimeError("No baseline payload; a full update is required")
+
+        changed_variables = {}
+        previous = self._computed
+        for key, value in computed.items():
+            if key not in previous or not _same_value(previous[key], value):
+                changed_variables[key] = value
+
+        recorder_delta = self._diff_tables(self._recorder, recorder)
+        driver_delta = self._diff_tables(self._driver, driver)
+        payload = {
+            "sequence": self.sequence + 1,
+            "base": self.sequence,
+            "computed_data": changed_variables,
+            "recorder_data": recorder_delta,
+            "driver_data": driver_delta,
+            "removed": {
+                "computed_data": [key for key in previous if key not in computed],
+                "recorder_data": [key for key in self._recorder if key not in recorder],
+                "driver_data": [key for key in self._driver if key not in driver],
+            },
+        }
+        self.full(computed, recorder, driver)
+        return payload
+
+    @staticmethod
+    def _diff_tables(old_tables: Dict, new_tables: Dict) -> Dict:
+        """Compute the rows to be sent for each table of `new_tables`.
+        Tables are dictionaries of columns, in which rows are assumed to
+        be appended over time.
+        """
+        ret = {}
+        for key, table in new_tables.items():
+            old_table = old_tables.get(key)
+            start = None
+            if old_table is not None and set(old_table) == set(table):
+                starts = set(
+                    _appended_rows(old_table[column], rows)
+                    for column, rows in table.items()
+                )
+                if None not in starts and len(starts) <= 1:
+                    start = starts.pop() if starts else 0
+            if start is None:
+                ret[key] = {"start": 0, "data": table}
+            elif any(len(rows) > start for rows in table.values()):
+                ret[key] = {
+                    "start": start,
+                    "data": {column: rows[start:] for column, rows in table.items()},
+                }
+        return ret
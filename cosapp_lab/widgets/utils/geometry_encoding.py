@@ -0,0 +1,157 @@
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy
+
+try:
+    import lz4.frame as lz4_frame
+    _lz4_found = True
+except ImportError:
+    lz4_frame = None
+    _lz4_found = False
+
+# Supported encodings, by order of preference
+POSITION_ENCODINGS = ("int16", "float32", "float64")
+INDEX_ENCODINGS = ("delta", "raw")
+COMPRESSIONS = ("lz4", "zlib", "none")
+
+RAW_ENCODING = {"positions": "float64", "indices": "raw", "compression": "none"}
+
+
+def available_compressions() -> Tuple[str, ...]:
+    """Compression methods available in current environment."""
+    return tuple(c for c in COMPRESSIONS if c != "lz4" or _lz4_found)
+
+
+def negotiate_encoding(
+    preferred: Optional[Dict[str, str]], accepted: Optional[Dict[str, List[str]]]
+) -> Optional[Dict[str, str]]:
+    """Select the buffer encoding of geometry data.
+
+    Parameters
+    ----------
+    preferred : Optional[Dict[str, str]]
+        Encoding requested on the kernel side, with optional keys
+        `positions`, `indices` and `compression`.
+    accepted : Optional[Dict[str, List[str]]]
+        Encodings supported by the front end, for the same keys.
+
+    Returns
+    -------
+    Optional[Dict[str, str]]
+        For each key, the preferred method if accepted by the front end,
+        or the best method accepted by the front end otherwise;
+        `None` if no encoding is requested, or if the front end does
+        not support any.
+    """
+    if not preferred or not accepted:
+        return None
+    choices = {
+        "positions": POSITION_ENCODINGS,
+        "indices": INDEX_ENCODINGS,
+        "compression": available_compressions(),
+    }
+    encoding = {}
+    for key, supported in choices.items():
+        options = [m for m in supported if m in accepted.get(key, ())]
+        wanted = preferred.get(key, RAW_ENCODING[key])
+        if wanted in options:
+            encoding[key] = wanted
+        elif wanted != RAW_ENCODING[key] and options:
+            encoding[key] = options[0]
+        else:
+            encoding[key] = RAW_ENCODING[key]
+    if encoding == RAW_ENCODING:
+        return None
+    return encoding
+
+
+def encode_array(array: numpy.ndarray, encoding: Dict[str, str]) -> Tuple[bytes, Dict[str, Any]]:
+    """Encode a geometry buffer.
+
+    Float arrays are considered as flat (x, y, z) positions, and integer
+    arrays as indices.
+    - positions are cast to float32, or quantized to int16 relatively to
+      their bounding box (`offset` and `scale` being stored in metadata);
+    - indices are stored as differences between consecutive values
+      (`delta`), which compress better;
+    - the resulting bytes are then compressed with zlib or lz4.
+
+    Returns
+    -------
+    Tuple[bytes, Dict[str, Any]]
+        Encoded buffer and metadata required for decoding.
+    """
+    meta = {"dtype": array.dtype.name, "size": int(array.size)}
+    if array.dtype.kind == "f":
+        method = encoding.get("positions", "float64")
+        if method == "int16" and array.size % 3 == 0 and array.size > 0:
+            points = array.reshape(-1, 3).astype("float64")
+            offset = points.min(axis=0)
+            scale = (points.max(axis=0) - offset) / 65535.0
+            scale[scale == 0] = 1.0
+            data = numpy.rint((points - offset) / scale - 32768.0).astype("int16")
+            meta.update(offset=offset.tolist(), scale=scale.tolist())
+        elif method in ("int16", "float32"):
+            method = "float32"
+            data = array.astype("float32")
+        else:
+            method = "float64"
+            data = array
+    else:
+        method = encoding.get("indices", "raw")
+        if method == "delta":
+            data = numpy.diff(array.astype("int64"), prepend=0).astype("int32")
+        else:
+            data = array
+    meta["encoding"] = method
+
+    raw = numpy.ascontiguousarray(data).tobytes()
+    compression = encoding.get("compression", "none")
+    if compression == "lz4" and _lz4_found:
+        raw = lz4_frame.compress(raw)
+    elif compression in ("lz4", "zlib"):
+        compression = "zlib"
+        raw = zlib.compress(raw, 1)
+    else:
+        compression = "none"
+    meta["compression"] = compression
+    return raw, meta
+
+
+def decode_array(data: bytes, meta: Dict[str, Any]) -> numpy.ndarray:
+    """Decode a buffer encoded by `encode_array`."""
+    compression = meta["compression"]
+    if compression == "zlib":
+        data = zlib.decompress(data)
+    elif compression == "lz4":
+        if not _lz4_found:
+            raise ImportError("lz4 is required to decode this buffer")
+        data = lz4_frame.decompress(data)
+
+    dtype = numpy.dtype(meta["dtype"])
+    method = meta["encoding"]
+    if method == "int16":
+        quantized = numpy.frombuffer(data, dtype="int16").reshape(-1, 3)
+        points = (quantized + 32768.0) * meta["scale"] + meta["offset"]
+        return points.ravel().astype(dtype)
+    elif method == "float32":
+        return numpy.frombuffer(data, dtype="float32").astype(dtype)
+    elif method == "delta":
+        return numpy.cumsum(numpy.frombuffer(data, dtype="int32")).astype(dtype)
+    return numpy.frombuffer(data, dtype=dtype).copy()
+
+
+def encode_geometry_buffers(
+    arrays: List[numpy.ndarray], encoding: Optional[Dict[str, str]]
+) -> Tuple[List[bytes], Optional[List[Dict[str, Any]]]]:
+    """Encode a list of geometry buffers; if `encoding` is `None`, buffers
+    are returned as raw bytes, with no metadata."""
+    if encoding is None:
+        return [array.tobytes() for array in arrays], None
+    buffers, metadata = [], []
+    for array in arrays:
+        data, meta = encode_array(array, encoding)
+        buffers.append(data)
+        metadata.append(meta)
+    return buffers, metadata
@@ -0,0 +1,76 @@
+import logging
+import threading
+from collections import deque
+from itertools import islice
+from typing import Deque, Tuple
+
+
+class RingBufferHandler(logging.Handler):
+    """Logging handler keeping the most recent formatted records in memory.
+
+    Each record is given an offset, increasing by one per record, so that
+    readers can fetch the records emitted since their last read in a time
+    proportional to the number of new records. Oldest records are discarded
+    once the total size of the kept messages exceeds `max_size`.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of characters kept in memory.
+    level : int
+        Logging level of the handler.
+    """
+
+    def __init__(self, max_size: int = 1 << 20, level: int = logging.NOTSET) -> None:
+        super().__init__(level)
+        self.max_size = max_size
+        self._records: Deque[str] = deque()
+        self._size = 0
+        self._start = 0  # offset of first kept record
+        self._lock = threading.Lock()
+
+    @property
+    def end(self) -> int:
+        """Offset of the next record."""
+        return self._start + len(self._records)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            text = self.format(record) + "\n"
+        except Exception:
+            self.handleError(record)
+            return
+        with self._lock:
+            self._records.append(text)
+            self._size += len(text)
+            while self._size > self.max_size and len(self._records) > 1:
+                self._size -= len(self._records.popleft())
+                self._start += 1
+
+    def read(self, offset: int = 0) -> Tuple[str, int]:
+        """Return the text of records from `offset` onwards, and the offset
+        of the next record. Records discarded from the buffer are skipped.
+        """
+        with self._lock:
+            start = max(offset - self._start, 0)
+            n_records = len(self._records)
+            if start >= n_records:
+                return "", self._start + n_records
+            if start == 0:
+                text = "".join(self._records)
+            else:
+                # Iterate from the right end, which is where new records are
+                new = list(islice(reversed(self._records), n_records - start))
+                text = "".join(reversed(new))
+            return text, self._start + n_records
+
+    def getvalue(self) -> str:
+        """Text of all records in buffer."""
+        return self.read()[0]
+
+    def clear(self) -> None:
+        """Discard all records; offsets keep increasing."""
+        with self._lock:
+            self._start += len(self._records)
+            self._records.clear()
+            self._size = 0
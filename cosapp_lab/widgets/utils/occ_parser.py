@@ -1,12 +1,16 @@
 import logging
-import uuid
 import numpy
 
-from typing import List, Optional
+from itertools import chain
+from concurrent.futures import Executor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from .tessellation_cache import TessellationCache
 
 try:
     from OCC import Core as OCC_Core
     from OCC.Core.BRepMesh import BRepMesh_IncrementalMesh
+    from OCC.Core.BRepBuilderAPI import BRepBuilderAPI_Copy
     from OCC.Core import Poly
     from OCC.Core.TopExp import TopExp_Explorer
     from OCC.Core.BRepBndLib import brepbndlib
@@ -18,21 +22,240 @@ except ImportError as e:
     OCC_Core = None
     Poly = None
     BRepMesh_IncrementalMesh = None
+    BRepBuilderAPI_Copy = None
     TopExp_Explorer = None
     _OCC_found = False
 
 logger = logging.getLogger(__name__)
 
+# Number of nodes or triangles extracted per block in per-component fallback
+EXTRACTION_CHUNK = 4096
+
+
+class MeshParams(NamedTuple):
+    """Tessellation parameters of a shape.
+
+    Attributes
+    ----------
+    mesh_quality : Optional[float]
+        Mesh quality factor, applied to a deviation computed from the shape
+        size; lower is finer. If `None`, relative deviation `deviation`
+        is used instead.
+    deviation : float
+        Relative deviation, used if `mesh_quality` is `None`.
+    color : str
+        Color of the faces.
+    transparent : bool
+        Transparency of the faces.
+    edge : bool
+        If `True`, edges are meshed as well.
+    merged : bool
+        If `True`, the shape is meshed in merged format (see `MergedBuffers`).
+    coarse : bool
+        If `True`, the mesh is a coarse level of detail, computed on a copy
+        of the shape (see `OccParser.mesh_shape`).
+    """
+    mesh_quality: Optional[float] = None
+    deviation: float = 0.005
+    color: str = "#156289"
+    transparent: bool = False
+    edge: bool = True
+    merged: bool = False
+    coarse: bool = False
+
+
+class ShapeMesh:
+    """Tessellation of a single shape.
+
+    Attributes
+    ----------
+    faces : List[Dict]
+        Description (location, color...) of each face mesh.
+    edges : List[Dict]
+        Edge meshes.
+    buffers : List[numpy.ndarray]
+        Position and index buffers of face meshes, two per face; in merged
+        format, shared position, face index and edge index buffers.
+    layout : Optional[Dict]
+        Description of merged buffers; `None` if not in merged format.
+    edge_faces : List[int]
+        Index in `faces` of the face supporting each edge.
+    face_indices : List[int]
+        Index of each face of `faces` among all faces of the shape, in
+        exploration order; faces without triangulation are not in `faces`.
+    """
+
+    __slots__ = ("faces", "edges", "buffers", "layout", "edge_faces", "face_indices")
+
+    def __init__(self) -> None:
+        self.faces: List[Dict] = []
+        self.edges: List[Dict] = []
+        self.buffers: List[numpy.ndarray] = []
+        self.layout: Optional[Dict] = None
+        self.edge_faces: List[int] = []
+        self.face_indices: List[int] = []
+
+    def moved(self, transforms: List[Dict[str, List[float]]]) -> Optional["ShapeMesh"]:
+        """Return a copy of the mesh with new face locations `transforms`
+        (one `{"pos", "quat"}` dictionary per face of the shape, meshed or
+        not); buffers are shared. Return `None` if `transforms` does not
+        match the faces of the mesh."""
+        if self.face_indices and self.face_indices[-1] >= len(transforms):
+            return None
+        face_transforms = [transforms[index] for index in self.face_indices]
+        mesh = ShapeMesh()
+        mesh.faces = [
+            {**face, **transform} for face, transform in zip(self.faces, face_transforms)
+        ]
+        mesh.edges = [
+            {**edge, **face_transforms[face]}
+            for edge, face in zip(self.edges, self.edge_faces)
+        ]
+        mesh.buffers = self.buffers
+        mesh.layout = self.layout
+        mesh.edge_faces = self.edge_faces
+        mesh.face_indices = self.face_indices
+        return mesh
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint of the mesh data, in bytes."""
+        return sum(buffer.nbytes for buffer in self.buffers) + 8 * sum(
+            len(edge.get("vertices", ())) + len(edge.get("faces", ()))
+            for edge in self.edges
+        )
+
+
+class MergedBuffers:
+    """Buffers of a shape tessellation in merged format.
+
+    Node positions of all faces are stored in a single float32 buffer, and
+    triangles in a single index buffer, with indices relative to the
+    start of the position buffer. Edges are stored as polylines in a
+    separate index buffer, referring to the same positions. Faces and
+    edges are described by `[start, count]` ranges in these buffers.
+    Indices are stored as uint16 if possible, and as uint32 otherwise.
+    """
+
+    def __init__(self) -> None:
+        self._positions: List[numpy.ndarray] = []
+        self._indices: List[numpy.ndarray] = []
+        self._edge_indices: List[numpy.ndarray] = []
+        self.n_vertices = 0
+        self.n_indices = 0
+        self.n_edge_indices = 0
+
+    def add_face(self, nodes: numpy.ndarray, triangles: numpy.ndarray) -> Tuple[List[int], List[int]]:
+        """Add a face mesh.
+
+        Parameters
+        ----------
+        nodes : numpy.ndarray
+            (n_nodes, 3) array of node coordinates.
+        triangles : numpy.ndarray
+            (n_triangles, 3) array of 1-based node indices.
+
+        Returns
+        -------
+        Tuple[List[int], List[int]]
+            Vertex range and index range of the face.
+        """
+        start = self.n_vertices
+        self._positions.append(nodes.astype("float32").ravel())
+        self._indices.append(triangles.ravel() + (start - 1))
+        vertex_range = [start, len(nodes)]
+        index_range = [self.n_indices, triangles.size]
+        self.n_vertices += len(nodes)
+        self.n_indices += triangles.size
+        return vertex_range, index_range
+
+    def add_edge(self, nodes: numpy.ndarray, vertex_start: int) -> List[int]:
+        """Add an edge polyline, given by the 1-based indices `nodes` of its
+        vertices in the face starting at `vertex_start`; returns the index
+        range of the edge."""
+        self._edge_indices.append(numpy.asarray(nodes, dtype="int64") + (vertex_start - 1))
+        index_range = [self.n_edge_indices, len(nodes)]
+        self.n_edge_indices += len(nodes)
+        return index_range
+
+    @property
+    def index_type(self) -> str:
+        return "uint16" if self.n_vertices <= 2 ** 16 else "uint32"
+
+    def buffers(self) -> List[numpy.ndarray]:
+        """Position, face index and edge index buffers."""
+        def concatenate(arrays: List[numpy.ndarray], dtype: str) -> numpy.ndarray:
+            if not arrays:
+                return numpy.empty(0, dtype=dtype)
+            return numpy.concatenate(arrays).astype(dtype, copy=False)
+
+        index_type = self.index_type
+        return [
+            concatenate(self._positions, "float32"),
+            concatenate(self._indices, index_type),
+            concatenate(self._edge_indices, index_type),
+        ]
+
+    def layout(self) -> Dict:
+        return {
+            "index_type": self.index_type,
+            "vertex_count": self.n_vertices,
+            "index_count": self.n_indices,
+            "edge_index_count": self.n_edge_indices,
+        }
+
 
 class OccParser:
-    """Helper class to create a triangulation of shape."""
+    """Helper class to create a triangulation of shape.
+
+    Parameters
+    ----------
+    shape_list : Optional[List[Union[OCC_Core.TopoDS.TopoDS_Shape, Dict]]]
+        Shapes to be meshed, given either as OCC shapes or as dictionaries
+        with keys `shape`, and optionally `color`, `transparent`, `edge`,
+        `misc_data`, `deviation` (relative deviation, 0.005 by default)
+        and `lod` (list of coarser relative deviations, see `level`).
+    mesh_quality : float
+        Mesh quality factor applied to OCC shapes; lower is finer.
+    cache : Optional[TessellationCache]
+        Cache of shape tessellations; if provided, shapes found in the cache
+        are not meshed again.
+    executor : Optional[concurrent.futures.Executor]
+        Process pool used to mesh shapes concurrently; if `None` (default),
+        shapes are meshed sequentially. Shapes are sent to worker processes
+        by pickling.
+    lod_levels : Sequence[float]
+        Mesh quality factors of coarse levels of detail of OCC shapes,
+        from coarsest to finest; `mesh_quality` is the finest level.
+    level : Optional[int]
+        Level of detail to be meshed, 0 being the coarsest; if `None`
+        (default), shapes are meshed at their finest level. Shapes which
+        can be refined are listed in attribute `lod`.
+    merged : bool
+        If `True`, each shape is output in merged format (three buffers
+        per shape, see `MergedBuffers`), described by data `layout_<idx>`.
+        If `False` (default), each face is output as a pair of float64
+        position and uint16 index buffers.
+    previous : Optional[OccParser]
+        Tessellation of the previous state of the same shape list. Shapes
+        identical to their previous state are not meshed again, and shapes
+        only moved since (same TShape and orientation, different location)
+        reuse the previous mesh with updated locations. Their indices are
+        listed in attributes `unchanged` and `moved`, respectively.
+    """
 
     def __init__(self,
         shape_list: Optional[List["OCC_Core.TopoDS.TopoDS_Shape"]] = None,
         mesh_quality = 0.75,
+        cache: Optional[TessellationCache] = None,
+        executor: Optional[Executor] = None,
+        lod_levels: Sequence[float] = (),
+        level: Optional[int] = None,
+        merged: bool = False,
+        previous: Optional["OccParser"] = None,
     ):
         if _OCC_found:
-            input_shape_list = shape_list
+            input_shape_list = shape_list or []
         else:
             input_shape_list = []
             logger.warning(
@@ -42,51 +265,248 @@ class OccParser:
         self.threejs_data = {}
         self.binary_data: List[numpy.ndarray] = []
         self.binary_position = {}
-        self._faces = {}
-        self._faces_pos = {}
+        # Faces of the shape being meshed, with their index in mesh and position
+        # buffer (or the start of their vertex range, in merged format)
+        self._faces = None
+        self._faces_pos: List[Tuple[int, Union[List[float], int]]] = []
+        self._merged: Optional[MergedBuffers] = None
         self.shape_idx = 0
+        self.cache = cache
+        self.executor = executor
+        # Shapes meshed below their finest level of detail, as
+        # {shape index: (shape, [MeshParams of each level], current level)}
+        self.lod: Dict[int, Tuple["OCC_Core.TopoDS.TopoDS_Shape", List[MeshParams], int]] = {}
+        # Meshed shapes, as {shape index: (shape, MeshParams, ShapeMesh)}
+        self.shapes: Dict[int, Tuple["OCC_Core.TopoDS.TopoDS_Shape", MeshParams, ShapeMesh]] = {}
+        self.unchanged: Set[int] = set()
+        self.moved: Set[int] = set()
+
+        # Collect shapes to be meshed first, so that they can be meshed
+        # concurrently; output data is then assembled in input order.
+        entries = []
+        tasks = []
+
+        def add_task(shape, levels: List[MeshParams], misc_data=None):
+            levels = [params._replace(coarse=True) for params in levels[:-1]] + levels[-1:]
+            current = len(levels) - 1 if level is None else min(level, len(levels) - 1)
+            if current < len(levels) - 1:
+                self.lod[len(entries)] = (shape, levels, current)
+            tasks.append((len(entries), shape, levels[current]))
+            entries.append([None, misc_data])
 
         for shape in input_shape_list:
             if isinstance(shape, OCC_Core.TopoDS.TopoDS_Shape):
-                my_deviation = self.compute_default_deviation(shape)
-
-                self.threejs_data[self.shape_idx] = []
-                if self.shape_idx == 0:
-                    self.binary_position[self.shape_idx] = [0, -1]
-                else:
-                    last = self.binary_position[self.shape_idx - 1][1]
-                    self.binary_position[self.shape_idx] = [last + 1, last]
-                self.threejs_data[f"edge_{self.shape_idx}"] = []
-                BRepMesh_IncrementalMesh(
-                    shape, my_deviation * mesh_quality, False, 0.5 * mesh_quality, True
+                add_task(
+                    shape,
+                    [
+                        MeshParams(quality, merged=merged)
+                        for quality in (*lod_levels, mesh_quality)
+                    ],
                 )
-                self.__build_face_mesh(shape)
-                self.__build_edge_mesh(shape)
-                self.shape_idx += 1
 
             elif isinstance(shape, dict):
-                self.threejs_data[self.shape_idx] = []
-                if self.shape_idx == 0:
-                    self.binary_position[self.shape_idx] = [0, -1]
-                else:
-                    last = self.binary_position[self.shape_idx - 1][1]
-                    self.binary_position[self.shape_idx] = [last + 1, last]
-                self.threejs_data[f"edge_{self.shape_idx}"] = []
-                self.threejs_data[f"misc_{self.shape_idx}"] = shape.get("misc_data", {})
                 if shape["shape"] is not None:
-                    BRepMesh_IncrementalMesh(shape["shape"], 0.005, True, 0.5, True)
-                    color = shape.get("color", "#156289")
-                    trans = shape.get("transparent", False)
-                    self.__build_face_mesh(shape["shape"], color, trans)
-                    render_edge = shape.get("edge", False)
-                    if render_edge:
-                        self.__build_edge_mesh(shape["shape"])
+                    options = (
+                        shape.get("color", "#156289"),
+                        shape.get("transparent", False),
+                        shape.get("edge", False),
+                        merged,
+                    )
+                    deviations = (*shape.get("lod", ()), shape.get("deviation", 0.005))
+                    add_task(
+                        shape["shape"],
+                        [MeshParams(None, deviation, *options) for deviation in deviations],
+                        shape.get("misc_data", {}),
+                    )
+                else:
+                    entries.append([ShapeMesh(), shape.get("misc_data", {})])
+
+        if previous is not None:
+            remaining = []
+            for task in tasks:
+                mesh = self.__reuse_mesh(previous, *task)
+                if mesh is None:
+                    remaining.append(task)
+                else:
+                    entries[task[0]][0] = mesh
+                    self.shapes[task[0]] = (task[1], task[2], mesh)
+            tasks = remaining
+
+        meshes = self.mesh_shapes([(shape, params) for _, shape, params in tasks])
+        for (position, shape, params), mesh in zip(tasks, meshes):
+            entries[position][0] = mesh
+            self.shapes[position] = (shape, params, mesh)
+        for mesh, misc_data in entries:
+            self.__add_shape_mesh(mesh, misc_data)
+
+    def __reuse_mesh(
+        self,
+        previous: "OccParser",
+        position: int,
+        shape: "OCC_Core.TopoDS.TopoDS_Shape",
+        params: MeshParams,
+    ) -> Optional[ShapeMesh]:
+        """Return the mesh of shape `position` in `previous`, if the shape is
+        unchanged or only moved since; `None` otherwise."""
+        try:
+            old_shape, old_params, old_mesh = previous.shapes[position]
+        except KeyError:
+            return None
+        if (
+            old_params != params
+            or not old_shape.IsPartner(shape)
+            or old_shape.Orientation() != shape.Orientation()
+        ):
+            return None
+        if old_shape.IsEqual(shape):
+            self.unchanged.add(position)
+            return old_mesh
+        mesh = old_mesh.moved(self.get_face_transforms(shape))
+        if mesh is not None:
+            self.moved.add(position)
+        return mesh
+
+    def get_face_transforms(self, shape: "OCC_Core.TopoDS.TopoDS_Shape") -> List[Dict[str, List[float]]]:
+        """Locations of all faces of `shape`, in exploration order.
+
+        Locations are read from the topology, so that they do not depend on
+        the triangulation of faces in the current process: meshes computed
+        in worker processes or read from cache leave the shape untouched.
+        """
+        transforms = []
+        expl = TopExp_Explorer(shape, OCC_Core.TopAbs.TopAbs_FACE)
+        while expl.More():
+            transforms.append(self.location_transform(expl.Current().Location()))
+            expl.Next()
+        return transforms
+
+    def mesh_shapes(
+        self, shapes: List[Tuple["OCC_Core.TopoDS.TopoDS_Shape", MeshParams]]
+    ) -> List[ShapeMesh]:
+        """Get the tessellation of several shapes, from cache if available.
+
+        Shapes missing from cache are meshed in the process pool `executor`,
+        if any, or sequentially otherwise.
+
+        Parameters
+        ----------
+        shapes : List[Tuple[OCC_Core.TopoDS.TopoDS_Shape, MeshParams]]
+            Shapes to be meshed, with their meshing parameters.
+
+        Returns
+        -------
+        List[ShapeMesh]
+            Shape tessellations, in input order.
+        """
+        meshes: List[Optional[ShapeMesh]] = [None] * len(shapes)
+        missing = []
+        for i, (shape, params) in enumerate(shapes):
+            if self.cache is not None:
+                meshes[i] = self.cache.get(shape, params)
+            if meshes[i] is None:
+                missing.append(i)
 
-                self.shape_idx += 1
+        results = None
+        if self.executor is not None and len(missing) > 1:
+            try:
+                results = list(self.executor.map(
+                    _mesh_shape,
+                    [shapes[i][0] for i in missing],
+                    [shapes[i][1] for i in missing],
+                ))
+            except Exception as error:
+                logger.warning(f"Parallel meshing failed ({error!r}); meshing sequentially")
+        if results is None:
+            results = [self.mesh_shape(*shapes[i]) for i in missing]
+
+        for i, mesh in zip(missing, results):
+            meshes[i] = mesh
+            if self.cache is not None:
+                self.cache.put(shapes[i][0], shapes[i][1], mesh)
+        return meshes
+
+    def get_shape_mesh(
+        self,
+        shape: "OCC_Core.TopoDS.TopoDS_Shape",
+        params: MeshParams = MeshParams(),
+    ) -> ShapeMesh:
+        """Get the tessellation of a shape, from cache if available."""
+        return self.mesh_shapes([(shape, params)])[0]
+
+    def mesh_shape(
+        self,
+        shape: "OCC_Core.TopoDS.TopoDS_Shape",
+        params: MeshParams = MeshParams(),
+    ) -> ShapeMesh:
+        """Compute the tessellation of a shape.
+
+        Parameters
+        ----------
+        shape : OCC_Core.TopoDS.TopoDS_Shape
+            Shape to be meshed.
+        params : MeshParams
+            Meshing parameters.
+
+        Returns
+        -------
+        ShapeMesh
+
+        Notes
+        -----
+        Triangulations are stored in the shape, and meshing a shape already
+        triangulated with a finer deviation keeps the finer triangulation.
+        Coarse levels of detail are therefore meshed on a copy of the shape
+        without triangulation, leaving the shape itself to finer levels.
+        """
+        if params.coarse:
+            shape = BRepBuilderAPI_Copy(shape).Shape()
+        if params.mesh_quality is None:
+            BRepMesh_IncrementalMesh(shape, params.deviation, True, 0.5, True)
+        else:
+            deviation = self.compute_default_deviation(shape)
+            BRepMesh_IncrementalMesh(
+                shape,
+                deviation * params.mesh_quality,
+                False,
+                0.5 * params.mesh_quality,
+                True,
+            )
+        mesh = ShapeMesh()
+        self._faces = OCC_Core.TopTools.TopTools_IndexedMapOfShape()
+        self._faces_pos = []
+        self._merged = MergedBuffers() if params.merged else None
+        self.__build_face_mesh(shape, mesh, params.color, params.transparent)
+        if params.edge:
+            self.__build_edge_mesh(shape, mesh)
+        if self._merged is not None:
+            mesh.buffers = self._merged.buffers()
+            mesh.layout = self._merged.layout()
+        self._faces = None
+        self._faces_pos = []
+        self._merged = None
+        return mesh
+
+    def __add_shape_mesh(self, mesh: ShapeMesh, misc_data: Optional[Dict] = None):
+        """Append the tessellation of a shape to output data."""
+        idx = self.shape_idx
+        self.threejs_data[idx] = list(mesh.faces)
+        if idx == 0:
+            first = 0
+        else:
+            first = self.binary_position[idx - 1][1] + 1
+        self.binary_position[idx] = [first, first + len(mesh.buffers) - 1]
+        self.threejs_data[f"edge_{idx}"] = list(mesh.edges)
+        if mesh.layout is not None:
+            self.threejs_data[f"layout_{idx}"] = mesh.layout
+        if misc_data is not None:
+            self.threejs_data[f"misc_{idx}"] = misc_data
+        self.binary_data.extend(mesh.buffers)
+        self.shape_idx += 1
 
     def __build_face_mesh(
         self,
         sh: "OCC_Core.TopoDS.TopoDS_Shape",
+        mesh: ShapeMesh,
         color: str = "#156289",
         transparent: bool = False,
     ):
@@ -98,19 +518,24 @@ class OccParser:
         ----------
         sh : OCC_Core.TopoDS.TopoDS_Shape
             Input shape to me meshed.
-
+        mesh : ShapeMesh
+            Output tessellation.
         """
         expl = TopExp_Explorer(sh, OCC_Core.TopAbs.TopAbs_FACE)
+        index = 0
         while expl.More():
             face = OCC_Core.TopoDS.topods.Face(expl.Current())
-            self.__addFaceMesh(face, color, transparent)
+            if self.__addFaceMesh(face, mesh, color, transparent):
+                mesh.face_indices.append(index)
+            index += 1
             expl.Next()
 
     def __addFaceMesh(self,
         face: "OCC_Core.TopoDS.TopoDS_Face",
+        mesh: ShapeMesh,
         color: str,
         transparent: bool,
-    ):
+    ) -> bool:
         """
         Helper function to create a triangle mesh of input surface . This is a simplified
         version of the corresponding function in Pyoccad
@@ -119,50 +544,53 @@ class OccParser:
         ----------
         face : OCC_Core.TopoDS.TopoDS_Face
             Input shape to me meshed.
+        mesh : ShapeMesh
+            Output tessellation.
+
+        Returns
+        -------
+        bool
+            `False` if the face has no triangulation, `True` otherwise.
         """
         loc = OCC_Core.TopLoc.TopLoc_Location()
         T = OCC_Core.BRep.BRep_Tool().Triangulation(face, loc)
         if T is None:
-            return
+            return False
 
-        vtx = []
-        for node in self.get_nodes(T):
-            vtx.extend(node.Coord(d) for d in range(1, 4))
-        idx = []
-        for triangle in self.get_triangles(T):
-            idx.extend(triangle.Value(d) - 1 for d in range(1, 4))
+        description = {
+            # "vertices": vtx,
+            # "faces": faces.tolist(),
+            **self.location_transform(loc),
+            "color": color,
+            "transparent": transparent,
+        }
+        mesh.faces.append(description)
 
-        faces = numpy.array(idx, "uint16")
-        trf = loc.Transformation()
-        translation = trf.TranslationPart()
-        quaternion = trf.GetRotation()
-        self.threejs_data[self.shape_idx].append(
-            {
-                # "vertices": vtx,
-                # "faces": faces.tolist(),
-                "pos": [
-                    translation.X(),
-                    translation.Y(),
-                    translation.Z(),
-                ],
-                "quat": [
-                    quaternion.X(),
-                    quaternion.Y(),
-                    quaternion.Z(),
-                    quaternion.W(),
-                ],
-                "color": color,
-                "transparent": transparent,
-            }
-        )
-        self.binary_data.append(numpy.array(vtx, dtype="float64"))
-        self.binary_data.append(faces)
-        self.binary_position[self.shape_idx][1] += 2
-        mesh_id = uuid.uuid4().hex
-        self._faces[mesh_id] = face
-        self._faces_pos[mesh_id] = vtx
-
-    def __build_edge_mesh(self, sh: "OCC_Core.TopoDS.TopoDS_Shape"):
+        nodes = self.get_node_array(T)
+        if self._merged is not None:
+            vertex_range, index_range = self._merged.add_face(
+                nodes, self.get_triangle_array(T)
+            )
+            description["vertex_range"] = vertex_range
+            description["index_range"] = index_range
+            face_data = vertex_range[0]
+        else:
+            positions = nodes.ravel()
+            if len(nodes) > 2 ** 16:
+                logger.warning(
+                    f"Face mesh with {len(nodes)} nodes exceeds uint16 indices; "
+                    "use merged format to render it correctly"
+                )
+            faces = (self.get_triangle_array(T).ravel() - 1).astype("uint16")
+            mesh.buffers.append(positions)
+            mesh.buffers.append(faces)
+            face_data = positions.tolist()
+        # Faces are indexed (from 1) in the order of their first occurrence
+        if self._faces.Add(face) > len(self._faces_pos):
+            self._faces_pos.append((len(mesh.faces) - 1, face_data))
+        return True
+
+    def __build_edge_mesh(self, sh: "OCC_Core.TopoDS.TopoDS_Shape", mesh: ShapeMesh):
         """
         Create a the edge mesh input shape. This is a simplified
         version of the corresponding function in Pyoccad
@@ -171,6 +599,8 @@ class OccParser:
         ----------
         sh : OCC_Core.TopoDS.TopoDS_Shape
             Input shape to me meshed.
+        mesh : ShapeMesh
+            Output tessellation.
         """
         edgeMap = OCC_Core.TopTools.TopTools_IndexedDataMapOfShapeListOfShape()
         OCC_Core.TopExp.topexp.MapShapesAndAncestors(
@@ -183,36 +613,34 @@ class OccParser:
                 face = OCC_Core.TopoDS.topods.Face(faceList.First())
                 edge = OCC_Core.TopoDS.topods.Edge(edgeMap.FindKey(i))
                 # Looking for face mesh to recover position buffer and save memory
-                for mesh_id, f in self._faces.items():
-                    if face.IsSame(f):
-                        vertexBuffer = self._faces_pos.get(mesh_id, None)
+                face_index = self._faces.FindIndex(face)
+                if face_index > 0:
+                    face_ordinal, vertexBuffer = self._faces_pos[face_index - 1]
+                else:
+                    vertexBuffer = None
 
                 if vertexBuffer is not None:
                     loc = OCC_Core.TopLoc.TopLoc_Location()
                     tri = OCC_Core.BRep.BRep_Tool().Triangulation(face, loc)
-                    trf = loc.Transformation()
-                    translation = trf.TranslationPart()
-                    quaternion = trf.GetRotation()
+                    transform = self.location_transform(loc)
                     # polygon = Poly.PolygonOnTriangulation(edge, face, loc)
                     polygon = OCC_Core.BRep.BRep_Tool().PolygonOnTriangulation(edge, tri, loc)
-
-                    self.threejs_data[f"edge_{self.shape_idx}"].append(
-                        {
+                    if self._merged is not None:
+                        if polygon is None:
+                            continue
+                        description = {
+                            "index_range": self._merged.add_edge(
+                                self.get_polygon_nodes(polygon), vertexBuffer
+                            ),
+                        }
+                    else:
+                        description = {
                             "vertices": vertexBuffer,
                             "faces": list(range(polygon.NbNodes())),
-                            "pos": [
-                                translation.X(),
-                                translation.Y(),
-                                translation.Z(),
-                            ],
-                            "quat": [
-                                quaternion.X(),
-                                quaternion.Y(),
-                                quaternion.Z(),
-                                quaternion.W(),
-                            ],
                         }
-                    )
+
+                    mesh.edges.append({**description, **transform})
+                    mesh.edge_faces.append(face_ordinal)
 
     def compute_default_deviation(self, shape) -> float:
         """Compute the minimum size of `shape` bounding box.
@@ -223,6 +651,26 @@ class OccParser:
         x_min, y_min, z_min, x_max, y_max, z_max = box.Get()
         return max(x_max - x_min, y_max - y_min, z_max - z_min) * 2e-2
 
+    @staticmethod
+    def location_transform(loc: "OCC_Core.TopLoc.TopLoc_Location") -> Dict[str, List[float]]:
+        """Translation vector `pos` and rotation quaternion `quat` of a location."""
+        trf = loc.Transformation()
+        translation = trf.TranslationPart()
+        quaternion = trf.GetRotation()
+        return {
+            "pos": [
+                translation.X(),
+                translation.Y(),
+                translation.Z(),
+            ],
+            "quat": [
+                quaternion.X(),
+                quaternion.Y(),
+                quaternion.Z(),
+                quaternion.W(),
+            ],
+        }
+
     @staticmethod
     def get_nodes(T):
         for i in range(T.NbNodes()):
@@ -231,3 +679,77 @@ class OccParser:
     @staticmethod
     def get_triangles(T):
         yield from T.Triangles()
+
+    @staticmethod
+    def get_node_array(T) -> numpy.ndarray:
+        """Extract the nodes of triangulation `T` into a (n_nodes, 3) array.
+
+        Node coordinates are read as tuples (one call per node) and streamed
+        into a preallocated array; if tuple accessors are not available,
+        coordinates are read one component at a time, by chunks of
+        `EXTRACTION_CHUNK` nodes.
+        """
+        n_nodes = T.NbNodes()
+        nodes = numpy.empty((n_nodes, 3), dtype="float64")
+        if n_nodes == 0:
+            return nodes
+        try:
+            coords = (T.Node(i).Coord() for i in range(1, n_nodes + 1))
+            nodes.ravel()[:] = numpy.fromiter(
+                chain.from_iterable(coords), dtype="float64", count=3 * n_nodes
+            )
+        except (TypeError, ValueError):
+            for start, chunk in OccParser._chunks(OccParser.get_nodes(T), n_nodes):
+                nodes[start:start + len(chunk)] = [
+                    [node.Coord(d) for d in range(1, 4)] for node in chunk
+                ]
+        return nodes
+
+    @staticmethod
+    def get_triangle_array(T) -> numpy.ndarray:
+        """Extract the (1-based) node indices of triangulation `T` into a
+        (n_triangles, 3) array.
+
+        Same strategy as `get_node_array`, using `Poly_Triangle.Get`.
+        """
+        n_triangles = T.NbTriangles()
+        triangles = numpy.empty((n_triangles, 3), dtype="int64")
+        if n_triangles == 0:
+            return triangles
+        try:
+            if hasattr(T, "Triangle"):
+                items = (T.Triangle(i).Get() for i in range(1, n_triangles + 1))
+            else:
+                items = (triangle.Get() for triangle in T.Triangles())
+            triangles.ravel()[:] = numpy.fromiter(
+                chain.from_iterable(items), dtype="int64", count=3 * n_triangles
+            )
+        except (TypeError, ValueError):
+            for start, chunk in OccParser._chunks(OccParser.get_triangles(T), n_triangles):
+                triangles[start:start + len(chunk)] = [
+                    [triangle.Value(d) for d in range(1, 4)] for triangle in chunk
+                ]
+        return triangles
+
+    @staticmethod
+    def get_polygon_nodes(polygon) -> numpy.ndarray:
+        """Extract the (1-based) triangulation node indices of
+        polygon-on-triangulation `polygon`."""
+        if hasattr(polygon, "Node"):
+            nodes = (polygon.Node(i) for i in range(1, polygon.NbNodes() + 1))
+        else:
+            array = polygon.Nodes()
+            nodes = (array.Value(i) for i in range(array.Lower(), array.Upper() + 1))
+        return numpy.fromiter(nodes, dtype="int64", count=polygon.NbNodes())
+
+    @staticmethod
+    def _chunks(items: Iterator, size: int):
+        """Yield (start index, list of items) blocks of `EXTRACTION_CHUNK`
+        items from an iterator of `size` items."""
+        for start in range(0, size, EXTRACTION_CHUNK):
+            yield start, [item for _, item in zip(range(EXTRACTION_CHUNK), items)]
+
+
+def _mesh_shape(shape: "OCC_Core.TopoDS.TopoDS_Shape", params: MeshParams) -> ShapeMesh:
+    """Compute the tessellation of a shape in a worker process."""
+    return OccParser().mesh_shape(shape, params)
@@ -0,0 +1,102 @@
+from typing import Any, Dict, Tuple
+
+import numpy
+
+from .binary_transport import BINARY_KINDS
+
+# Kinds of value, used to select the serialization method
+SCALAR = 0
+STRING = 1
+ARRAY = 2
+NUMPY_SCALAR = 3
+CONTAINER = 4
+OPAQUE = 5
+
+NON_JSONABLE = "non-jsonable"
+
+
+def classify(value: Any) -> int:
+    """Return the kind of input value, among `SCALAR`, `STRING`, `ARRAY`,
+    `NUMPY_SCALAR`, `CONTAINER` and `OPAQUE`.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return SCALAR
+    elif isinstance(value, str):
+        return STRING
+    elif isinstance(value, numpy.ndarray):
+        return ARRAY
+    elif isinstance(value, (numpy.number, numpy.bool_)):
+        return NUMPY_SCALAR
+    elif isinstance(value, (list, tuple, dict)):
+        return CONTAINER
+    return OPAQUE
+
+
+def is_plain_json(value: Any) -> bool:
+    """Check if input value can be dumped by `json.dumps` without conversion.
+    Contrary to `is_jsonable`, the value is not serialized.
+    """
+    kind = classify(value)
+    if kind == SCALAR or kind == STRING:
+        return True
+    elif kind == CONTAINER:
+        if isinstance(value, dict):
+            return all(
+                key is None or isinstance(key, (str, int, float))
+                for key in value
+            ) and all(is_plain_json(item) for item in value.values())
+        return all(is_plain_json(item) for item in value)
+    return False
+
+
+class VariableSerializer:
+    """Helper class to serialize variable values in a single pass.
+
+    The kind of each variable is computed at first serialization and
+    cached, keyed by variable name; it is only computed again if the type
+    of the variable value changes.
+    """
+
+    def __init__(self) -> None:
+        self._kinds: Dict[str, Tuple[type, int]] = {}
+
+    def kind(self, key: str, value: Any) -> int:
+        """Return the (cached) kind of variable `key`."""
+        cached = self._kinds.get(key)
+        value_type = type(value)
+        if cached is None or cached[0] is not value_type:
+            cached = self._kinds[key] = (value_type, classify(value))
+        return cached[1]
+
+    def encode(self, key: str, value: Any, binary: bool = False) -> Any:
+        """Return a JSON-compatible version of variable value.
+
+        Parameters
+        ----------
+        key : str
+            Name of the variable
+
+        value : Any
+            Value of the variable
+
+        binary : bool
+            If `True`, numeric arrays are returned as copies instead of lists.
+
+        Returns
+        -------
+        Any
+            Serializable value, or `"non-jsonable"` if the value can not be
+            serialized.
+        """
+        kind = self.kind(key, value)
+        if kind == SCALAR or kind == STRING:
+            return value
+        elif kind == ARRAY:
+            if binary and value.dtype.kind in BINARY_KINDS:
+                return numpy.array(value)
+            return value.tolist()
+        elif kind == NUMPY_SCALAR:
+            return value.item()
+        elif kind == CONTAINER and is_plain_json(value):
+            return value
+        return NON_JSONABLE
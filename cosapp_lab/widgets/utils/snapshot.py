@@ -0,0 +1,196 @@
+import copy
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy
+
+from .serialization import ARRAY, NUMPY_SCALAR, SCALAR, STRING, classify
+
+PACKED_KINDS = "biufc"
+ALIGNMENT = 16
+
+
+class _SnapshotEntry:
+    """Saved value of a variable.
+
+    `mode` is one of `VariableSnapshot.REFERENCE` (immutable value, kept by
+    reference), `VariableSnapshot.PACKED` (numeric array, copied into the
+    packed buffer of the snapshot) or `VariableSnapshot.COPY` (any other
+    value, deep-copied).
+    """
+
+    __slots__ = ("accessor", "mode", "value", "current")
+
+    def __init__(self, accessor: Any, mode: int, value: Any, current: Any) -> None:
+        self.accessor = accessor
+        self.mode = mode
+        self.value = value
+        # Object held by the variable when saved or last restored;
+        # used to detect a reassignment of packed arrays.
+        self.current = current
+
+
+class VariableSnapshot:
+    """Snapshot of the values of a set of variables, used to restore a
+    system to a saved state.
+
+    Immutable values are kept by reference and numeric arrays are copied
+    into a single contiguous buffer; other values are deep-copied.
+    On restoration, only the variables whose value changed since the
+    snapshot are written back into the system.
+    """
+
+    REFERENCE = 0
+    PACKED = 1
+    COPY = 2
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, _SnapshotEntry] = {}
+        self._buffers: List[numpy.ndarray] = []
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the packed buffers, in bytes."""
+        return sum(buffer.nbytes for buffer in self._buffers)
+
+    def add(self, accessors: Dict[str, Any]) -> None:
+        """Save the current value of variables.
+
+        Parameters
+        ----------
+        accessors : Dict[str, VariableAccessor]
+            Accessors to the variables to be saved, keyed by variable path.
+            Variables which cannot be read are disregarded.
+        """
+        arrays = {}
+        for path, accessor in accessors.items():
+            try:
+                value = accessor.get()
+            except Exception:
+                continue
+            kind = classify(value)
+            if kind in (SCALAR, STRING, NUMPY_SCALAR):
+                self._entries[path] = _SnapshotEntry(
+                    accessor, self.REFERENCE, value, value
+                )
+            elif kind == ARRAY and value.dtype.kind in PACKED_KINDS:
+                arrays[path] = (accessor, value)
+            else:
+                self._entries[path] = _SnapshotEntry(
+                    accessor, self.COPY, copy.deepcopy(value), value
+                )
+
+        if arrays:
+            self._pack(arrays)
+
+    def _pack(self, arrays: Dict[str, Any]) -> None:
+        """Copy arrays into a new contiguous buffer."""
+        offsets = {}
+        size = 0
+        for path, (_, value) in arrays.items():
+            offsets[path] = size
+            size += -(-value.nbytes // ALIGNMENT) * ALIGNMENT
+        buffer = numpy.empty(size, dtype=numpy.uint8)
+        for path, (accessor, value) in arrays.items():
+            view = numpy.ndarray(
+                value.shape, dtype=value.dtype, buffer=buffer, offset=offsets[path]
+            )
+            view[...] = value
+            view.flags.writeable = False
+            self._entries[path] = _SnapshotEntry(accessor, self.PACKED, view, value)
+        self._buffers.append(buffer)
+
+    def rebind(self, accessors: Dict[str, Any]) -> None:
+        """Update variable accessors after a change of system structure;
+        entries whose path is not in `accessors` are discarded."""
+        for path in list(self._entries):
+            if path in accessors:
+                self._entries[path].accessor = accessors[path]
+            else:
+                del self._entries[path]
+
+    def value(self, path: str) -> Any:
+        """Saved value of variable `path`. Packed arrays are returned as
+        read-only views of the snapshot buffer.
+
+        Saved values never share mutable data with the system: values kept
+        by reference are immutable (numbers, strings, numpy scalars), and
+        other values are copies. They are therefore not affected by later
+        in-place modifications of variables.
+        """
+        return self._entries[path].value
+
+    def changed(self, path: str) -> bool:
+        """Check if variable `path` differs from its saved value.
+
+        Reassigned arrays, or arrays whose shape or data type changed, are
+        reported as changed without element-wise comparison. NaN values of
+        float arrays compare equal to themselves. Deep-copied values are
+        compared by equality, and reported as changed if they cannot be.
+        """
+        entry = self._entries[path]
+        current = entry.accessor.get()
+        if entry.mode == self.COPY:
+            try:
+                return type(current) is not type(entry.value) or bool(current != entry.value)
+            except Exception:
+                return True
+        if entry.mode == self.REFERENCE:
+            if current is entry.current:
+                return False
+            try:
+                return type(current) is not type(entry.value) or bool(current != entry.value)
+            except Exception:
+                return True
+        saved = entry.value
+        if (
+            current is not entry.current
+            or current.shape != saved.shape
+            or current.dtype != saved.dtype
+        ):
+            return True
+        return not numpy.array_equal(current, saved, equal_nan=saved.dtype.kind in "fc")
+
+    def restore(self, paths: Optional[Iterable[str]] = None) -> int:
+        """Restore the saved value of variables which changed.
+
+        Parameters
+        ----------
+        paths : Optional[Iterable[str]]
+            Paths of the variables to restore; if `None` (default),
+            all saved variables are considered.
+
+        Variables may be modified by computations or by user code without
+        notice, so that each considered variable is compared to its saved
+        value; the cost is proportional to the number of variables in
+        `paths`. Arrays are restored as new arrays: arrays held by the
+        variables before restoration are left untouched.
+
+        Returns
+        -------
+        int
+            Number of restored variables.
+        """
+        count = 0
+        if paths is None:
+            paths = self._entries
+        for path in paths:
+            entry = self._entries[path]
+            if entry.value is None or not self.changed(path):
+                continue
+            if entry.mode == self.REFERENCE:
+                entry.accessor.set(entry.value)
+            elif entry.mode == self.PACKED:
+                # New array, so that arrays held elsewhere (e.g. by user
+                # code) are not modified
+                entry.accessor.set(entry.value.copy())
+                entry.current = entry.accessor.get()
+            else:
+                entry.accessor.set(copy.deepcopy(entry.value))
+            count += 1
+        return count
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class TessellationCache:
+    """Least-recently-used cache of shape tessellations, with a byte budget.
+
+    Entries are keyed by shape and meshing parameters. Shapes are matched
+    by hash, then checked with `IsEqual` (same topology, location and
+    orientation), so that a shape which did not change between two
+    geometry updates is not meshed again. A reference to the shape is
+    kept in the cache, which prevents the reuse of its hash by another
+    shape.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximum size of the cached data, in bytes; least recently used
+        entries are discarded beyond this limit.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2 ** 20) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _is_same(cached: Any, shape: Any) -> bool:
+        return cached is shape or cached.IsEqual(shape)
+
+    def get(self, shape: Any, params: Hashable) -> Optional[Any]:
+        """Return the cached tessellation of `shape` computed with
+        parameters `params`, or `None` if not found."""
+        key = (hash(shape), params)
+        entry = self._entries.get(key)
+        if entry is None or not self._is_same(entry[0], shape):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, shape: Any, params: Hashable, mesh: Any) -> None:
+        """Store the tessellation `mesh` of `shape`, computed with parameters
+        `params`. Meshes larger than the cache budget are not stored.
+        """
+        key = (hash(shape), params)
+        size = mesh.nbytes
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.nbytes -= previous[2]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (shape, mesh, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= evicted
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters."""
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Cache statistics: number of entries, size in bytes, hits and misses."""
+        return {
+            "entries": len(self._entries),
+            "nbytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -3,6 +3,8 @@ import copy
 import os
 from typing import Any, Dict
 
+from .serialization import STRING, SCALAR, classify, is_plain_json
+
 
 def is_jsonable(x: Any) -> bool:
     """Helper function to check if input is jsonable
@@ -36,7 +38,10 @@ def replicate_dict_structure(x: Dict) -> Dict:
     """
     new_dict = {}
     for key, current_val in x.items():
-        if is_jsonable(current_val):
+        kind = classify(current_val)
+        if kind == SCALAR or kind == STRING:
+            new_dict[key] = current_val
+        elif is_plain_json(current_val):
             new_dict[key] = copy.deepcopy(current_val)
         elif isinstance(current_val, dict):
             new_dict[key] = replicate_dict_structure(current_val)